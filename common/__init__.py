@@ -0,0 +1,2 @@
+# Shared helpers for the scraping services (places, events, location).
+# Services add the repository root to sys.path and import `common.<module>`.
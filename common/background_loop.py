@@ -0,0 +1,67 @@
+# common/background_loop.py
+#
+# One asyncio event loop running in a daemon thread, shared by the async
+# helpers in this package (browser pool, geocoder, ...). The scraping services
+# are mostly synchronous and run inside worker threads or inside aio_pika's own
+# loop, so coroutines are submitted here instead of calling asyncio.run().
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+CANCEL_POLL_SECONDS = 0.1
+
+_loop = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="common-background-loop", daemon=True)
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro, timeout: float = None, cancel: threading.Event = None):
+    """
+    Run a coroutine on the background loop and block until it finishes.
+    Setting `cancel` (from another thread) cancels the coroutine and raises
+    concurrent.futures.CancelledError here.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    if cancel is None:
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        if cancel.is_set():
+            future.cancel()
+            raise concurrent.futures.CancelledError()
+        wait = CANCEL_POLL_SECONDS if deadline is None else min(CANCEL_POLL_SECONDS, deadline - time.monotonic())
+        try:
+            return future.result(max(wait, 0))
+        except concurrent.futures.TimeoutError:
+            if deadline is not None and time.monotonic() >= deadline:
+                future.cancel()
+                raise
+
+
+async def run_async(coro):
+    """Await a coroutine on the background loop from any other event loop."""
+    loop = get_loop()
+    try:
+        if asyncio.get_running_loop() is loop:
+            return await coro
+    except RuntimeError:
+        pass
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
@@ -0,0 +1,136 @@
+# common/bench_browser_pool.py
+#
+# Pages per second and peak RSS: launch-per-call (the old sync_playwright()
+# pattern) versus the shared warm BrowserPool.
+#
+#   python -m common.bench_browser_pool --pages 20 --url https://example.com
+#
+# Run from the repository root. RSS is summed over this process and all its
+# children (the Chromium processes), sampled while the benchmark runs.
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.browser_pool import BrowserPool
+
+DEFAULT_URL = "data:text/html,<html><body><h1>bench</h1></body></html>"
+
+
+def _children(pid: int) -> list:
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children.extend(int(c) for c in f.read().split())
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        pass
+    return children
+
+
+def tree_rss_kb(pid: int) -> int:
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        break
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+        stack.extend(_children(current))
+    return total
+
+
+class PeakRss:
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, tree_rss_kb(os.getpid()))
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def launch_per_call(url: str, pages: int, concurrency: int):
+    from playwright.sync_api import sync_playwright
+
+    def fetch():
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            page.goto(url, timeout=60000)
+            page.content()
+            browser.close()
+
+    remaining = list(range(pages))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not remaining:
+                    return
+                remaining.pop()
+            fetch()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def pooled(url: str, pages: int, pool: BrowserPool):
+    async def fetch_all():
+        await asyncio.gather(*(pool.fetch_html(url) for _ in range(pages)))
+    asyncio.run(fetch_all())
+
+
+def report(name: str, pages: int, elapsed: float, peak_kb: int):
+    print(f"{name:<18} {pages / elapsed:>7.2f} pages/s  {elapsed:>7.2f} s  peak RSS {peak_kb / 1024:>8.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Browser pool vs launch-per-call benchmark")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    with PeakRss() as rss:
+        started = time.perf_counter()
+        launch_per_call(args.url, args.pages, args.concurrency)
+        elapsed = time.perf_counter() - started
+    report("launch-per-call", args.pages, elapsed, rss.peak_kb)
+
+    pool = BrowserPool(size=2, max_pages=args.concurrency)
+    pool.fetch_html_sync(args.url)  # warm the browsers; not part of the timing
+    with PeakRss() as rss:
+        started = time.perf_counter()
+        pooled(args.url, args.pages, pool)  # the pool caps concurrency at max_pages
+        elapsed = time.perf_counter() - started
+    report("browser pool", args.pages, elapsed, rss.peak_kb)
+    print(f"pool stats: {pool.stats()}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# common/browser_pool.py
+#
+# Shared pool of warm headless Chromium browsers for the scraping services.
+# Instead of sync_playwright() + chromium.launch() for every page fetch, pages
+# are opened in a fresh, isolated context on an already running browser.
+#
+#   - at most BROWSER_POOL_MAX_PAGES pages are open at once (across browsers)
+#   - a browser is recycled after BROWSER_POOL_PAGES_PER_BROWSER pages
+#   - a crashed / disconnected browser is replaced on next use
+#
+# The pool lives on the shared background loop (common.background_loop):
+#
+#   html = await pool.run(render)         # from any event loop
+#   html = pool.run_sync(render)          # from synchronous code / threads
+#
+# where `render` is `async def render(page) -> result`.
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from common.background_loop import get_loop, run_async, run_sync
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/91.0.4472.124 Safari/537.36"
+)
+
+LAUNCH_ARGS = ["--disable-dev-shm-usage", "--disable-gpu", "--no-first-run"]
+
+
+class _PooledBrowser:
+    def __init__(self, browser):
+        self.browser = browser
+        self.active = 0
+        self.pages_served = 0
+        self.retired = False
+        self.crashed = False
+        browser.on("disconnected", lambda _: setattr(self, "crashed", True))
+
+    @property
+    def usable(self) -> bool:
+        return not self.retired and not self.crashed and self.browser.is_connected()
+
+
+class BrowserPool:
+    def __init__(self, size: int = 2, max_pages: int = 4, pages_per_browser: int = 100, headless: bool = True):
+        self.size = size
+        self.max_pages = max_pages
+        self.pages_per_browser = pages_per_browser
+        self.headless = headless
+
+        self._playwright = None
+        self._browsers = []
+        self._semaphore = None
+        self._lock = None
+        self._next = 0
+        self._stats = {"pages": 0, "errors": 0, "launches": 0, "recycled": 0, "crashed": 0, "page_ms": 0.0}
+
+    # --- lifecycle (pool loop only) -------------------------------------
+
+    async def _ensure_started(self):
+        if self._playwright is not None:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self.max_pages)
+        async with self._lock:
+            if self._playwright is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+                print(f"🧭 Browser pool started (browsers={self.size}, max pages={self.max_pages})")
+
+    async def _launch(self) -> _PooledBrowser:
+        browser = await self._playwright.chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+        self._stats["launches"] += 1
+        return _PooledBrowser(browser)
+
+    async def _close_when_idle(self, pooled: _PooledBrowser):
+        while pooled.active > 0:
+            await asyncio.sleep(0.5)
+        try:
+            await pooled.browser.close()
+        except Exception:
+            pass
+
+    async def _pick_browser(self) -> _PooledBrowser:
+        async with self._lock:
+            # Drop crashed / retired browsers and top the pool back up
+            for pooled in list(self._browsers):
+                if not pooled.usable:
+                    self._browsers.remove(pooled)
+                    if pooled.crashed or not pooled.browser.is_connected():
+                        self._stats["crashed"] += 1
+                        print("⚠️ Browser pool: replacing crashed browser")
+                    asyncio.create_task(self._close_when_idle(pooled))
+            while len(self._browsers) < self.size:
+                self._browsers.append(await self._launch())
+
+            # Least busy browser, round-robin on ties
+            self._next = (self._next + 1) % len(self._browsers)
+            ordered = self._browsers[self._next:] + self._browsers[:self._next]
+            pooled = min(ordered, key=lambda b: b.active)
+            pooled.active += 1
+            pooled.pages_served += 1
+            if pooled.pages_served >= self.pages_per_browser:
+                pooled.retired = True
+                self._stats["recycled"] += 1
+            return pooled
+
+    @asynccontextmanager
+    async def page(self, **context_kwargs):
+        """
+        Async context manager yielding a page in a fresh context on a warm
+        browser. Must be used on the pool loop (i.e. inside a `run` callback or
+        a coroutine started with run_async / run_sync).
+        """
+        await self._ensure_started()
+        context_kwargs.setdefault("user_agent", DEFAULT_USER_AGENT)
+        async with self._semaphore:
+            pooled = await self._pick_browser()
+            started = time.perf_counter()
+            context = None
+            try:
+                context = await pooled.browser.new_context(**context_kwargs)
+                page = await context.new_page()
+                yield page
+            except Exception:
+                self._stats["errors"] += 1
+                if not pooled.browser.is_connected():
+                    pooled.crashed = True
+                raise
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+                pooled.active -= 1
+                self._stats["pages"] += 1
+                self._stats["page_ms"] += (time.perf_counter() - started) * 1000
+
+    async def _run(self, fn, context_kwargs: dict):
+        async with self.page(**context_kwargs) as page:
+            return await fn(page)
+
+    # --- public API -------------------------------------------------------
+
+    async def run(self, fn, **context_kwargs):
+        """Run `await fn(page)` on a pooled page; awaitable from any event loop."""
+        return await run_async(self._run(fn, context_kwargs))
+
+    def run_sync(self, fn, timeout: float = None, cancel=None, **context_kwargs):
+        """Blocking variant of `run` for synchronous callers; `cancel` is a threading.Event."""
+        return run_sync(self._run(fn, context_kwargs), timeout, cancel)
+
+    async def fetch_html(self, url: str, wait_until: str = "domcontentloaded", timeout: int = 60000,
+                         settle_seconds: float = 0, **context_kwargs) -> str:
+        async def render(page):
+            await page.goto(url, wait_until=wait_until, timeout=timeout)
+            if settle_seconds:
+                await asyncio.sleep(settle_seconds)
+            return await page.content()
+        return await self.run(render, **context_kwargs)
+
+    def fetch_html_sync(self, url: str, wait_until: str = "domcontentloaded", timeout: int = 60000,
+                        settle_seconds: float = 0, **context_kwargs) -> str:
+        return run_sync(self.fetch_html(url, wait_until, timeout, settle_seconds, **context_kwargs))
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["avg_page_ms"] = round(stats["page_ms"] / stats["pages"], 1) if stats["pages"] else None
+        stats["browsers"] = len(self._browsers)
+        stats["active_pages"] = sum(b.active for b in self._browsers)
+        return stats
+
+    async def _close(self):
+        for pooled in self._browsers:
+            try:
+                await pooled.browser.close()
+            except Exception:
+                pass
+        self._browsers = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def close(self):
+        run_sync(self._close())
+
+
+_pool = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Process-wide pool configured from the environment."""
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool(
+            size=int(os.getenv("BROWSER_POOL_SIZE", 2)),
+            max_pages=int(os.getenv("BROWSER_POOL_MAX_PAGES", 4)),
+            pages_per_browser=int(os.getenv("BROWSER_POOL_PAGES_PER_BROWSER", 100)),
+            headless=os.getenv("BROWSER_POOL_HEADLESS", "true").lower() == "true",
+        )
+        get_loop()
+    return _pool
@@ -0,0 +1,210 @@
+# common/geocoder.py
+#
+# Lightweight async reverse geocoder for Nominatim over plain HTTP, with a
+# persistent SQLite cache keyed by coordinates rounded to
+# GEOCODE_CACHE_PRECISION decimals (4 ≈ 11 m) and a TTL. Identical lookups in
+# flight are coalesced, per Nominatim's usage policy (max 1 req/s, identifying
+# User-Agent, cache results).
+#
+# The rate limit (one request per NOMINATIM_MIN_INTERVAL seconds) is shared by
+# every process on the host: places-service, location-service and all their
+# uvicorn workers reserve request slots in one SQLite file,
+# NOMINATIM_RATE_LIMIT_PATH (by default next to this module). Hosts do not
+# coordinate; with N hosts sending the same User-Agent, set
+# NOMINATIM_MIN_INTERVAL to N seconds.
+#
+#   result = await reverse_geocode(lat, lon)     # from any event loop
+#   result = reverse_geocode_sync(lat, lon)      # from synchronous code
+#
+# Both return {"display_name": ..., "address": {...}} or None.
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+from common.background_loop import run_async, run_sync
+
+load_dotenv()
+
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/reverse")
+NOMINATIM_USER_AGENT = os.getenv("NOMINATIM_USER_AGENT", "CumulusAI/1.0 (reverse geocoding)")
+NOMINATIM_MIN_INTERVAL = float(os.getenv("NOMINATIM_MIN_INTERVAL", 1.0))  # per host, across processes
+NOMINATIM_RATE_LIMIT_PATH = os.getenv(
+    "NOMINATIM_RATE_LIMIT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "nominatim_rate_limit.sqlite3"))
+NOMINATIM_TIMEOUT = float(os.getenv("NOMINATIM_TIMEOUT", 10))
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "geocode_cache.sqlite3")
+GEOCODE_CACHE_PRECISION = int(os.getenv("GEOCODE_CACHE_PRECISION", 4))
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", 30 * 86400))
+
+
+class GeocodeCache:
+    def __init__(self, path: str, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS reverse_geocode ("
+            " key TEXT PRIMARY KEY, payload TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, fetched_at FROM reverse_geocode WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] + self.ttl < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reverse_geocode (key, payload, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+            self._conn.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM reverse_geocode").fetchone()[0]
+
+
+class SharedRateLimit:
+    """
+    Minimum spacing between requests, shared by every process that opens the
+    same SQLite file: a caller reserves the next free slot in one IMMEDIATE
+    transaction, then waits until it.
+    """
+
+    def __init__(self, path: str, name: str, interval: float):
+        self.name = name
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS rate_limit (name TEXT PRIMARY KEY, next_at REAL NOT NULL)")
+
+    def reserve(self) -> float:
+        """Seconds the caller has to wait before sending its request."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT next_at FROM rate_limit WHERE name = ?", (self.name,)).fetchone()
+                now = time.time()
+                slot = max(now, row[0] if row else 0.0)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit (name, next_at) VALUES (?, ?)", (self.name, slot + self.interval)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return slot - now
+
+
+class ReverseGeocoder:
+    def __init__(self, cache: GeocodeCache, rate_limit: SharedRateLimit, precision: int = GEOCODE_CACHE_PRECISION):
+        self.cache = cache
+        self.rate_limit = rate_limit
+        self.precision = precision
+        self._client = None
+        self._inflight = {}
+        self._stats = {"hits": 0, "misses": 0, "errors": 0, "coalesced": 0, "rate_wait_ms": 0.0}
+
+    def _key(self, lat: float, lon: float) -> tuple:
+        return round(lat, self.precision), round(lon, self.precision)
+
+    async def _fetch(self, lat: float, lon: float):
+        import httpx
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={"User-Agent": NOMINATIM_USER_AGENT},
+                timeout=NOMINATIM_TIMEOUT,
+            )
+
+        # The reservation may briefly block on another process's transaction
+        wait = await asyncio.to_thread(self.rate_limit.reserve)
+        if wait > 0:
+            self._stats["rate_wait_ms"] += wait * 1000
+            await asyncio.sleep(wait)
+
+        resp = await self._client.get(NOMINATIM_URL, params={"lat": lat, "lon": lon, "format": "json"})
+        resp.raise_for_status()
+        data = resp.json()
+        if "error" in data:
+            return None
+        return {"display_name": data.get("display_name"), "address": data.get("address", {})}
+
+    async def _lookup(self, lat: float, lon: float):
+        key = self._key(lat, lon)
+        cache_key = f"{key[0]},{key[1]}"
+        # SQLite calls block; keep them off the shared loop (the browser pool runs there too)
+        cached = await asyncio.to_thread(self.cache.get, cache_key)
+        if cached is not None:
+            self._stats["hits"] += 1
+            return cached
+
+        if key in self._inflight:
+            self._stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(self._inflight[key])
+            except Exception:
+                return None
+
+        self._stats["misses"] += 1
+        task = asyncio.ensure_future(self._fetch(*key))
+        self._inflight[key] = task
+        try:
+            result = await asyncio.shield(task)
+            if result and result.get("display_name"):
+                # Cached before the in-flight entry goes, so no lookup misses both
+                await asyncio.to_thread(self.cache.set, cache_key, result)
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"[Nominatim error] {e}")
+            return None
+        finally:
+            self._inflight.pop(key, None)
+        return result
+
+    async def reverse(self, lat: float, lon: float):
+        return await run_async(self._lookup(lat, lon))
+
+    def reverse_sync(self, lat: float, lon: float):
+        return run_sync(self._lookup(lat, lon))
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "rate_wait_ms": round(self._stats["rate_wait_ms"], 1),
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else None,
+            "cache_entries": self.cache.size(),
+        }
+
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder() -> ReverseGeocoder:
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = ReverseGeocoder(
+                    GeocodeCache(GEOCODE_CACHE_PATH, GEOCODE_CACHE_TTL),
+                    SharedRateLimit(NOMINATIM_RATE_LIMIT_PATH, "nominatim", NOMINATIM_MIN_INTERVAL),
+                )
+    return _geocoder
+
+
+async def reverse_geocode(lat: float, lon: float):
+    return await get_geocoder().reverse(lat, lon)
+
+
+def reverse_geocode_sync(lat: float, lon: float):
+    return get_geocoder().reverse_sync(lat, lon)
@@ -0,0 +1,71 @@
+# common/geohash.py
+#
+# Geohash encode / bounding box / neighbours for bucketing coordinates.
+# Precision 5 ≈ 4.9 km x 4.9 km, 6 ≈ 1.2 km x 0.6 km, 7 ≈ 150 m x 150 m.
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+
+def encode(lat: float, lon: float, precision: int = 6) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True  # geohash interleaves bits starting with longitude
+
+    while len(geohash) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(geohash)
+
+
+def bounds(geohash: str) -> tuple:
+    """(min_lat, min_lon, max_lat, max_lon) of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if bit:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def neighbours(geohash: str) -> list:
+    """The cell itself plus its 8 surrounding cells (fewer at the poles)."""
+    min_lat, min_lon, max_lat, max_lon = bounds(geohash)
+    lat_step, lon_step = max_lat - min_lat, max_lon - min_lon
+    centre_lat, centre_lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    cells = []
+    for dlat in (-lat_step, 0, lat_step):
+        for dlon in (-lon_step, 0, lon_step):
+            lat = centre_lat + dlat
+            if not -90 <= lat <= 90:
+                continue
+            lon = (centre_lon + dlon + 180) % 360 - 180
+            cell = encode(lat, lon, len(geohash))
+            if cell not in cells:
+                cells.append(cell)
+    return cells
@@ -0,0 +1,125 @@
+# common/html_extract.py
+#
+# Fast HTML extraction for the scrapers: lxml's C parser directly (no
+# BeautifulSoup tree on top of it) and XPath expressions compiled once per page
+# layout, evaluated relative to each card in a single pass over the cards.
+#
+#   MAPS_CARD = Layout(
+#       cards=f"//div[{has_class('Nv2PK')}]",
+#       fields={"name": Field(f".//div[{has_class('qBF1Pd')}]"),
+#               "link": Field(f".//a[{has_class('hfpxzc')}]", attr="href")},
+#   )
+#   rows = MAPS_CARD.extract(parse_html(html), limit=10)   # [{"name": ..., "link": ...}, ...]
+#
+# Text follows BeautifulSoup's get_text(strip=True): every text node stripped,
+# empty ones dropped, the rest joined. Comments, <script> and <style> never
+# contribute text. A field that matches nothing is None.
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from lxml import etree, html as lxml_html
+
+_PARSER = lxml_html.HTMLParser(no_network=True, recover=True)
+_SKIP_TEXT = {"script", "style"}
+
+
+def has_class(*names: str) -> str:
+    """XPath predicate body matching elements carrying every class in `names` (like CSS .a.b)."""
+    return " and ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in names)
+
+
+def parse_html(html: str):
+    """Root element of the document, or None for empty / unparsable input."""
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml_html.document_fromstring(html, parser=_PARSER)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def strings(el) -> List[str]:
+    """Stripped, non-empty text nodes under `el` in document order."""
+    out = []
+    for node in el.iter():
+        if isinstance(node.tag, str) and node.tag not in _SKIP_TEXT and node.text:
+            text = node.text.strip()
+            if text:
+                out.append(text)
+        if node is not el and node.tail:
+            tail = node.tail.strip()
+            if tail:
+                out.append(tail)
+    return out
+
+
+def text(el, separator: str = "") -> str:
+    return separator.join(strings(el))
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    First element matched by `xpath` (tried in order when a tuple is given,
+    i.e. "A, or else B"), reduced to its text, or to attribute `attr`.
+    """
+    xpath: Union[str, Tuple[str, ...]]
+    attr: Optional[str] = None
+    separator: str = ""
+
+    def compile(self):
+        paths = (self.xpath,) if isinstance(self.xpath, str) else self.xpath
+        return [etree.XPath(f"({path})[1]") for path in paths], self.attr, self.separator
+
+
+class Layout:
+    """Card selector plus named fields, compiled once and reused for every page."""
+
+    def __init__(self, fields: Dict[str, Field], cards: Optional[str] = None):
+        self._cards = etree.XPath(cards) if cards else None
+        self._fields = [(name, *field.compile()) for name, field in fields.items()]
+        self._spec = {
+            "cards": cards,
+            "fields": {name: {"xpath": field.xpath, "attr": field.attr, "separator": field.separator}
+                       for name, field in fields.items()},
+        }
+
+    def spec(self) -> dict:
+        """JSON-serializable description, e.g. for a scrape job extracted on a worker."""
+        return self._spec
+
+    @classmethod
+    def from_spec(cls, spec: dict) -> "Layout":
+        fields = {
+            name: Field(f["xpath"] if isinstance(f["xpath"], str) else tuple(f["xpath"]), f.get("attr"), f.get("separator", ""))
+            for name, f in spec["fields"].items()
+        }
+        return cls(fields, spec.get("cards"))
+
+    def cards(self, root) -> list:
+        return self._cards(root) if root is not None and self._cards is not None else []
+
+    def row(self, node) -> dict:
+        row = {}
+        for name, paths, attr, separator in self._fields:
+            value = None
+            for path in paths:
+                found = path(node)
+                if found:
+                    value = found[0].get(attr) if attr else text(found[0], separator)
+                    break
+            row[name] = value
+        return row
+
+    def extract(self, root, limit: Optional[int] = None) -> List[dict]:
+        cards = self.cards(root)
+        return [self.row(card) for card in (cards[:limit] if limit is not None else cards)]
+
+    def extract_from(self, nodes: Iterable) -> List[dict]:
+        return [self.row(node) for node in nodes]
+
+    def apply(self, root, limit: Optional[int] = None) -> Union[List[dict], dict]:
+        """Rows for a card layout, the single row for a page layout ({} for an empty page)."""
+        if self._cards is not None:
+            return self.extract(root, limit)
+        return self.row(root) if root is not None else {}
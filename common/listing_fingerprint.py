@@ -0,0 +1,100 @@
+# common/listing_fingerprint.py
+#
+# Skip detail-page renders for listing cards we have already enriched.
+#
+# A listing (Maps search results, an Eventbrite listing page) is fingerprinted
+# as an ordered hash of its cards' key fields; each card also gets its own
+# hash. Detail fields from a successful enrichment are remembered per card
+# hash, so when a listing comes back unchanged every card is served from
+# memory, and when it has changed only new or changed cards need a detail
+# render.
+#
+#   memo = ListingMemo("places", key_fields=("link", "name", "category", "address"),
+#                      detail_fields=("name", "category", "location_address"))
+#   done, todo = memo.plan(listing_key, cards)      # done: {index: enriched card}, todo: [index]
+#   ...render details for todo...
+#   memo.remember(listing_key, cards, enriched_by_index)
+#
+# Stats count unchanged / changed listings and detail renders avoided vs needed.
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+
+LISTING_MEMO_TTL = float(os.getenv("LISTING_MEMO_TTL", 6 * 3600))       # seconds remembered details stay valid
+LISTING_MEMO_MAX_CARDS = int(os.getenv("LISTING_MEMO_MAX_CARDS", 20000))  # LRU bound on remembered cards
+
+
+def _hash(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ListingMemo:
+    def __init__(self, name: str, key_fields: Sequence[str], detail_fields: Sequence[str],
+                 ttl: float = LISTING_MEMO_TTL, max_cards: int = LISTING_MEMO_MAX_CARDS):
+        self.name = name
+        self.key_fields = tuple(key_fields)
+        self.detail_fields = tuple(detail_fields)
+        self.ttl = ttl
+        self.max_cards = max_cards
+        self._cards = OrderedDict()     # card hash -> (stored_at, detail fields)
+        self._listings = OrderedDict()  # listing key -> fingerprint
+        self._lock = threading.Lock()
+        self._stats = {"listings": 0, "unchanged": 0, "changed": 0, "new": 0,
+                       "detail_renders_avoided": 0, "detail_renders_needed": 0}
+
+    def card_hash(self, card: dict) -> str:
+        return _hash([card.get(field) for field in self.key_fields])
+
+    def fingerprint(self, cards: List[dict]) -> str:
+        return _hash([self.card_hash(card) for card in cards])
+
+    def plan(self, listing_key: str, cards: List[dict]) -> Tuple[Dict[int, dict], List[int]]:
+        """Cards answerable from memory (index -> enriched card) and indexes still needing details."""
+        fingerprint = self.fingerprint(cards)
+        now = time.time()
+        done, todo = {}, []
+        with self._lock:
+            previous = self._listings.get(listing_key)
+            self._stats["listings"] += 1
+            self._stats["new" if previous is None else "unchanged" if previous == fingerprint else "changed"] += 1
+            for i, card in enumerate(cards):
+                entry = self._cards.get(self.card_hash(card))
+                if entry is not None and entry[0] + self.ttl > now:
+                    self._cards.move_to_end(self.card_hash(card))
+                    done[i] = {**card, **entry[1]}
+                else:
+                    todo.append(i)
+            self._stats["detail_renders_avoided"] += len(done)
+            self._stats["detail_renders_needed"] += len(todo)
+        return done, todo
+
+    def remember(self, listing_key: str, cards: List[dict], enriched: Dict[int, dict]):
+        """Store detail fields for successfully enriched cards (index -> enriched card)."""
+        now = time.time()
+        with self._lock:
+            self._listings[listing_key] = self.fingerprint(cards)
+            self._listings.move_to_end(listing_key)
+            for i, place in enriched.items():
+                key = self.card_hash(cards[i])
+                self._cards[key] = (now, {field: place.get(field) for field in self.detail_fields})
+                self._cards.move_to_end(key)
+            while len(self._cards) > self.max_cards:
+                self._cards.popitem(last=False)
+            while len(self._listings) > self.max_cards:
+                self._listings.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            remembered = len(self._cards)
+        total = stats["detail_renders_avoided"] + stats["detail_renders_needed"]
+        return {
+            **stats,
+            "remembered_cards": remembered,
+            "avoided_rate": round(stats["detail_renders_avoided"] / total, 3) if total else None,
+        }
@@ -0,0 +1,110 @@
+# common/readiness.py
+#
+# Event-driven page readiness for the scrapers, replacing fixed time.sleep()
+# calls. Waits on DOM and network signals and always respects an overall
+# deadline:
+#
+#   deadline = Deadline(45)
+#   network = NetworkTracker(page)
+#   await page.goto(url)
+#   await wait_for_network_idle(network, quiet_ms=500, deadline=deadline)
+#   cards = await scroll_until_stable(page, "div.Nv2PK", deadline=deadline)
+
+import asyncio
+import time
+
+POLL_SECONDS = 0.1
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cap(self, seconds: float) -> float:
+        """The smaller of `seconds` and the time left."""
+        return min(seconds, self.remaining())
+
+    def timeout_ms(self, seconds: float) -> float:
+        """`cap(seconds)` as a Playwright timeout; at least 1 ms, since Playwright reads 0 as "no timeout"."""
+        return max(1.0, self.cap(seconds) * 1000)
+
+
+class NetworkTracker:
+    """Counts in-flight requests on a page and remembers the last network activity."""
+
+    def __init__(self, page):
+        self.inflight = set()
+        self.last_activity = time.monotonic()
+        page.on("request", self._on_start)
+        page.on("requestfinished", self._on_end)
+        page.on("requestfailed", self._on_end)
+
+    def _on_start(self, request):
+        self.inflight.add(request)
+        self.last_activity = time.monotonic()
+
+    def _on_end(self, request):
+        self.inflight.discard(request)
+        self.last_activity = time.monotonic()
+
+    def quiet_for(self) -> float:
+        return time.monotonic() - self.last_activity
+
+
+async def wait_for_network_idle(network: NetworkTracker, quiet_ms: int = 500, max_inflight: int = 0,
+                                deadline: Deadline = None, timeout: float = 10.0) -> bool:
+    """
+    Wait until at most `max_inflight` requests are pending and nothing has
+    started or finished for `quiet_ms`. Returns False if the time ran out first
+    (pages with long-polling never go fully idle, so callers just carry on).
+    """
+    limit = Deadline(deadline.cap(timeout) if deadline else timeout)
+    quiet_seconds = quiet_ms / 1000
+    while not limit.expired:
+        if len(network.inflight) <= max_inflight and network.quiet_for() >= quiet_seconds:
+            return True
+        await asyncio.sleep(POLL_SECONDS)
+    return False
+
+
+async def count(page, selector: str) -> int:
+    return await page.locator(selector).count()
+
+
+async def wait_for_count_growth(page, selector: str, previous: int, timeout: float,
+                                deadline: Deadline = None) -> int:
+    """Poll the number of `selector` matches until it exceeds `previous` or `timeout` passes."""
+    limit = Deadline(deadline.cap(timeout) if deadline else timeout)
+    current = previous
+    while not limit.expired:
+        current = await count(page, selector)
+        if current > previous:
+            return current
+        await asyncio.sleep(POLL_SECONDS)
+    return current
+
+
+async def scroll_until_stable(page, selector: str, scroll_px: int = 5000, max_scrolls: int = 10,
+                              growth_timeout: float = 1.5, deadline: Deadline = None) -> int:
+    """
+    Scroll and wait for new `selector` matches after each scroll. Stops as soon
+    as a scroll doesn't add matches within `growth_timeout`, after `max_scrolls`,
+    or at the deadline. Returns the final match count.
+    """
+    current = await count(page, selector)
+    for _ in range(max_scrolls):
+        if deadline and deadline.expired:
+            break
+        await page.mouse.wheel(0, scroll_px)
+        grown = await wait_for_count_growth(page, selector, current, growth_timeout, deadline)
+        if grown <= current:
+            break  # no new cards loaded
+        current = grown
+    return current
@@ -0,0 +1,140 @@
+# common/render_profiles.py
+#
+# Per-site render profiles: request interception that aborts resource types and
+# URL patterns the scrapers never look at (images, map tiles, fonts, media,
+# trackers). We only parse text out of page.content(), so none of it matters.
+#
+#   render = with_profile("maps_search", lambda page: render_search(page, url))
+#   html = get_browser_pool().run_sync(render)
+#
+# Switches:
+#   RENDER_PROFILES_ENABLED=false        turn every profile off
+#   RENDER_PROFILE_<NAME>=off            turn one profile off (e.g. RENDER_PROFILE_MAPS_SEARCH=off)
+#
+# Stats per profile, split by profile on/off, report bytes transferred, blocked
+# requests and render time; "ms_saved" compares the two averages once both sides
+# have samples (e.g. after running a parity check).
+
+import os
+import re
+import time
+from dataclasses import dataclass, field
+
+TRACKER_PATTERNS = (
+    r"google-analytics\.com", r"googletagmanager\.com", r"doubleclick\.net", r"googlesyndication\.com",
+    r"facebook\.(com|net)/.*(tr|signals)", r"connect\.facebook\.net", r"hotjar\.com", r"segment\.(io|com)",
+    r"branch\.io", r"bat\.bing\.com", r"analytics\.tiktok\.com", r"ct\.pinterest\.com", r"sentry\.io",
+)
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    name: str
+    block_resource_types: frozenset
+    block_url_patterns: tuple = ()
+    _pattern: re.Pattern = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        combined = "|".join(f"(?:{p})" for p in self.block_url_patterns) or r"(?!x)x"
+        object.__setattr__(self, "_pattern", re.compile(combined))
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        return resource_type in self.block_resource_types or bool(self._pattern.search(url))
+
+
+PROFILES = {
+    "maps_search": RenderProfile(
+        "maps_search",
+        frozenset({"image", "media", "font"}),
+        TRACKER_PATTERNS + (r"/maps/vt\b", r"/kh/v=", r"googleusercontent\.com/", r"/gen_204", r"/log\?"),
+    ),
+    "maps_place": RenderProfile(
+        "maps_place",
+        frozenset({"image", "media", "font"}),
+        TRACKER_PATTERNS + (r"/maps/vt\b", r"/kh/v=", r"googleusercontent\.com/", r"/gen_204", r"/log\?"),
+    ),
+    "eventbrite_listing": RenderProfile(
+        "eventbrite_listing",
+        frozenset({"image", "media", "font"}),
+        TRACKER_PATTERNS + (r"img\.evbuc\.com",),
+    ),
+    "eventbrite_event": RenderProfile(
+        "eventbrite_event",
+        frozenset({"image", "media", "font"}),
+        TRACKER_PATTERNS + (r"img\.evbuc\.com", r"maps\.googleapis\.com/maps/api/staticmap"),
+    ),
+}
+
+
+def is_enabled(name: str) -> bool:
+    if os.getenv("RENDER_PROFILES_ENABLED", "true").lower() != "true":
+        return False
+    return os.getenv(f"RENDER_PROFILE_{name.upper()}", "on").lower() != "off"
+
+
+def _empty_stats() -> dict:
+    return {"renders": 0, "render_ms": 0.0, "bytes": 0, "requests": 0, "blocked": 0}
+
+
+# profile name -> {"on": {...}, "off": {...}}
+_stats = {name: {"on": _empty_stats(), "off": _empty_stats()} for name in PROFILES}
+
+
+def with_profile(name: str, render, enabled: bool = None):
+    """
+    Wrap `async def render(page)` so the named profile is applied to the page
+    first and the render is recorded. `enabled=None` follows the env switches;
+    True/False forces the profile on or off (parity checks, benchmarks).
+    """
+    profile = PROFILES[name]
+
+    async def profiled(page):
+        active = is_enabled(name) if enabled is None else enabled
+        stats = _stats[name]["on" if active else "off"]
+
+        if active:
+            async def intercept(route):
+                request = route.request
+                if profile.blocks(request.resource_type, request.url):
+                    stats["blocked"] += 1
+                    await route.abort()
+                else:
+                    await route.continue_()
+            await page.route("**/*", intercept)
+
+        async def on_finished(request):
+            stats["requests"] += 1
+            try:
+                sizes = await request.sizes()
+                stats["bytes"] += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+            except Exception:
+                pass
+        page.on("requestfinished", on_finished)
+
+        started = time.perf_counter()
+        try:
+            return await render(page)
+        finally:
+            stats["renders"] += 1
+            stats["render_ms"] += (time.perf_counter() - started) * 1000
+
+    return profiled
+
+
+def get_profile_stats() -> dict:
+    report = {}
+    for name, modes in _stats.items():
+        entry = {"enabled": is_enabled(name)}
+        for mode, stats in modes.items():
+            renders = stats["renders"]
+            entry[mode] = {
+                **stats,
+                "render_ms": round(stats["render_ms"], 1),
+                "avg_render_ms": round(stats["render_ms"] / renders, 1) if renders else None,
+                "avg_bytes": round(stats["bytes"] / renders) if renders else None,
+            }
+        if entry["on"]["renders"] and entry["off"]["renders"]:
+            entry["ms_saved_per_render"] = round(entry["off"]["avg_render_ms"] - entry["on"]["avg_render_ms"], 1)
+            entry["bytes_saved_per_render"] = entry["off"]["avg_bytes"] - entry["on"]["avg_bytes"]
+        report[name] = entry
+    return report
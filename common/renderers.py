@@ -0,0 +1,191 @@
+# common/renderers.py
+#
+# Page renderers for every scraped page type, keyed by render profile and wait
+# strategy, so that a service process and an out-of-process scrape worker
+# (common/scrape_worker.py) render a given job exactly the same way:
+#
+#   html = await render("maps_search", "readiness", page, url)
+#
+# Each renderer is `async def render(page, url) -> str` (page.content() once the
+# page is ready). Wait strategies:
+#   maps_search, eventbrite_listing    readiness (event-driven) | fixed (legacy sleeps)
+#   maps_place, eventbrite_event       fixed
+
+import asyncio
+import os
+from typing import Optional
+from common.readiness import Deadline, NetworkTracker, wait_for_network_idle, scroll_until_stable
+
+# Google Maps search page
+MAPS_WAIT_STRATEGY = os.getenv("MAPS_WAIT_STRATEGY", "readiness")          # readiness | fixed
+MAPS_RENDER_DEADLINE = float(os.getenv("MAPS_RENDER_DEADLINE", 45))        # overall seconds for the search page
+MAPS_NETWORK_QUIET_MS = int(os.getenv("MAPS_NETWORK_QUIET_MS", 500))       # quiet window counted as network idle
+
+# Eventbrite listing page
+LISTING_WAIT_STRATEGY = os.getenv("LISTING_WAIT_STRATEGY", "readiness")    # readiness | fixed
+LISTING_RENDER_DEADLINE = float(os.getenv("LISTING_RENDER_DEADLINE", 40))  # overall seconds for the listing page
+
+
+async def render_maps_search_fixed(page, url: str) -> str:
+    """Legacy render: fixed sleeps (kept for MAPS_WAIT_STRATEGY=fixed and benchmarks)."""
+    print(f"🌐 Navigating to {url}")
+    await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+
+    # Wait explicitly for place cards container to appear (adjust selector as needed)
+    print("Waiting for place cards to load...")
+    await page.wait_for_selector('div.Nv2PK', timeout=30000)  # Wait up to 30 seconds
+
+    # Extra delay to allow all JS and lazy loading to finish
+    await asyncio.sleep(5)
+
+    # Scroll down to load more results dynamically
+    print("Scrolling to load more results...")
+    max_scrolls = 10
+    for _ in range(max_scrolls):
+        prev_count = len(await page.query_selector_all("div.Nv2PK"))
+        await page.mouse.wheel(0, 5000)
+        await asyncio.sleep(1.5)
+        curr_count = len(await page.query_selector_all("div.Nv2PK"))
+        if curr_count == prev_count:
+            break  # no new cards loaded
+
+    # Drag map to trigger more pins (optional)
+    print("Dragging map to trigger more nearby pins...")
+    await page.mouse.move(300, 300)
+    await page.mouse.down()
+    await page.mouse.move(250, 250)
+    await page.mouse.up()
+    await asyncio.sleep(3)
+
+    # Click "Search this area" button if visible
+    try:
+        if await page.is_visible('button[jsaction*="search"]'):
+            print("Clicking 'Search this area' button...")
+            await page.click('button[jsaction*="search"]')
+            await asyncio.sleep(4)
+    except Exception:
+        print("⚠️ Could not click 'Search this area' — skipping.")
+
+    # Final scroll for any late loading entries
+    for _ in range(3):
+        await page.mouse.wheel(0, 3000)
+        await asyncio.sleep(1.5)
+
+    return await page.content()
+
+
+async def render_maps_search_ready(page, url: str) -> str:
+    """Event-driven render: waits on card counts and network quiet instead of sleeping."""
+    deadline = Deadline(MAPS_RENDER_DEADLINE)
+    network = NetworkTracker(page)
+
+    print(f"🌐 Navigating to {url}")
+    await page.goto(url, wait_until="domcontentloaded", timeout=deadline.timeout_ms(60))
+    if deadline.expired:
+        raise TimeoutError(f"Maps search page did not load within {MAPS_RENDER_DEADLINE:.0f}s")
+
+    print("Waiting for place cards to load...")
+    await page.wait_for_selector('div.Nv2PK', timeout=deadline.timeout_ms(30))
+    await wait_for_network_idle(network, quiet_ms=MAPS_NETWORK_QUIET_MS, max_inflight=2, deadline=deadline)
+
+    # Scroll until the number of cards stops growing
+    print("Scrolling to load more results...")
+    await scroll_until_stable(page, "div.Nv2PK", scroll_px=5000, max_scrolls=10, deadline=deadline)
+
+    # Drag map to trigger more pins (optional)
+    print("Dragging map to trigger more nearby pins...")
+    await page.mouse.move(300, 300)
+    await page.mouse.down()
+    await page.mouse.move(250, 250)
+    await page.mouse.up()
+    await wait_for_network_idle(network, quiet_ms=MAPS_NETWORK_QUIET_MS, max_inflight=2, deadline=deadline)
+
+    # Click "Search this area" button if visible
+    try:
+        if not deadline.expired and await page.is_visible('button[jsaction*="search"]'):
+            print("Clicking 'Search this area' button...")
+            await page.click('button[jsaction*="search"]', timeout=deadline.timeout_ms(5))
+            await wait_for_network_idle(network, quiet_ms=MAPS_NETWORK_QUIET_MS, max_inflight=2, deadline=deadline)
+    except Exception:
+        print("⚠️ Could not click 'Search this area' — skipping.")
+
+    # Final scroll for any late loading entries
+    await scroll_until_stable(page, "div.Nv2PK", scroll_px=3000, max_scrolls=3, deadline=deadline)
+
+    return await page.content()
+
+
+async def render_single_place_page(page, url: str) -> str:
+    await page.goto(url, timeout=60000)
+    await asyncio.sleep(5)  # Let all content render
+    return await page.content()
+
+
+async def render_event_listing_fixed(page, url: str) -> str:
+    """Legacy render: five scrolls with fixed sleeps."""
+    await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+    try:
+        await page.wait_for_selector('[data-testid="search-event"]', timeout=20000)
+    except Exception:
+        pass  # Continue anyway
+
+    for _ in range(5):
+        await page.mouse.wheel(0, 5000)
+        await asyncio.sleep(1.5)
+
+    return await page.content()
+
+
+async def render_event_listing_ready(page, url: str) -> str:
+    """Event-driven render: scroll until the event card count stops growing."""
+    deadline = Deadline(LISTING_RENDER_DEADLINE)
+    network = NetworkTracker(page)
+    await page.goto(url, wait_until="domcontentloaded", timeout=deadline.timeout_ms(60))
+    try:
+        if not deadline.expired:
+            await page.wait_for_selector('[data-testid="search-event"]', timeout=deadline.timeout_ms(20))
+    except Exception:
+        pass  # Continue anyway
+
+    await scroll_until_stable(page, '[data-testid="search-event"]', scroll_px=5000, max_scrolls=5, deadline=deadline)
+    await wait_for_network_idle(network, quiet_ms=300, max_inflight=2, deadline=deadline, timeout=3)
+    return await page.content()
+
+
+async def render_single_event_page(page, event_url: str) -> str:
+    await page.goto(event_url, timeout=60000)
+    try:
+        await page.wait_for_selector("h2:has-text(\"Date and time\")", timeout=15000)
+        await page.wait_for_selector("h2:has-text(\"Location\")", timeout=15000)
+    except:
+        pass
+    await asyncio.sleep(2)
+    return await page.content()
+
+
+# profile -> wait strategy -> renderer; the first entry is used when a profile has no env default
+RENDERERS = {
+    "maps_search": {"readiness": render_maps_search_ready, "fixed": render_maps_search_fixed},
+    "maps_place": {"fixed": render_single_place_page},
+    "eventbrite_listing": {"readiness": render_event_listing_ready, "fixed": render_event_listing_fixed},
+    "eventbrite_event": {"fixed": render_single_event_page},
+}
+
+DEFAULT_WAIT = {
+    "maps_search": MAPS_WAIT_STRATEGY,
+    "eventbrite_listing": LISTING_WAIT_STRATEGY,
+}
+
+
+def resolve_wait(profile: str, wait: Optional[str] = None) -> str:
+    """The wait strategy a job for `profile` runs with; ValueError for unknown ones."""
+    if profile not in RENDERERS:
+        raise ValueError(f"Unknown render profile '{profile}'")
+    wait = wait or DEFAULT_WAIT.get(profile) or next(iter(RENDERERS[profile]))
+    if wait not in RENDERERS[profile]:
+        raise ValueError(f"Unknown wait strategy '{wait}' for {profile}; use one of {', '.join(RENDERERS[profile])}")
+    return wait
+
+
+async def render(profile: str, wait: Optional[str], page, url: str) -> str:
+    return await RENDERERS[profile][resolve_wait(profile, wait)](page, url)
@@ -0,0 +1,108 @@
+# common/scrape_worker.py
+#
+# Scrape worker: consumes render jobs (see common/scrape_jobs.py) from the
+# SCRAPE_JOBS_QUEUE work queue, renders them on its own browser pool and
+# replies with the HTML or the extracted rows. Run as many as there are
+# machines / cores to spare; RabbitMQ spreads jobs over them.
+#
+#   SCRAPE_BACKEND=farm                   in places-service / events-service
+#   python -m common.scrape_worker        on each scrape machine (from the repo root)
+#
+# Each worker takes at most SCRAPE_WORKER_CONCURRENCY unacknowledged jobs at a
+# time (defaults to the browser pool's page limit). A job is acknowledged only
+# after its reply is sent, so jobs of a worker that dies are redelivered.
+# Jobs whose submitter has already given up are dropped without rendering.
+
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+
+if sys.platform.startswith("win"):
+    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+import aio_pika
+from common.browser_pool import get_browser_pool
+from common.scrape_jobs import RABBITMQ_URL, SCRAPE_JOBS_QUEUE, RenderJob, execute_job
+
+SCRAPE_WORKER_CONCURRENCY = int(os.getenv("SCRAPE_WORKER_CONCURRENCY", os.getenv("BROWSER_POOL_MAX_PAGES", 4)))
+SCRAPE_WORKER_REPORT_INTERVAL = float(os.getenv("SCRAPE_WORKER_REPORT_INTERVAL", 60))   # seconds between stats lines
+WORKER_ID = os.getenv("SCRAPE_WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ScrapeWorker:
+    def __init__(self, concurrency: int = SCRAPE_WORKER_CONCURRENCY):
+        self.concurrency = concurrency
+        self._channel = None
+        self._started = time.time()
+        self._stats = {"jobs": 0, "errors": 0, "expired": 0, "queue_ms": 0.0, "render_ms": 0.0}
+
+    async def on_job(self, message: aio_pika.IncomingMessage):
+        async with message.process():
+            job = RenderJob.from_json(message.body)
+            queue_ms = (time.time() - job.submitted_at) * 1000
+            if job.deadline is not None and time.time() > job.deadline:
+                self._stats["expired"] += 1
+                return
+
+            try:
+                result = await execute_job(job)
+                self._stats["render_ms"] += result["render_ms"]
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"⚠️ [{WORKER_ID}] {job.profile} job failed for {job.url}: {e}")
+                result = {"error": f"{type(e).__name__}: {e}"}
+            self._stats["jobs"] += 1
+            self._stats["queue_ms"] += queue_ms
+
+            if message.reply_to:
+                await self._channel.default_exchange.publish(
+                    aio_pika.Message(
+                        body=json.dumps({**result, "worker": WORKER_ID, "queue_ms": round(queue_ms, 1)}).encode(),
+                        correlation_id=message.correlation_id,
+                    ),
+                    routing_key=message.reply_to,
+                )
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        jobs = stats["jobs"]
+        uptime = time.time() - self._started
+        return {
+            **stats,
+            "queue_ms": round(stats["queue_ms"], 1),
+            "render_ms": round(stats["render_ms"], 1),
+            "worker": WORKER_ID,
+            "jobs_per_minute": round(jobs / uptime * 60, 2) if uptime else None,
+            "avg_queue_ms": round(stats["queue_ms"] / jobs, 1) if jobs else None,
+            "avg_render_ms": round(stats["render_ms"] / jobs, 1) if jobs else None,
+            "browser_pool": get_browser_pool().stats(),
+        }
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(SCRAPE_WORKER_REPORT_INTERVAL)
+            s = self.stats()
+            print(f"📊 [{WORKER_ID}] {s['jobs']} jobs ({s['jobs_per_minute']}/min), {s['errors']} errors, "
+                  f"{s['expired']} expired, avg queue {s['avg_queue_ms']} ms, avg render {s['avg_render_ms']} ms")
+
+    async def run(self):
+        connection = await aio_pika.connect_robust(RABBITMQ_URL)
+        self._channel = await connection.channel()
+        await self._channel.set_qos(prefetch_count=self.concurrency)
+        queue = await self._channel.declare_queue(SCRAPE_JOBS_QUEUE, durable=True)
+        await queue.consume(self.on_job)
+        reporter = asyncio.create_task(self._report())
+        print(f"🟢 [scrape-worker {WORKER_ID}] consuming '{SCRAPE_JOBS_QUEUE}' ({self.concurrency} jobs at a time)")
+        try:
+            await asyncio.Future()  # runs forever
+        finally:
+            reporter.cancel()
+            await connection.close()
+            get_browser_pool().close()
+
+
+if __name__ == "__main__":
+    asyncio.run(ScrapeWorker().run())
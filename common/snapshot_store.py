@@ -0,0 +1,280 @@
+# common/snapshot_store.py
+#
+# Local store of rendered page HTML (page.content() output), so a page can be
+# re-parsed without paying for another browser render:
+#
+#   - snapshots are keyed by normalized URL + render time, tagged with the
+#     render profile (maps_search, eventbrite_event, ...)
+#   - bodies are content-addressed (sha256) and zlib-compressed; re-rendering an
+#     unchanged page adds a snapshot row but no new body
+#   - when compressed bodies exceed SNAPSHOT_STORE_MAX_MB, the oldest snapshots
+#     are evicted along with bodies no snapshot references any more
+#
+#   html = rendered(url, "maps_search", lambda: render(url))    # render + store, or reuse a fresh snapshot
+#   snap = get_snapshot_store().latest(url)                     # re-parse without rendering
+#
+# Snapshots are reused instead of rendering only when younger than
+# SNAPSHOT_REUSE_SECONDS (default 0: always render, store for later).
+#
+# Also a fixture source for the offline parser benchmarks:
+#
+#   python -m common.snapshot_store export places-service/fixtures --profile maps_search --profile maps_place
+#   python -m common.snapshot_store stats
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SNAPSHOT_STORE_ENABLED = os.getenv("SNAPSHOT_STORE_ENABLED", "true").lower() == "true"
+SNAPSHOT_STORE_PATH = os.getenv("SNAPSHOT_STORE_PATH", "snapshots.sqlite3")
+SNAPSHOT_STORE_MAX_MB = float(os.getenv("SNAPSHOT_STORE_MAX_MB", 256))        # compressed bodies kept on disk
+SNAPSHOT_REUSE_SECONDS = float(os.getenv("SNAPSHOT_REUSE_SECONDS", 0))        # reuse a snapshot this fresh instead of rendering
+SNAPSHOT_COMPRESSION_LEVEL = int(os.getenv("SNAPSHOT_COMPRESSION_LEVEL", 6))
+
+_TRACKING_PARAMS = {"aff", "gclid", "fbclid", "ref"}
+
+
+def normalize_url(url: str) -> str:
+    """Lowercase scheme/host, drop fragment and tracking params, sort the query."""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", urlencode(query), ""))
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    url: str
+    profile: Optional[str]
+    rendered_at: float
+    digest: str
+    html: str
+
+
+class SnapshotStore:
+    def __init__(self, path: str = SNAPSHOT_STORE_PATH, max_bytes: int = int(SNAPSHOT_STORE_MAX_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS bodies ("
+            " digest TEXT PRIMARY KEY, data BLOB NOT NULL, raw_size INTEGER NOT NULL, stored_size INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, url_key TEXT NOT NULL, url TEXT NOT NULL,"
+            " profile TEXT, rendered_at REAL NOT NULL, digest TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS snapshots_by_url ON snapshots (url_key, rendered_at);"
+            "CREATE INDEX IF NOT EXISTS snapshots_by_digest ON snapshots (digest);"
+        )
+        self._conn.commit()
+        self._stats = {"puts": 0, "deduplicated": 0, "reused": 0, "evicted_snapshots": 0, "evicted_bodies": 0}
+
+    def put(self, url: str, html: str, profile: Optional[str] = None, rendered_at: Optional[float] = None) -> str:
+        raw = html.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM bodies WHERE digest = ?", (digest,)).fetchone()
+            if exists:
+                self._stats["deduplicated"] += 1
+            else:
+                data = zlib.compress(raw, SNAPSHOT_COMPRESSION_LEVEL)
+                self._conn.execute(
+                    "INSERT INTO bodies (digest, data, raw_size, stored_size) VALUES (?, ?, ?, ?)",
+                    (digest, data, len(raw), len(data)),
+                )
+            self._conn.execute(
+                "INSERT INTO snapshots (url_key, url, profile, rendered_at, digest) VALUES (?, ?, ?, ?, ?)",
+                (normalize_url(url), url, profile, rendered_at or time.time(), digest),
+            )
+            self._stats["puts"] += 1
+            if not exists:
+                self._evict()
+            self._conn.commit()
+        return digest
+
+    def _evict(self):
+        """Drop oldest snapshots, then unreferenced bodies, until under max_bytes. Caller holds the lock."""
+        while True:
+            total = self._conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM bodies").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            oldest = self._conn.execute(
+                "SELECT id FROM snapshots ORDER BY rendered_at LIMIT 16"
+            ).fetchall()
+            if not oldest:
+                return
+            self._conn.executemany("DELETE FROM snapshots WHERE id = ?", oldest)
+            self._stats["evicted_snapshots"] += len(oldest)
+            cursor = self._conn.execute(
+                "DELETE FROM bodies WHERE digest NOT IN (SELECT digest FROM snapshots)"
+            )
+            self._stats["evicted_bodies"] += cursor.rowcount
+
+    def _load(self, row) -> Snapshot:
+        url, profile, rendered_at, digest, data = row
+        return Snapshot(url, profile, rendered_at, digest, zlib.decompress(data).decode("utf-8"))
+
+    def latest(self, url: str, max_age: Optional[float] = None) -> Optional[Snapshot]:
+        """Newest snapshot of `url` (optionally no older than max_age seconds), or None."""
+        since = time.time() - max_age if max_age is not None else 0
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT s.url, s.profile, s.rendered_at, s.digest, b.data FROM snapshots s"
+                " JOIN bodies b ON b.digest = s.digest"
+                " WHERE s.url_key = ? AND s.rendered_at >= ? ORDER BY s.rendered_at DESC LIMIT 1",
+                (normalize_url(url), since),
+            ).fetchone()
+        return self._load(row) if row else None
+
+    def history(self, url: str) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rendered_at, digest, profile FROM snapshots WHERE url_key = ? ORDER BY rendered_at DESC",
+                (normalize_url(url),),
+            ).fetchall()
+        return [{"rendered_at": r[0], "digest": r[1], "profile": r[2]} for r in rows]
+
+    def iter_latest(self, profile: Optional[str] = None) -> Iterator[Snapshot]:
+        """Newest snapshot per URL (optionally for one profile), newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.url, s.profile, s.rendered_at, s.digest, b.data FROM snapshots s"
+                " JOIN bodies b ON b.digest = s.digest"
+                " WHERE s.id IN (SELECT MAX(id) FROM snapshots GROUP BY url_key)"
+                " AND (? IS NULL OR s.profile = ?) ORDER BY s.rendered_at DESC",
+                (profile, profile),
+            ).fetchall()
+        for row in rows:
+            yield self._load(row)
+
+    def export_fixtures(self, directory: str, profiles: Optional[List[str]] = None, limit: Optional[int] = None) -> int:
+        """Write `<profile>_<digest>.html` files (the bench_extract.py naming); returns the count."""
+        os.makedirs(directory, exist_ok=True)
+        written = 0
+        seen = set()  # identical bodies under different URLs become one fixture
+        for profile in profiles or [None]:
+            for i, snap in enumerate(self.iter_latest(profile)):
+                if limit is not None and i >= limit:
+                    break
+                if snap.digest in seen:
+                    continue
+                seen.add(snap.digest)
+                name = f"{snap.profile or 'page'}_{snap.digest[:12]}.html"
+                with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+                    f.write(snap.html)
+                written += 1
+        return written
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshots, urls = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT url_key) FROM snapshots").fetchone()
+            bodies, raw, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(stored_size), 0) FROM bodies"
+            ).fetchone()
+            stats = dict(self._stats)
+        return {
+            **stats,
+            "snapshots": snapshots,
+            "urls": urls,
+            "bodies": bodies,
+            "raw_mb": round(raw / 1024 / 1024, 2),
+            "stored_mb": round(stored / 1024 / 1024, 2),
+            "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+            "compression_ratio": round(raw / stored, 2) if stored else None,
+        }
+
+    def record_reuse(self):
+        with self._lock:
+            self._stats["reused"] += 1
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    """Process-wide store, or None when SNAPSHOT_STORE_ENABLED=false."""
+    global _store
+    if not SNAPSHOT_STORE_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SnapshotStore()
+    return _store
+
+
+def rendered(url: str, profile: str, render: Callable[[], str], reuse_seconds: Optional[float] = None) -> str:
+    """
+    `render()` the page and store the HTML; or, when a snapshot of `url` is
+    younger than reuse_seconds (default SNAPSHOT_REUSE_SECONDS), return that
+    instead of rendering.
+    """
+    store = get_snapshot_store()
+    reuse_seconds = SNAPSHOT_REUSE_SECONDS if reuse_seconds is None else reuse_seconds
+    if store is not None and reuse_seconds > 0:
+        snap = store.latest(url, max_age=reuse_seconds)
+        if snap is not None:
+            store.record_reuse()
+            return snap.html
+    html = render()
+    if store is not None and html:
+        try:
+            store.put(url, html, profile)
+        except Exception as e:
+            print(f"[Snapshot store] Could not store {url}: {e}")
+    return html
+
+
+async def rendered_async(url: str, profile: str, render, reuse_seconds: Optional[float] = None) -> str:
+    """`rendered` for `async def render() -> str`; store I/O runs in the default executor."""
+    store = get_snapshot_store()
+    loop = asyncio.get_running_loop()
+    reuse_seconds = SNAPSHOT_REUSE_SECONDS if reuse_seconds is None else reuse_seconds
+    if store is not None and reuse_seconds > 0:
+        snap = await loop.run_in_executor(None, lambda: store.latest(url, max_age=reuse_seconds))
+        if snap is not None:
+            store.record_reuse()
+            return snap.html
+    html = await render()
+    if store is not None and html:
+        try:
+            await loop.run_in_executor(None, store.put, url, html, profile)
+        except Exception as e:
+            print(f"[Snapshot store] Could not store {url}: {e}")
+    return html
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendered HTML snapshot store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="write the newest snapshot per URL as parser fixtures")
+    export.add_argument("directory")
+    export.add_argument("--profile", action="append", help="only snapshots from this render profile (repeatable)")
+    export.add_argument("--limit", type=int, help="max snapshots per profile")
+    sub.add_parser("stats")
+    args = parser.parse_args()
+
+    store = SnapshotStore()
+    if args.command == "export":
+        count = store.export_fixtures(args.directory, args.profile, args.limit)
+        print(f"Exported {count} snapshots to {args.directory}")
+    else:
+        print(json.dumps(store.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,95 +1,176 @@
 import sys
+import asyncio
 
 if sys.platform.startswith("win"):
-    import asyncio
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
     
 from fastapi import FastAPI, Query, HTTPException
-from typing import List
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-import time
+from typing import Callable, Dict, List
 import os
+
+# Shared scraping helpers (browser pool, ...) live in ../common
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.browser_pool import get_browser_pool
+from common.background_loop import run_sync
+from common.render_profiles import get_profile_stats
+from common.scrape_jobs import render_page_sync, extract_page, get_job_stats
+from common.snapshot_store import rendered, get_snapshot_store
+from common.html_extract import Layout, Field, has_class, parse_html
+from events_store import events_store, EventsRefresher
+from event_details_store import get_event_details_store
+
 port = int(os.getenv("PORT", 8004))
 app = FastAPI()
 
-def get_event_page(state: str, country: str) -> str:
+# Eventbrite listing crawl (render wait strategies live in common/renderers.py)
+EVENT_LISTING_PAGES = int(os.getenv("EVENT_LISTING_PAGES", 3))             # result pages crawled per region
+EVENT_LISTING_PAGE_CONCURRENCY = int(os.getenv("EVENT_LISTING_PAGE_CONCURRENCY", 3))  # listing pages rendered at once
+
+# Event detail enrichment
+EVENT_DETAIL_CONCURRENCY = int(os.getenv("EVENT_DETAIL_CONCURRENCY", 4))   # detail pages open at once per listing
+EVENT_DETAIL_TIMEOUT = float(os.getenv("EVENT_DETAIL_TIMEOUT", 30))        # seconds per event before keeping card data
+EVENT_ENRICH_BUDGET = float(os.getenv("EVENT_ENRICH_BUDGET", 60))          # seconds for all detail pages of a listing
+
+def event_listing_url(state: str, country: str, page: int = 1) -> str:
     url_state = state.lower().replace(" ", "-")
     url_country = country.lower().replace(" ", "-")
-    url = f"https://www.eventbrite.com/d/{url_country}--{url_state}/events--today/?page=1"
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page(user_agent=(
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/91.0.4472.124 Safari/537.36"
-        ))
-        page.goto(url, wait_until="domcontentloaded", timeout=60000)
-        try:
-            page.wait_for_selector('[data-testid="search-event"]', timeout=20000)
-        except Exception:
-            pass  # Continue anyway
-
-        for _ in range(5):
-            page.mouse.wheel(0, 5000)
-            time.sleep(1.5)
-
-        html = page.content()
-        browser.close()
-        return html
-
-def get_single_event_page(event_url: str) -> str:
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(event_url, timeout=60000)
-        try:
-            page.wait_for_selector("h2:has-text(\"Date and time\")", timeout=15000)
-            page.wait_for_selector("h2:has-text(\"Location\")", timeout=15000)
-        except:
-            pass
-        time.sleep(2)
-        html = page.content()
-        browser.close()
-        return html
+    return f"https://www.eventbrite.com/d/{url_country}--{url_state}/events--today/?page={page}"
 
-def extract_events_from_html(html_content: str) -> List[dict]:
-    soup = BeautifulSoup(html_content, "lxml")
-    event_list = soup.select_one("ul.SearchResultPanelContentEventCardList-module__eventList___2wk-D")
-    if not event_list:
-        raw_cards = soup.select('div[data-testid="search-event"]')
-        cards_to_iterate = raw_cards
-    else:
-        cards_to_iterate = event_list.find_all("li", recursive=False)
+def get_event_page(state: str, country: str, wait_strategy: str = None, profile_enabled: bool = None,
+                   page: int = 1) -> str:
+    url = event_listing_url(state, country, page)
 
-    events = []
-    seen_urls = set()
+    # The pool's default user agent is the desktop Chrome one used here before
+    # Benchmarks / parity checks force a strategy or profile and must really render
+    forced = wait_strategy is not None or profile_enabled is not None
+    return rendered(url, "eventbrite_listing", lambda: render_page_sync(
+        url, "eventbrite_listing", wait_strategy, profile_enabled
+    ), reuse_seconds=0 if forced else None)
 
-    for container in cards_to_iterate:
-        card = container.select_one('div[data-testid="search-event"]')
-        if not card:
-            continue
+async def crawl_event_pages(state: str, country: str, pages: int = None, concurrency: int = None,
+                            wait_strategy: str = None) -> List[dict]:
+    """
+    Renders listing pages 1..`pages` (EVENT_LISTING_PAGES), `concurrency`
+    (EVENT_LISTING_PAGE_CONCURRENCY) at a time, and merges their events in page
+    order, deduplicated by URL. Stops at the first page that adds no new events
+    (past the last page Eventbrite repeats itself or comes back empty) and
+    cancels the pages after it.
+    """
+    pages = pages or EVENT_LISTING_PAGES
+    semaphore = asyncio.Semaphore(concurrency or EVENT_LISTING_PAGE_CONCURRENCY)
 
-        title_tag = card.select_one("h3")
-        title = title_tag.get_text(strip=True) if title_tag else "N/A"
+    async def fetch(page_number: int) -> List[dict]:
+        url = event_listing_url(state, country, page_number)
+        async with semaphore:
+            # On the scrape farm only the extracted cards come back, not the page
+            cards = await extract_page(url, "eventbrite_listing", EVENT_LISTING_LAYOUT, wait_strategy,
+                                       reuse_seconds=0 if wait_strategy is not None else None)
+        page_events = shape_event_cards(cards)
+        print(f"📄 Listing page {page_number}: {len(page_events)} events")
+        return page_events
 
-        date_time = "N/A"
-        for p in card.select('p.Typography_body-md-bold__487rx'):
-            text = p.get_text(strip=True)
-            if "•" in text:
-                date_time = text
+    # The semaphore is FIFO, so pages start in order and later ones are the ones cancelled
+    tasks = [asyncio.ensure_future(fetch(page_number)) for page_number in range(1, pages + 1)]
+    events, seen_urls = [], set()
+    try:
+        for page_number, task in enumerate(tasks, start=1):
+            try:
+                page_events = await task
+            except Exception as e:
+                if page_number == 1:
+                    raise
+                print(f"⚠️ Listing page {page_number} failed ({type(e).__name__}); keeping pages before it")
+                break
+            new_events = [event for event in page_events if event["url"] not in seen_urls]
+            if not new_events:
+                print(f"⏹️ Listing page {page_number} added no new events; stopping")
                 break
+            seen_urls.update(event["url"] for event in new_events)
+            events.extend(new_events)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return events
+
+def get_single_event_page(event_url: str, profile_enabled: bool = None) -> str:
+    return rendered(event_url, "eventbrite_event", lambda: render_page_sync(
+        event_url, "eventbrite_event", profile_enabled=profile_enabled
+    ), reuse_seconds=0 if profile_enabled is not None else None)
 
-        venue_tag = card.select_one("p.Typography_body-md__487rx")
-        venue = venue_tag.get_text(strip=True) if venue_tag else "N/A"
+async def enrich_event_details(events: List[dict], indexes: List[int], concurrency: int = None,
+                               budget: float = None, on_enriched: Callable = None) -> Dict[int, dict]:
+    """
+    Visits the detail pages of events[i] for i in indexes, at most `concurrency`
+    (EVENT_DETAIL_CONCURRENCY) at a time, each capped at EVENT_DETAIL_TIMEOUT,
+    all within `budget` (EVENT_ENRICH_BUDGET) seconds. Returns {index: enriched
+    event} for the ones that finished; the rest keep their card-level data.
+    on_enriched(index, event) is called as each one finishes.
+    """
+    semaphore = asyncio.Semaphore(concurrency or EVENT_DETAIL_CONCURRENCY)
+    budget = EVENT_ENRICH_BUDGET if budget is None else budget
 
-        price_tag = card.select_one("div.DiscoverVerticalEventCard-module__priceWrapper___usWo6 p") or \
-                    card.select_one("div.DiscoverHorizontalEventCard-module__priceWrapper___3rOUY p")
-        price = price_tag.get_text(strip=True) if price_tag else "N/A"
+    async def enrich(i: int):
+        event = events[i]
+        async with semaphore:
+            try:
+                details = shape_event_details(await asyncio.wait_for(
+                    extract_page(event["url"], "eventbrite_event", EVENT_DETAIL_LAYOUT),
+                    EVENT_DETAIL_TIMEOUT
+                ))
+            except Exception as e:
+                print(f"⚠️ Failed to fetch full details for: {event['title']} ({type(e).__name__})")
+                return i, None
+        enriched = {**event, "full_date_time": details["full_date"], "map_location": details["map_location"]}
+        if on_enriched:
+            on_enriched(i, enriched)
+        return i, enriched
 
-        url_tag = card.select_one("a.event-card-link")
-        url = url_tag["href"] if url_tag and url_tag.has_attr("href") else "N/A"
+    if not indexes:
+        return {}
+    tasks = [asyncio.ensure_future(enrich(i)) for i in indexes]
+    done, pending = await asyncio.wait(tasks, timeout=budget)
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"⏱️ Enrichment budget of {budget:.0f}s spent, {len(pending)} events keep card data")
+    return {i: event for i, event in (task.result() for task in done) if event is not None}
+
+# Compiled once; see common/html_extract.py
+_EVENT_LIST = f"(//ul[{has_class('SearchResultPanelContentEventCardList-module__eventList___2wk-D')}])[1]"
+_SEARCH_EVENT = 'div[@data-testid="search-event"]'
+
+# One card per <li> of the results list (its first search-event div); pages
+# without that list fall back to the first search-event nested in each one
+EVENT_LISTING_LAYOUT = Layout(
+    cards=(f"{_EVENT_LIST}/li/descendant::{_SEARCH_EVENT}[1]"
+           f" | //{_SEARCH_EVENT}[not({_EVENT_LIST})]/descendant::{_SEARCH_EVENT}[1]"),
+    fields={
+        "title": Field(".//h3"),
+        "date_time": Field(f".//p[{has_class('Typography_body-md-bold__487rx')}][contains(., '•')]"),
+        "venue": Field(f".//p[{has_class('Typography_body-md__487rx')}]"),
+        "price": Field((
+            f".//div[{has_class('DiscoverVerticalEventCard-module__priceWrapper___usWo6')}]//p",
+            f".//div[{has_class('DiscoverHorizontalEventCard-module__priceWrapper___3rOUY')}]//p",
+        )),
+        "url": Field(f".//a[{has_class('event-card-link')}]", attr="href"),
+    },
+)
+
+EVENT_DETAIL_LAYOUT = Layout(fields={
+    "full_date": Field(f"//*[@data-testid='display-date-container']//*[{has_class('date-info__full-datetime')}]"),
+    "address_lines": Field(f"//*[{has_class('location-info__address')}]", separator="\n"),
+})
+
+def _or_na(value):
+    return "N/A" if value is None else value
+
+def shape_event_cards(cards: List[dict]) -> List[dict]:
+    """EVENT_LISTING_LAYOUT rows -> events with absolute URLs, deduplicated by URL."""
+    events = []
+    seen_urls = set()
+    for row in cards:
+        url = _or_na(row["url"])
         if url.startswith("/") and not url.startswith("http"):
             url = "https://www.eventbrite.com" + url
 
@@ -98,29 +179,25 @@ def extract_events_from_html(html_content: str) -> List[dict]:
         seen_urls.add(url)
 
         events.append({
-            "title": title,
-            "date_time": date_time,
-            "venue": venue,
-            "price": price,
+            "title": _or_na(row["title"]),
+            "date_time": _or_na(row["date_time"]),
+            "venue": _or_na(row["venue"]),
+            "price": _or_na(row["price"]),
             "url": url
         })
 
     return events
 
-def parse_event_details(event_html: str) -> dict:
-    soup = BeautifulSoup(event_html, 'lxml')
-    full_date = "N/A"
-    map_location = "N/A"
+def extract_events_from_html(html_content: str) -> List[dict]:
+    return shape_event_cards(EVENT_LISTING_LAYOUT.extract(parse_html(html_content)))
 
-    date_container = soup.select_one('[data-testid="display-date-container"] .date-info__full-datetime')
-    if date_container:
-        full_date = date_container.get_text(strip=True)
+def shape_event_details(row: dict) -> dict:
+    """EVENT_DETAIL_LAYOUT row -> {"full_date", "map_location"}."""
+    full_date = _or_na(row.get("full_date"))
+    map_location = "N/A"
 
-    loc_block = soup.select_one('.location-info__address')
-    if loc_block:
-        venue = loc_block.select_one('p.location-info__address-text')
-        venue_name = venue.get_text(strip=True) if venue else ""
-        address_text = loc_block.get_text(separator="\n", strip=True).split("\n")
+    if row.get("address_lines") is not None:
+        address_text = row["address_lines"].split("\n")
         if len(address_text) >= 2:
             map_location = address_text[1]
         elif len(address_text) == 1:
@@ -131,34 +208,67 @@ def parse_event_details(event_html: str) -> dict:
         "map_location": map_location
     }
 
-@app.get("/events")
-def get_events(state: str = Query(..., description="State or region name"),
-               country: str = Query(..., description="Country name")):
-    print(f"🔥Control at events")
-    print(f"📍 Getting events for: {state}, {country}…")
-    page_source = get_event_page(state, country)
-    print("✅ Received HTML from browser_scraper. Length:", len(page_source))
-
-    events = extract_events_from_html(page_source)
-    unique_events = []
-    seen_urls = set()
+def parse_event_details(event_html: str) -> dict:
+    return shape_event_details(EVENT_DETAIL_LAYOUT.apply(parse_html(event_html)))
 
-    for event in events:
-        if event["url"] in seen_urls:
-            continue
-        seen_urls.add(event["url"])
+def scrape_events(state: str, country: str, on_listing: Callable = None, on_enriched: Callable = None) -> List[dict]:
+    """
+    Live scrape: listing page plus detail enrichment (slow; the events store
+    calls this). For streaming replies, on_listing(events) gets the card-level
+    list as soon as the listing page is parsed, and on_enriched(index, event)
+    each event as its details arrive.
+    """
+    print(f"📍 Getting events for: {state}, {country}…")
+    unique_events = run_sync(crawl_event_pages(state, country))
 
-        try:
-            event_html = get_single_event_page(event["url"])
-            details = parse_event_details(event_html)
-            event["full_date_time"] = details["full_date"]
-            event["map_location"] = details["map_location"]
-        except Exception as e:
-            print(f"⚠️ Failed to fetch full details for: {event['title']}")
-            event["full_date_time"] = "N/A"
-            event["map_location"] = "N/A"
+    # Event details never change: only URLs without stored details get a detail render
+    known = get_event_details_store().get_many(event["url"] for event in unique_events)
+    done = {i: {**event, **known[event["url"]]} for i, event in enumerate(unique_events) if event["url"] in known}
+    todo = [i for i in range(len(unique_events)) if i not in done]
+    print(f"♻️ Reusing details for {len(done)} events, fetching {len(todo)}")
+    if on_listing:
+        on_listing([done.get(i) or event for i, event in enumerate(unique_events)])
+    enriched = run_sync(enrich_event_details(unique_events, todo, on_enriched=on_enriched))
+    get_event_details_store().put_many({event["url"]: event for event in enriched.values()})
 
-        unique_events.append(event)
+    unique_events = [
+        done.get(i) or enriched.get(i) or {**event, "full_date_time": "N/A", "map_location": "N/A"}
+        for i, event in enumerate(unique_events)
+    ]
 
     print(f"\n🎉 Total {len(unique_events)} Unique Events Found.")
     return unique_events
+
+events_refresher = EventsRefresher(events_store, scrape_events)
+
+def get_events_with_freshness(state: str, country: str, on_listing: Callable = None, on_enriched: Callable = None):
+    """
+    (events, freshness) from the events store; a live scrape only on a cold
+    miss. The progress callbacks (see scrape_events) only fire for that scrape.
+    """
+    def scrape(state: str, country: str) -> List[dict]:
+        return scrape_events(state, country, on_listing, on_enriched)
+    return events_store.get(country, state, scrape)
+
+@app.on_event("startup")
+def start_events_refresher():
+    events_refresher.start()
+
+@app.get("/events")
+def get_events(state: str = Query(..., description="State or region name"),
+               country: str = Query(..., description="Country name")):
+    print(f"🔥Control at events")
+    events, freshness = get_events_with_freshness(state, country)
+    print(f"📦 {len(events)} events for {state}, {country} from {freshness['source']} ({freshness['age_seconds']}s old)")
+    return events
+
+@app.get("/events/stats")
+def events_stats():
+    return {
+        "render_profiles": get_profile_stats(),
+        "browser_pool": get_browser_pool().stats(),
+        "scrape_jobs": get_job_stats(),
+        "event_details": get_event_details_store().stats(),
+        "events_store": events_store.stats(),
+        "snapshots": get_snapshot_store().stats() if get_snapshot_store() else None,
+    }
@@ -0,0 +1,46 @@
+# events-service/bench_crawl.py
+#
+# Events collected per second by the listing crawl: page 1 only (the old
+# behaviour), --pages result pages one at a time, and --pages result pages
+# rendered concurrently. Snapshots are bypassed, every page is really rendered.
+#
+#   python bench_crawl.py --state California --country "United States" --pages 4 --runs 2
+
+import argparse
+import statistics
+import time
+from app import crawl_event_pages
+from common.background_loop import run_sync
+
+
+def crawl(state: str, country: str, pages: int, concurrency: int, strategy: str):
+    started = time.perf_counter()
+    events = run_sync(crawl_event_pages(state, country, pages=pages, concurrency=concurrency, wait_strategy=strategy))
+    return time.perf_counter() - started, len(events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent Eventbrite listing crawl")
+    parser.add_argument("--state", required=True)
+    parser.add_argument("--country", required=True)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=None, help="defaults to --pages")
+    parser.add_argument("--strategy", default="readiness", choices=("readiness", "fixed"))
+    parser.add_argument("--runs", type=int, default=1)
+    args = parser.parse_args()
+
+    modes = [
+        ("page 1 only", 1, 1),
+        ("sequential", args.pages, 1),
+        ("concurrent", args.pages, args.concurrency or args.pages),
+    ]
+    print(f"{'mode':<12} {'pages':>5} {'conc':>5} {'median s':>9} {'events':>7} {'events/s':>9}")
+    for name, pages, concurrency in modes:
+        samples = [crawl(args.state, args.country, pages, concurrency, args.strategy) for _ in range(args.runs)]
+        median = statistics.median(elapsed for elapsed, _ in samples)
+        events = samples[-1][1]
+        print(f"{name:<12} {pages:>5} {concurrency:>5} {median:>9.2f} {events:>7} {events / median:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# events-service/bench_extract.py
+#
+# Parsing benchmark and parity check for the Eventbrite extractors over saved
+# HTML fixtures: the legacy BeautifulSoup implementations (copied below) versus
+# the compiled-XPath ones in app.py. Fixtures are files in --fixtures named
+# eventbrite_listing*.html (listing pages) and eventbrite_event*.html (event pages).
+#
+#   python bench_extract.py --capture California "United States"   # save fixtures from a live render
+#   python bench_extract.py --from-snapshots                       # export fixtures from the snapshot store
+#   python bench_extract.py --runs 20
+#
+# Trimmed fixtures are committed in fixtures/ next to this script. Exits non-zero
+# when any fixture extracts differently, or when there is no fixture to compare.
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from bs4 import BeautifulSoup
+from app import extract_events_from_html, parse_event_details
+
+
+def legacy_extract_events(html_content: str) -> list:
+    soup = BeautifulSoup(html_content, "lxml")
+    event_list = soup.select_one("ul.SearchResultPanelContentEventCardList-module__eventList___2wk-D")
+    if not event_list:
+        cards_to_iterate = soup.select('div[data-testid="search-event"]')
+    else:
+        cards_to_iterate = event_list.find_all("li", recursive=False)
+
+    events = []
+    seen_urls = set()
+    for container in cards_to_iterate:
+        card = container.select_one('div[data-testid="search-event"]')
+        if not card:
+            continue
+        title_tag = card.select_one("h3")
+        title = title_tag.get_text(strip=True) if title_tag else "N/A"
+        date_time = "N/A"
+        for p in card.select('p.Typography_body-md-bold__487rx'):
+            text = p.get_text(strip=True)
+            if "•" in text:
+                date_time = text
+                break
+        venue_tag = card.select_one("p.Typography_body-md__487rx")
+        venue = venue_tag.get_text(strip=True) if venue_tag else "N/A"
+        price_tag = card.select_one("div.DiscoverVerticalEventCard-module__priceWrapper___usWo6 p") or \
+                    card.select_one("div.DiscoverHorizontalEventCard-module__priceWrapper___3rOUY p")
+        price = price_tag.get_text(strip=True) if price_tag else "N/A"
+        url_tag = card.select_one("a.event-card-link")
+        url = url_tag["href"] if url_tag and url_tag.has_attr("href") else "N/A"
+        if url.startswith("/") and not url.startswith("http"):
+            url = "https://www.eventbrite.com" + url
+        if url in seen_urls:
+            continue
+        seen_urls.add(url)
+        events.append({"title": title, "date_time": date_time, "venue": venue, "price": price, "url": url})
+    return events
+
+
+def legacy_parse_event(event_html: str) -> dict:
+    soup = BeautifulSoup(event_html, 'lxml')
+    full_date = "N/A"
+    map_location = "N/A"
+    date_container = soup.select_one('[data-testid="display-date-container"] .date-info__full-datetime')
+    if date_container:
+        full_date = date_container.get_text(strip=True)
+    loc_block = soup.select_one('.location-info__address')
+    if loc_block:
+        address_text = loc_block.get_text(separator="\n", strip=True).split("\n")
+        if len(address_text) >= 2:
+            map_location = address_text[1]
+        elif len(address_text) == 1:
+            map_location = address_text[0]
+    return {"full_date": full_date, "map_location": map_location}
+
+
+EXTRACTORS = {
+    "eventbrite_listing": (legacy_extract_events, extract_events_from_html),
+    "eventbrite_event": (legacy_parse_event, parse_event_details),
+}
+
+
+def capture(directory: str, state: str, country: str, details: int = 3):
+    from app import get_event_page, get_single_event_page
+    os.makedirs(directory, exist_ok=True)
+    slug = f"{country}_{state}".lower().replace(" ", "_")
+    html = get_event_page(state, country)
+    with open(os.path.join(directory, f"eventbrite_listing_{slug}.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+    for i, event in enumerate(extract_events_from_html(html)[:details]):
+        with open(os.path.join(directory, f"eventbrite_event_{slug}_{i}.html"), "w", encoding="utf-8") as f:
+            f.write(get_single_event_page(event["url"]))
+    print(f"Saved fixtures for {state}, {country} to {directory}")
+
+
+def timed(fn, html: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(html)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BeautifulSoup vs compiled XPath extraction for Eventbrite pages")
+    parser.add_argument("--fixtures", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures"))
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--capture", nargs=2, metavar=("STATE", "COUNTRY"))
+    parser.add_argument("--from-snapshots", action="store_true", help="export fixtures from the snapshot store first")
+    args = parser.parse_args()
+
+    if args.from_snapshots:
+        from common.snapshot_store import SnapshotStore
+        count = SnapshotStore().export_fixtures(args.fixtures, ["eventbrite_listing", "eventbrite_event"])
+        print(f"Exported {count} snapshots to {args.fixtures}")
+    if args.capture:
+        capture(args.fixtures, *args.capture)
+
+    files = sorted(f for f in os.listdir(args.fixtures) if f.endswith(".html")) if os.path.isdir(args.fixtures) else []
+    mismatches = compared = 0
+    print(f"{'fixture':<40} {'KB':>7} {'bs4 ms':>8} {'xpath ms':>9} {'speedup':>8}  parity")
+    for name in files:
+        kind = next((k for k in EXTRACTORS if name.startswith(k)), None)
+        if kind is None:
+            continue
+        with open(os.path.join(args.fixtures, name), encoding="utf-8") as f:
+            html = f.read()
+        legacy, fast = EXTRACTORS[kind]
+        same = legacy(html) == fast(html)
+        compared += 1
+        mismatches += not same
+        legacy_ms, fast_ms = timed(legacy, html, args.runs), timed(fast, html, args.runs)
+        print(f"{name:<40} {len(html) / 1024:>7.0f} {legacy_ms:>8.1f} {fast_ms:>9.1f} "
+              f"{legacy_ms / fast_ms:>7.1f}x  {'✅' if same else '❌'}")
+
+    if not compared:
+        print(f"No fixtures in {args.fixtures}; use --capture STATE COUNTRY or --from-snapshots first")
+    sys.exit(1 if mismatches or not compared else 0)
+
+
+if __name__ == "__main__":
+    main()
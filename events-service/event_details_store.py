@@ -0,0 +1,137 @@
+# events-service/event_details_store.py
+#
+# Persistent store of event detail fields (full_date_time, map_location) keyed
+# by normalized event URL. An event's details do not change, so a URL rendered
+# once is never rendered again until the event is over:
+#
+#   - each entry expires at the end of the event's (last) day, parsed from
+#     full_date_time, plus EVENT_DETAILS_GRACE_SECONDS; when no date can be
+#     parsed, EVENT_DETAILS_FALLBACK_TTL seconds after it was stored
+#   - only useful results are stored (not both fields "N/A"), so a failed
+#     render is retried next time
+#   - expired rows are purged on write
+#
+# The database is EVENT_DETAILS_PATH (by default next to this module), opened
+# on first use:
+#
+#   known = get_event_details_store().get_many(urls)    # {url: {"full_date_time", "map_location"}}
+#   get_event_details_store().put_many({url: enriched_event})
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional
+from common.snapshot_store import normalize_url
+
+EVENT_DETAILS_PATH = os.getenv(
+    "EVENT_DETAILS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "event_details.sqlite3"))
+EVENT_DETAILS_GRACE_SECONDS = float(os.getenv("EVENT_DETAILS_GRACE_SECONDS", 86400))        # kept after the event day ends
+EVENT_DETAILS_FALLBACK_TTL = float(os.getenv("EVENT_DETAILS_FALLBACK_TTL", 3 * 86400))      # when the date can't be parsed
+
+DETAIL_FIELDS = ("full_date_time", "map_location")
+
+_MONTHS = {m: i + 1 for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"])}
+# "October 19", "Oct 19, 2025", "Sat, Oct 19" ...
+_DATE_RE = re.compile(r"\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+(\d{1,2})(?:,?\s+(\d{4}))?",
+                      re.IGNORECASE)
+
+
+def event_end_date(full_date_time: str, today: Optional[date] = None) -> Optional[date]:
+    """Last calendar date mentioned in Eventbrite's date line, or None."""
+    today = today or date.today()
+    matches = _DATE_RE.findall(full_date_time or "")
+    if not matches:
+        return None
+    month, day, year = matches[-1]
+    try:
+        end = date(int(year) if year else today.year, _MONTHS[month.lower()[:3]], int(day))
+    except ValueError:
+        return None
+    # A yearless date far in the past is next year's (listing in December, event in January)
+    if not year and end < today - timedelta(days=180):
+        end = end.replace(year=end.year + 1)
+    return end
+
+
+class EventDetailsStore:
+    def __init__(self, path: str = EVENT_DETAILS_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS details ("
+            " url_key TEXT PRIMARY KEY, url TEXT NOT NULL, full_date_time TEXT, map_location TEXT,"
+            " stored_at REAL NOT NULL, expires_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS details_by_expiry ON details (expires_at);"
+        )
+        self._conn.commit()
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0, "stores": 0, "skipped": 0, "expired": 0}
+
+    def _expires_at(self, details: dict, now: float) -> float:
+        end = event_end_date(details.get("full_date_time"))
+        if end is None:
+            return now + EVENT_DETAILS_FALLBACK_TTL
+        return datetime.combine(end + timedelta(days=1), datetime.min.time()).timestamp() + EVENT_DETAILS_GRACE_SECONDS
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, dict]:
+        """Stored, unexpired detail fields for those of `urls` seen before."""
+        urls = list(urls)
+        keys = {normalize_url(url): url for url in urls}
+        found = {}
+        with self._lock:
+            for key, url in keys.items():
+                row = self._conn.execute(
+                    "SELECT full_date_time, map_location FROM details WHERE url_key = ? AND expires_at > ?",
+                    (key, time.time()),
+                ).fetchone()
+                if row:
+                    found[url] = dict(zip(DETAIL_FIELDS, row))
+            self._stats["lookups"] += len(urls)
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(urls) - len(found)
+        return found
+
+    def put_many(self, events: Dict[str, dict]):
+        """Store detail fields of enriched events ({url: event}); purges expired rows."""
+        now = time.time()
+        rows = []
+        for url, event in events.items():
+            details = {field: event.get(field) for field in DETAIL_FIELDS}
+            if all(details[field] in (None, "N/A") for field in DETAIL_FIELDS):
+                continue
+            rows.append((normalize_url(url), url, details["full_date_time"], details["map_location"],
+                         now, self._expires_at(details, now)))
+        with self._lock:
+            self._stats["skipped"] += len(events) - len(rows)
+            if rows:
+                self._conn.executemany("INSERT OR REPLACE INTO details VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._stats["stores"] += len(rows)
+            cursor = self._conn.execute("DELETE FROM details WHERE expires_at <= ?", (now,))
+            self._stats["expired"] += cursor.rowcount
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM details WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+            stats = dict(self._stats)
+        return {
+            **stats,
+            "size": size,
+            "hit_rate": round(stats["hits"] / stats["lookups"], 3) if stats["lookups"] else None,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_event_details_store() -> EventDetailsStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = EventDetailsStore()
+    return _store
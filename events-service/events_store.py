@@ -0,0 +1,182 @@
+# events-service/events_store.py
+#
+# In-process store of scraped "events today" listings keyed by
+# (country, state, date), kept warm by a background refresher:
+#
+#   - every lookup marks the region as active
+#   - the refresher re-scrapes active regions (seen within
+#     EVENTS_ACTIVE_REGION_SECONDS) whose entry for today is missing or older
+#     than EVENTS_REFRESH_AFTER, one region at a time
+#   - a lookup answers from the store whenever today's entry exists, stale or
+#     not (a stale entry is refreshed in the background); only a cold miss
+#     scrapes live, and concurrent cold misses for one region share one scrape
+#
+# Entries carry fetched_at, so callers and /events/stats can see freshness.
+
+import os
+import threading
+import time
+from datetime import date
+from typing import Callable, List, Tuple
+
+EVENTS_REFRESH_ENABLED = os.getenv("EVENTS_REFRESH_ENABLED", "true").lower() == "true"
+EVENTS_REFRESH_INTERVAL = float(os.getenv("EVENTS_REFRESH_INTERVAL", 60))               # seconds between refresher passes
+EVENTS_REFRESH_AFTER = float(os.getenv("EVENTS_REFRESH_AFTER", 3 * 3600))               # entry age that triggers a refresh
+EVENTS_ACTIVE_REGION_SECONDS = float(os.getenv("EVENTS_ACTIVE_REGION_SECONDS", 2 * 86400))  # regions kept warm after last lookup
+
+
+def _region(country: str, state: str) -> Tuple[str, str]:
+    return " ".join(country.lower().split()), " ".join(state.lower().split())
+
+
+class EventsStore:
+    def __init__(self, refresh_after: float = EVENTS_REFRESH_AFTER,
+                 active_seconds: float = EVENTS_ACTIVE_REGION_SECONDS):
+        self.refresh_after = refresh_after
+        self.active_seconds = active_seconds
+        self._entries = {}         # (country, state, date) -> {"events", "fetched_at"}
+        self._active = {}          # (country, state) -> (last lookup, original spelling)
+        self._region_locks = {}    # (country, state) -> Lock serializing scrapes of a region
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "stale_hits": 0, "cold_misses": 0, "coalesced": 0,
+                       "refreshes": 0, "refresh_errors": 0}
+
+    def _region_lock(self, region) -> threading.Lock:
+        with self._lock:
+            return self._region_locks.setdefault(region, threading.Lock())
+
+    def _fresh(self, entry: dict, now: float) -> bool:
+        return entry["fetched_at"] + self.refresh_after > now
+
+    def get(self, country: str, state: str, scrape: Callable[[str, str], List[dict]]) -> Tuple[List[dict], dict]:
+        """(events, freshness) for today; scrapes live only when today has no entry yet."""
+        region = _region(country, state)
+        key = (*region, date.today().isoformat())
+        now = time.time()
+        with self._lock:
+            self._stats["lookups"] += 1
+            self._active[region] = (now, (country, state))
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._stats["hits" if self._fresh(entry, now) else "stale_hits"] += 1
+        if entry is not None:
+            return entry["events"], self._freshness(entry, "store", now)
+
+        with self._region_lock(region):
+            # Another request (or the refresher) may have filled it while we waited
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                with self._lock:
+                    self._stats["cold_misses"] += 1
+                entry = self._put(key, scrape(state, country))
+                source = "live"
+            else:
+                with self._lock:
+                    self._stats["coalesced"] += 1
+                source = "store"
+        return entry["events"], self._freshness(entry, source, time.time())
+
+    def _put(self, key, events: List[dict]) -> dict:
+        entry = {"events": events, "fetched_at": time.time()}
+        today = date.today().isoformat()
+        with self._lock:
+            self._entries[key] = entry
+            # Yesterday's listings are never asked for again
+            for old in [k for k in self._entries if k[2] < today]:
+                del self._entries[old]
+        return entry
+
+    def _freshness(self, entry: dict, source: str, now: float) -> dict:
+        return {
+            "source": source,
+            "fetched_at": entry["fetched_at"],
+            "age_seconds": round(now - entry["fetched_at"], 1),
+            "stale": not self._fresh(entry, now),
+        }
+
+    def due_regions(self) -> List[Tuple[str, str]]:
+        """(country, state) of active regions whose entry for today is missing or stale, oldest first."""
+        now = time.time()
+        today = date.today().isoformat()
+        due = []
+        with self._lock:
+            for region, (last_seen, spelling) in list(self._active.items()):
+                if last_seen + self.active_seconds < now:
+                    del self._active[region]
+                    continue
+                entry = self._entries.get((*region, today))
+                if entry is None or not self._fresh(entry, now):
+                    due.append((entry["fetched_at"] if entry else 0, spelling))
+        return [spelling for _, spelling in sorted(due)]
+
+    def refresh(self, country: str, state: str, scrape: Callable[[str, str], List[dict]]):
+        region = _region(country, state)
+        key = (*region, date.today().isoformat())
+        with self._region_lock(region):
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and self._fresh(entry, time.time()):
+                return  # a cold miss filled it meanwhile
+            try:
+                self._put(key, scrape(state, country))
+                with self._lock:
+                    self._stats["refreshes"] += 1
+            except Exception as e:
+                with self._lock:
+                    self._stats["refresh_errors"] += 1
+                print(f"⚠️ Background refresh failed for {state}, {country}: {e}")
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            stats = dict(self._stats)
+            entries = {
+                f"{country}/{state}/{day}": {
+                    "events": len(entry["events"]),
+                    "age_seconds": round(now - entry["fetched_at"], 1),
+                    "stale": not self._fresh(entry, now),
+                }
+                for (country, state, day), entry in self._entries.items()
+            }
+            active = len(self._active)
+        answered = stats["hits"] + stats["stale_hits"] + stats["coalesced"]
+        return {
+            **stats,
+            "store_answer_rate": round(answered / stats["lookups"], 3) if stats["lookups"] else None,
+            "active_regions": active,
+            "entries": entries,
+        }
+
+
+class EventsRefresher:
+    """Daemon thread re-scraping due regions every EVENTS_REFRESH_INTERVAL seconds."""
+
+    def __init__(self, store: EventsStore, scrape: Callable[[str, str], List[dict]],
+                 interval: float = EVENTS_REFRESH_INTERVAL):
+        self.store = store
+        self.scrape = scrape
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is not None or not EVENTS_REFRESH_ENABLED:
+            return
+        self._thread = threading.Thread(target=self._run, name="events-refresher", daemon=True)
+        self._thread.start()
+        print(f"🔄 Events refresher running every {self.interval:.0f}s")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for country, state in self.store.due_regions():
+                if self._stop.is_set():
+                    return
+                print(f"🔄 Refreshing events for {state}, {country}")
+                self.store.refresh(country, state, self.scrape)
+
+
+events_store = EventsStore()
@@ -0,0 +1,47 @@
+# events-service/parity_render_profiles.py
+#
+# Parity check for the render profiles: renders the same Eventbrite listing and
+# event pages with the profile off and on, and confirms the extracted results
+# match. Also fills the on/off render stats, so the time/bytes saved are printed.
+#
+#   python parity_render_profiles.py --state "New York" --country "United States" --details 3
+#
+# Exits non-zero when extraction differs.
+
+import argparse
+import json
+import sys
+from app import get_event_page, get_single_event_page, extract_events_from_html, parse_event_details
+from common.render_profiles import get_profile_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render profile parity check for events-service")
+    parser.add_argument("--state", required=True)
+    parser.add_argument("--country", required=True)
+    parser.add_argument("--details", type=int, default=3, help="event detail pages to compare")
+    args = parser.parse_args()
+
+    mismatches = 0
+    off = extract_events_from_html(get_event_page(args.state, args.country, profile_enabled=False))
+    on = extract_events_from_html(get_event_page(args.state, args.country, profile_enabled=True))
+    off_keys = {tuple(sorted(e.items())) for e in off}
+    on_keys = {tuple(sorted(e.items())) for e in on}
+    missing, extra = off_keys - on_keys, on_keys - off_keys
+    status = "✅" if not missing and not extra else "❌"
+    print(f"{status} listing: {len(off)} events off, {len(on)} on, {len(missing)} missing, {len(extra)} extra")
+    mismatches += bool(missing or extra)
+
+    for event in off[:args.details]:
+        details_off = parse_event_details(get_single_event_page(event["url"], profile_enabled=False))
+        details_on = parse_event_details(get_single_event_page(event["url"], profile_enabled=True))
+        status = "✅" if details_off == details_on else "❌"
+        print(f"{status} details '{event['title']}': off={details_off} on={details_on}")
+        mismatches += details_off != details_on
+
+    print(json.dumps({k: v for k, v in get_profile_stats().items() if k.startswith("eventbrite")}, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
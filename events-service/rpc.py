@@ -10,7 +10,7 @@ from dotenv import load_dotenv
 from fastapi import HTTPException
 
 # Your FastAPI business logic
-from app import get_events
+from app import get_events_with_freshness, events_refresher
 
 load_dotenv()
 
@@ -20,6 +20,93 @@ RPC_QUEUE_NAME  = "events_rpc"
 # Module-level channel for publishing responses
 _publish_channel: aio_pika.Channel = None
 
+# Scrapes still running after an early (first_k) reply
+_background_tasks = set()
+
+# Reply modes (payload fields):
+#   default            one reply {"events": [...], "freshness": {...}} once everything is enriched
+#   "first_k": k       one reply {"events": first k, "partial": bool, ...} as soon as the listing
+#                      page is parsed; the scrape carries on in the background and fills the store
+#   "stream": true     several replies with the same correlation_id, in "seq" order:
+#                        {"seq": 0, "type": "listing", "events": [...]}        card-level list
+#                        {"seq": n, "type": "event", "index": i, "event": {...}} details for events[i]
+#                        {"seq": n, "type": "end", "count": N, "freshness": {...}}  (or "error")
+#                      a store hit sends the full list as "listing" followed straight by "end"
+
+async def publish(message: IncomingMessage, result: dict):
+    await _publish_channel.default_exchange.publish(
+        Message(
+            body=json.dumps(result).encode(),
+            correlation_id=message.correlation_id,
+        ),
+        routing_key=message.reply_to,
+    )
+
+def _error_result(e: Exception) -> dict:
+    if isinstance(e, HTTPException):
+        return {"error": e.detail, "status_code": e.status_code}
+    return {"error": str(e)}
+
+async def reply_stream(message: IncomingMessage, state: str, country: str):
+    loop = asyncio.get_running_loop()
+    outbox = asyncio.Queue()
+    sent_listing = False
+
+    # Callbacks fire on scraper threads; hand messages to the loop in order
+    def on_listing(events):
+        loop.call_soon_threadsafe(outbox.put_nowait, {"type": "listing", "events": events})
+
+    def on_enriched(index, event):
+        loop.call_soon_threadsafe(outbox.put_nowait, {"type": "event", "index": index, "event": event})
+
+    async def scrape():
+        try:
+            events, freshness = await asyncio.to_thread(get_events_with_freshness, state, country, on_listing, on_enriched)
+            if not sent_listing:
+                await outbox.put({"type": "listing", "events": events})
+            await outbox.put({"type": "end", "count": len(events), "freshness": freshness})
+        except Exception as e:
+            await outbox.put({"type": "end", **_error_result(e)})
+
+    task = asyncio.create_task(scrape())
+    seq = 0
+    while True:
+        item = await outbox.get()
+        if item["type"] == "listing":
+            if sent_listing:
+                continue
+            sent_listing = True
+        await publish(message, {"seq": seq, **item})
+        seq += 1
+        if item["type"] == "end":
+            break
+    await task
+
+async def reply_first_k(message: IncomingMessage, state: str, country: str, k: int):
+    loop = asyncio.get_running_loop()
+    listing = loop.create_future()
+
+    def on_listing(events):
+        loop.call_soon_threadsafe(lambda: listing.done() or listing.set_result(events))
+
+    task = asyncio.create_task(asyncio.to_thread(get_events_with_freshness, state, country, on_listing))
+    await asyncio.wait({listing, task}, return_when=asyncio.FIRST_COMPLETED)
+    if task.done():
+        events, freshness = task.result()  # store hit (or a scrape error, raised here)
+        await publish(message, {"events": events[:k], "partial": False, "count": len(events), "freshness": freshness})
+        return
+
+    events = listing.result()
+    await publish(message, {"events": events[:k], "partial": True, "count": len(events)})
+    _background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+
+def _background_task_done(task: asyncio.Task):
+    # Nobody awaits these tasks, so a failed scrape would otherwise go unreported
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"❌ Background scrape failed after first_k reply: {task.exception()!r}")
+
 async def on_request(message: IncomingMessage):
     async with message.process():
         try:
@@ -29,24 +116,23 @@ async def on_request(message: IncomingMessage):
             if not state or not country:
                 raise ValueError("Both 'state' and 'country' must be provided")
 
-            # IMPORTANT FIX: Use asyncio.to_thread to run the synchronous get_events function
-            # This prevents blocking the event loop of aio_pika.
-            events = await asyncio.to_thread(get_events, state=state, country=country)
-            result = {"events": events}
+            if payload.get("stream"):
+                await reply_stream(message, state, country)
+                return
+            if payload.get("first_k"):
+                await reply_first_k(message, state, country, int(payload["first_k"]))
+                return
+
+            # Answered from the events store; only a cold miss scrapes (in a thread,
+            # so the aio_pika event loop is never blocked)
+            events, freshness = await asyncio.to_thread(get_events_with_freshness, state, country)
+            result = {"events": events, "freshness": freshness}
 
-        except HTTPException as he:
-            result = {"error": he.detail, "status_code": he.status_code}
         except Exception as e:
-            result = {"error": str(e)}
+            result = _error_result(e)
 
         # Publish the response back via the shared _publish_channel
-        await _publish_channel.default_exchange.publish(
-            Message(
-                body=json.dumps(result).encode(),
-                correlation_id=message.correlation_id,
-            ),
-            routing_key=message.reply_to,
-        )
+        await publish(message, result)
 
 async def main():
     global _publish_channel
@@ -58,7 +144,10 @@ async def main():
     # 2) Declare the RPC queue
     queue = await _publish_channel.declare_queue(RPC_QUEUE_NAME, durable=True)
 
-    # 3) Start consuming requests
+    # 3) Keep recently requested regions warm
+    events_refresher.start()
+
+    # 4) Start consuming requests
     await queue.consume(on_request)
     print(f"🟢 [events-service] RPC server listening on '{RPC_QUEUE_NAME}' queue.")
     try:
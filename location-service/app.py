@@ -4,42 +4,29 @@ if sys.platform.startswith("win"):
     import asyncio
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-import json
-import time
-from playwright.sync_api import sync_playwright
 from fastapi import FastAPI, HTTPException
 import os
 import requests
 from dotenv import load_dotenv
 
+# Shared helpers (geocoder, ...) live in ../common
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.geocoder import reverse_geocode_sync, get_geocoder
+from geocoding import GeocodingProviders
+from nearby import nearby_search
+from poi import activity_flags, nearest_poi
+
 port = int(os.getenv("PORT", 8002))
 load_dotenv()
 
 app = FastAPI()
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+GOOGLE_GEOCODE_TIMEOUT = float(os.getenv("GOOGLE_GEOCODE_TIMEOUT", 10))   # seconds per Geocoding API call
 
 def reverse_geocode_nominatim(lat: float, lon: float):
-    url = f"https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={lon}&format=json"
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                       "Chrome/91.0.4472.124 Safari/537.36"
-        )
-        page.goto(url, wait_until="networkidle", timeout=15000)
-        time.sleep(1)
-        pre = page.text_content("body")
-        browser.close()
-        try:
-            data = json.loads(pre)
-            return {
-                "display_name": data.get("display_name", None),
-                "address": data.get("address", None)
-            }
-        except Exception as e:
-            return None
+    # Plain HTTP with a persistent coordinate cache; no browser needed
+    return reverse_geocode_sync(lat, lon)
 
 import requests
 
@@ -47,7 +34,7 @@ def get_area_info_google(lat, lon):
     url = f"https://maps.googleapis.com/maps/api/geocode/json?latlng={lat},{lon}&key={GOOGLE_API_KEY}"
     if not GOOGLE_API_KEY:
         raise ValueError("GOOGLE_API_KEY is not set in environment variables")  
-    resp = requests.get(url)
+    resp = requests.get(url, timeout=GOOGLE_GEOCODE_TIMEOUT)
     if resp.status_code != 200:
         return None
     data = resp.json()
@@ -145,50 +132,19 @@ def parse_google_address_components(google_data):
     }
 
 def get_nearby_places(lat: float, lon: float, radius: int = 500):
-    url = f"https://maps.googleapis.com/maps/api/place/nearbysearch/json?location={lat},{lon}&radius={radius}&key={GOOGLE_API_KEY}"
-    resp = requests.get(url)
-    if resp.status_code != 200:
-        return None
-    data = resp.json()
-    if data.get('status') != 'OK':
-        return None
-
-    places = []
-    for place in data.get('results', []):
-        place_type = place.get('types', [])[0] if place.get('types') else 'unknown'
-        place_name = place.get('name', 'Unnamed')
-        places.append({
-            "name": place_name,
-            "type": place_type,
-            "vicinity": place.get('vicinity', '')
-        })
-    return places
-
-def is_near_poi(lat: float, lon: float):
-    places = get_nearby_places(lat, lon)
-    if not places:
-        return {"nearby": False, "place": None}
-
-    poi_mapping = {
-        "gym": ["gym", "fitness_center"],
-        "park": ["park"],
-        "school": ["school", "university"],
-        "religious_place": ["church", "mosque", "temple", "synagogue"],
-        "hospital": ["hospital", "clinic"],
-        "beach": ["beach"],
-        "library": ["library"],
-        "home": ["home"]  # Note: "home" is harder to detect; may need user input or address parsing
-    }
-
-    for place in places:
-        for poi_type, keywords in poi_mapping.items():
-            if any(keyword in place["type"] for keyword in keywords):
-                return {"nearby": True, "place": poi_type, "name": place["name"]}
-
-    return {"nearby": False, "place": None}
-
-def get_activity_context(lat: float, lon: float, time_str: str, age: int, gender: str, motion_state: str = None):
-    places = get_nearby_places(lat, lon)
+    # Cached per geocell; see nearby.py
+    return nearby_search.get(lat, lon, GOOGLE_API_KEY, radius)
+
+def is_near_poi(lat: float, lon: float, places=None):
+    """Pass `places` when the request already fetched them."""
+    if places is None:
+        places = get_nearby_places(lat, lon)
+    return nearest_poi(places)
+
+def get_activity_context(lat: float, lon: float, time_str: str, age: int, gender: str, motion_state: str = None,
+                         places=None):
+    if places is None:
+        places = get_nearby_places(lat, lon)
     activity_context = {
         "Near_Park": False, "In_Gym": False, "At_School_Zone": False, "In_Shopping_Mall": False,
         "At_Religious_Place": False, "Near_Hospital": False, "At_Beach_or_Lake": False, "At_Library": False,
@@ -203,25 +159,9 @@ def get_activity_context(lat: float, lon: float, time_str: str, age: int, gender
     hour = time_obj.hour
     weekday = time_obj.weekday()  # 0-6, 0 is Monday
 
-    # Location-based activities
-    if places:
-        poi_mapping = {
-            "Near_Park": ["park"],
-            "In_Gym": ["gym", "fitness_center"],
-            "At_School_Zone": ["school", "university"],
-            "In_Shopping_Mall": ["shopping_mall"],
-            "At_Religious_Place": ["church", "mosque", "temple", "synagogue"],
-            "Near_Hospital": ["hospital", "clinic"],
-            "At_Beach_or_Lake": ["beach"],
-            "At_Library": ["library"],
-            "At_Movie_Theatre": ["movie_theater"]
-        }
-        for place in places:
-            place_type = place.get("type", "")
-            for activity, keywords in poi_mapping.items():
-                if any(keyword in place_type for keyword in keywords):
-                    activity_context[activity] = True
-                    break
+    # Location-based activities (one table lookup per place; see poi.py)
+    for activity in activity_flags(places):
+        activity_context[activity] = True
 
     # Time-based activities
     if 22 <= hour or hour < 6:
@@ -248,25 +188,41 @@ def get_activity_context(lat: float, lon: float, time_str: str, age: int, gender
 
     return activity_context
 
-@app.get("/location")
-def get_location(lat: float, lon: float, time: str, user_id: str, age: int, gender: str, motion_state: str = None):
-    print(f"🔥Control at location")
+def _nominatim_location(lat: float, lon: float):
     nominatim_result = reverse_geocode_nominatim(lat, lon)
     if nominatim_result and nominatim_result.get("display_name"):
-        activity_context = get_activity_context(lat, lon, time, age, gender, motion_state)
-        print(f"Weather data fetched: {nominatim_result}")
-        print(f"Activity context determined: {activity_context}")
-        return {"source": "nominatim","display_name": nominatim_result["display_name"], "address": nominatim_result, "activities": activity_context}
+        return {"source": "nominatim", "display_name": nominatim_result["display_name"], "address": nominatim_result}
+    return None
 
+def _google_location(lat: float, lon: float):
     google_result = get_area_info_google(lat, lon)
     if google_result:
-        activity_context = get_activity_context(lat, lon, time, age, gender, motion_state)
-        print(f"Weather data fetched: {google_result['address']}")
-        print(f"Activity context determined: {activity_context}")
-        return {
-            "source": "google",
-            "display_name": google_result["display_name"],
-            "address": google_result["address"],
-            "activities": activity_context
-        }
-    raise HTTPException(status_code=404, detail="Location data not found")
+        return {"source": "google", "display_name": google_result["display_name"], "address": google_result["address"]}
+    return None
+
+# Raced / hedged with adaptive ordering; see geocoding.py
+geocoding = GeocodingProviders({
+    "nominatim": _nominatim_location,
+    **({"google": _google_location} if GOOGLE_API_KEY else {}),
+})
+
+@app.get("/location")
+def get_location(lat: float, lon: float, time: str, user_id: str, age: int, gender: str, motion_state: str = None):
+    print(f"🔥Control at location")
+    location, provider = geocoding.lookup(lat, lon)
+    if location is None:
+        raise HTTPException(status_code=404, detail="Location data not found")
+
+    places = get_nearby_places(lat, lon)  # fetched once, shared by every classifier
+    activity_context = get_activity_context(lat, lon, time, age, gender, motion_state, places)
+    print(f"Location data fetched from {provider}: {location['address']}")
+    print(f"Activity context determined: {activity_context}")
+    return {**location, "activities": activity_context}
+
+@app.get("/location/stats")
+def location_stats():
+    return {
+        "geocoding": geocoding.stats(),
+        "geocoder": get_geocoder().stats(),
+        "nearby_search": nearby_search.stats(),
+    }
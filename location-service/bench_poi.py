@@ -0,0 +1,85 @@
+# location-service/bench_poi.py
+#
+# Micro-benchmark and parity check for nearby-place classification: the legacy
+# nested keyword loops (copied below) versus the precomputed type tables in
+# poi.py, over synthetic Nearby Search results of growing size. A share of the
+# places get types Google does not document, to exercise the lazy path.
+#
+#   python bench_poi.py --sizes 20 1000 100000 --runs 5
+#
+# Exits non-zero when any result classifies differently.
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from poi import ACTIVITY_KEYWORDS, GOOGLE_PLACE_TYPES, POI_KEYWORDS, activity_flags, nearest_poi
+
+
+def legacy_activity_flags(places: list) -> set:
+    flags = set()
+    for place in places:
+        place_type = place.get("type", "")
+        for activity, keywords in ACTIVITY_KEYWORDS.items():
+            if any(keyword in place_type for keyword in keywords):
+                flags.add(activity)
+                break
+    return flags
+
+
+def legacy_nearest_poi(places: list) -> dict:
+    for place in places:
+        for poi_type, keywords in POI_KEYWORDS.items():
+            if any(keyword in place["type"] for keyword in keywords):
+                return {"nearby": True, "place": poi_type, "name": place["name"]}
+    return {"nearby": False, "place": None}
+
+
+def synthetic_places(size: int, seed: int, poi_share: float, unknown_share: float = 0.05) -> list:
+    rng = random.Random(seed)
+    # Mostly non-POI types, like real results, so nearest_poi has to scan
+    boring = [t for t in GOOGLE_PLACE_TYPES if not any(k in t for ks in POI_KEYWORDS.values() for k in ks)]
+    places = []
+    for i in range(size):
+        if rng.random() < unknown_share:
+            place_type = f"custom_{rng.choice(['park_ride', 'kids_gym', 'venue', 'outlet'])}_{rng.randint(0, 50)}"
+        else:
+            place_type = rng.choice(GOOGLE_PLACE_TYPES if rng.random() < poi_share else boring)
+        places.append({"name": f"Place {i}", "type": place_type, "vicinity": ""})
+    return places
+
+
+def timed(fn, places: list, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(places)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nested keyword loops vs precomputed type tables")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 1000, 10000, 100000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--poi-share", type=float, default=0.01, help="share of places drawn from all types")
+    args = parser.parse_args()
+
+    mismatches = 0
+    print(f"{'places':>8} {'classifier':<15} {'loops ms':>9} {'table ms':>9} {'speedup':>8}  parity")
+    for size in args.sizes:
+        places = synthetic_places(size, args.seed, args.poi_share)
+        for name, legacy, fast in (("activity_flags", legacy_activity_flags, activity_flags),
+                                   ("nearest_poi", legacy_nearest_poi, nearest_poi)):
+            same = legacy(places) == fast(places)
+            mismatches += not same
+            legacy_ms, fast_ms = timed(legacy, places, args.runs), timed(fast, places, args.runs)
+            print(f"{size:>8} {name:<15} {legacy_ms:>9.2f} {fast_ms:>9.2f} "
+                  f"{legacy_ms / fast_ms if fast_ms else float('inf'):>7.1f}x  {'✅' if same else '❌'}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
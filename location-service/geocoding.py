@@ -0,0 +1,192 @@
+# location-service/geocoding.py
+#
+# Reverse geocoding over several providers (Nominatim, Google Geocoding, ...),
+# taking the first valid answer (one with a display_name):
+#
+#   sequential - one provider after another (legacy)
+#   parallel   - ask every provider at once
+#   hedge      - ask the first provider; every GEOCODE_HEDGE_DELAY_MS without a
+#                valid answer, start the next one too (immediately when all
+#                running ones have failed)
+#
+# Providers are tried in adaptive order: once each has GEOCODE_ADAPT_MIN_SAMPLES
+# calls, they are ranked by expected time to a valid answer, i.e. the moving
+# average of their latency divided by the moving average of their success rate;
+# providers whose recent success rate is below GEOCODE_MIN_SUCCESS (say, one
+# that fails fast on every call) go last. Until then, and with
+# GEOCODE_ADAPTIVE=false, the configured order is used.
+#
+# A provider that loses keeps running in its thread (a blocking HTTP call
+# cannot be interrupted); its latency and outcome still feed the stats.
+#
+#   geocoding = GeocodingProviders({"nominatim": fn, "google": fn})
+#   location, provider = geocoding.lookup(lat, lon)     # (None, None) if nobody answered
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+GEOCODE_STRATEGY = os.getenv("GEOCODE_STRATEGY", "hedge")                   # sequential | parallel | hedge
+GEOCODE_HEDGE_DELAY_MS = int(os.getenv("GEOCODE_HEDGE_DELAY_MS", 1000))     # head start of each provider in hedge mode
+GEOCODE_TIMEOUT = float(os.getenv("GEOCODE_TIMEOUT", 15))                   # parallel / hedge: give up after this many seconds
+GEOCODE_ADAPTIVE = os.getenv("GEOCODE_ADAPTIVE", "true").lower() == "true"
+GEOCODE_ADAPT_MIN_SAMPLES = int(os.getenv("GEOCODE_ADAPT_MIN_SAMPLES", 5))  # calls per provider before reordering
+GEOCODE_MIN_SUCCESS = float(os.getenv("GEOCODE_MIN_SUCCESS", 0.5))          # below this recent success rate, try last
+GEOCODE_EWMA_ALPHA = float(os.getenv("GEOCODE_EWMA_ALPHA", 0.2))            # weight of the newest sample
+GEOCODE_WORKERS = int(os.getenv("GEOCODE_WORKERS", 16))                     # threads running provider calls
+
+STRATEGIES = ("sequential", "parallel", "hedge")
+
+Provider = Callable[[float, float], Optional[dict]]
+
+
+def _valid(result: Optional[dict]) -> bool:
+    return bool(result and result.get("display_name"))
+
+
+class GeocodingProviders:
+    def __init__(self, providers: Dict[str, Provider], max_workers: int = GEOCODE_WORKERS):
+        self.providers = dict(providers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="geocode")
+        self._lock = threading.Lock()
+        self._stats = {
+            name: {"calls": 0, "valid": 0, "empty": 0, "errors": 0, "wins": 0, "total_ms": 0.0,
+                   "ewma_ms": None, "ewma_success": None}
+            for name in self.providers
+        }
+        self._requests = {"requests": 0, "answered": 0, "hedges": 0, "timeouts": 0, "total_ms": 0.0}
+
+    # --- ordering -------------------------------------------------------
+
+    def _rank(self, name: str) -> tuple:
+        stats = self._stats[name]
+        success = stats["ewma_success"]
+        return success < GEOCODE_MIN_SUCCESS, stats["ewma_ms"] / max(success, 0.01)
+
+    def order(self) -> List[str]:
+        """Providers in the order they are tried."""
+        names = list(self.providers)
+        with self._lock:
+            if not GEOCODE_ADAPTIVE or any(self._stats[n]["calls"] < GEOCODE_ADAPT_MIN_SAMPLES for n in names):
+                return names
+            return sorted(names, key=self._rank)
+
+    # --- calls ----------------------------------------------------------
+
+    def _call(self, name: str, lat: float, lon: float) -> Optional[dict]:
+        started = time.perf_counter()
+        outcome = "empty"
+        result = None
+        try:
+            result = self.providers[name](lat, lon)
+            if _valid(result):
+                outcome = "valid"
+        except Exception as e:
+            outcome = "errors"
+            print(f"[Geocoding] {name} failed: {e}")
+        self._record(name, outcome, (time.perf_counter() - started) * 1000)
+        return result if outcome == "valid" else None
+
+    def _record(self, name: str, outcome: str, elapsed_ms: float):
+        alpha = GEOCODE_EWMA_ALPHA
+        success = 1.0 if outcome == "valid" else 0.0
+        with self._lock:
+            stats = self._stats[name]
+            stats["calls"] += 1
+            stats[outcome] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["ewma_ms"] = elapsed_ms if stats["ewma_ms"] is None else (1 - alpha) * stats["ewma_ms"] + alpha * elapsed_ms
+            stats["ewma_success"] = (success if stats["ewma_success"] is None
+                                     else (1 - alpha) * stats["ewma_success"] + alpha * success)
+
+    def lookup(self, lat: float, lon: float, strategy: Optional[str] = None,
+               hedge_delay_ms: Optional[int] = None) -> Tuple[Optional[dict], Optional[str]]:
+        """(first valid result, provider name), or (None, None)."""
+        strategy = strategy or GEOCODE_STRATEGY
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown geocoding strategy: {strategy}")
+        delay = (GEOCODE_HEDGE_DELAY_MS if hedge_delay_ms is None else hedge_delay_ms) / 1000
+        started = time.perf_counter()
+        counters = {"hedges": 0, "timeouts": 0}
+
+        if strategy == "sequential":
+            result, winner = self._sequential(lat, lon)
+        else:
+            result, winner = self._staggered(lat, lon, 0 if strategy == "parallel" else delay, counters)
+        self._finish(winner, (time.perf_counter() - started) * 1000, counters)
+        return result, winner
+
+    def _sequential(self, lat: float, lon: float):
+        for name in self.order():
+            result = self._call(name, lat, lon)
+            if result is not None:
+                return result, name
+            print(f"[Geocoding] {name} had no answer, trying next provider")
+        return None, None
+
+    def _staggered(self, lat: float, lon: float, delay: float, counters: dict):
+        waiting = self.order()
+        running = {}
+        deadline = time.monotonic() + GEOCODE_TIMEOUT
+        next_start = time.monotonic()
+        while waiting or running:
+            now = time.monotonic()
+            # Start the next provider when its turn has come, or right away if nothing is running
+            while waiting and (now >= next_start or not running):
+                name = waiting.pop(0)
+                if running and delay:
+                    counters["hedges"] += 1
+                    print(f"[Geocoding] No answer within {delay * 1000:.0f} ms, hedging with {name}")
+                running[self._executor.submit(self._call, name, lat, lon)] = name
+                next_start = now + delay
+            if now >= deadline:
+                counters["timeouts"] += 1
+                print(f"[Geocoding] No provider answered within {GEOCODE_TIMEOUT:.0f}s")
+                return None, None
+
+            timeout = min(deadline, next_start) - now if waiting else deadline - now
+            done, _ = wait(running, timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result = future.result()
+                if result is not None:
+                    return result, name
+        return None, None
+
+    def _finish(self, winner: Optional[str], elapsed_ms: float, counters: dict):
+        with self._lock:
+            self._requests["requests"] += 1
+            self._requests["total_ms"] += elapsed_ms
+            self._requests["hedges"] += counters["hedges"]
+            self._requests["timeouts"] += counters["timeouts"]
+            if winner is not None:
+                self._requests["answered"] += 1
+                self._stats[winner]["wins"] += 1
+
+    def stats(self) -> dict:
+        order = self.order()
+        with self._lock:
+            requests = self._requests["requests"]
+            return {
+                "strategy": GEOCODE_STRATEGY,
+                "hedge_delay_ms": GEOCODE_HEDGE_DELAY_MS,
+                "order": order,
+                **{k: v for k, v in self._requests.items() if k != "total_ms"},
+                "avg_ms": round(self._requests["total_ms"] / requests, 1) if requests else None,
+                "providers": {
+                    name: {
+                        "calls": s["calls"],
+                        "valid": s["valid"],
+                        "empty": s["empty"],
+                        "errors": s["errors"],
+                        "wins": s["wins"],
+                        "success_rate": round(s["valid"] / s["calls"], 3) if s["calls"] else None,
+                        "avg_ms": round(s["total_ms"] / s["calls"], 1) if s["calls"] else None,
+                        "recent_ms": round(s["ewma_ms"], 1) if s["ewma_ms"] is not None else None,
+                        "recent_success": round(s["ewma_success"], 3) if s["ewma_success"] is not None else None,
+                    }
+                    for name, s in self._stats.items()
+                },
+            }
@@ -0,0 +1,97 @@
+# location-service/nearby.py
+#
+# Google Nearby Search, fetched once per request and cached per geocell: a
+# request whose coordinates fall in the same geohash cell
+# (NEARBY_CACHE_PRECISION, 7 ≈ 150 x 150 m) within NEARBY_CACHE_TTL seconds
+# reuses the earlier result instead of calling the API again. Failed lookups
+# are not cached; an empty area (ZERO_RESULTS) is. Requests share one
+# keep-alive HTTP session.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+import requests
+from common import geohash
+
+NEARBY_CACHE_TTL = float(os.getenv("NEARBY_CACHE_TTL", 600))              # seconds a cell's result is reused
+NEARBY_CACHE_PRECISION = int(os.getenv("NEARBY_CACHE_PRECISION", 7))      # geohash length of a cell
+NEARBY_CACHE_MAX_CELLS = int(os.getenv("NEARBY_CACHE_MAX_CELLS", 10000))  # LRU bound
+NEARBY_TIMEOUT = float(os.getenv("NEARBY_TIMEOUT", 10))                   # seconds per API call
+
+NEARBY_SEARCH_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+
+
+class NearbySearch:
+    def __init__(self, ttl: float = NEARBY_CACHE_TTL, precision: int = NEARBY_CACHE_PRECISION,
+                 max_cells: int = NEARBY_CACHE_MAX_CELLS):
+        self.ttl = ttl
+        self.precision = precision
+        self.max_cells = max_cells
+        self._session = requests.Session()
+        self._cells = OrderedDict()  # (geohash, radius) -> (fetched_at, places)
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "api_calls": 0, "api_errors": 0}
+
+    def _fetch(self, lat: float, lon: float, radius: int, api_key: str) -> Optional[List[dict]]:
+        with self._lock:
+            self._stats["api_calls"] += 1
+        data = None
+        try:
+            resp = self._session.get(NEARBY_SEARCH_URL, params={
+                "location": f"{lat},{lon}", "radius": radius, "key": api_key,
+            }, timeout=NEARBY_TIMEOUT)
+            if resp.status_code == 200:
+                data = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"⚠️ Nearby Search failed: {e}")
+        if data and data.get("status") == "ZERO_RESULTS":
+            return []  # nothing nearby is a cacheable answer too
+        if not data or data.get("status") != "OK":
+            with self._lock:
+                self._stats["api_errors"] += 1
+            return None
+
+        return [
+            {
+                "name": place.get("name", "Unnamed"),
+                "type": place["types"][0] if place.get("types") else "unknown",
+                "vicinity": place.get("vicinity", ""),
+            }
+            for place in data.get("results", [])
+        ]
+
+    def get(self, lat: float, lon: float, api_key: str, radius: int = 500) -> Optional[List[dict]]:
+        """[{"name", "type", "vicinity"}] around (lat, lon), or None when the API call fails."""
+        key = (geohash.encode(lat, lon, self.precision), radius)
+        now = time.time()
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry = self._cells.get(key)
+            if entry is not None and entry[0] + self.ttl > now:
+                self._cells.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+
+        places = self._fetch(lat, lon, radius, api_key)
+        if places is not None:
+            with self._lock:
+                self._cells[key] = (now, places)
+                self._cells.move_to_end(key)
+                while len(self._cells) > self.max_cells:
+                    self._cells.popitem(last=False)
+        return places
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            cells = len(self._cells)
+        return {
+            **stats,
+            "cells": cells,
+            "hit_rate": round(stats["hits"] / stats["lookups"], 3) if stats["lookups"] else None,
+        }
+
+
+nearby_search = NearbySearch()
@@ -0,0 +1,109 @@
+# location-service/poi.py
+#
+# Nearby-place classification, compiled once at import instead of matching
+# every keyword against every place type per request.
+#
+# The keyword mappings keep their original meaning (a keyword matches when it
+# is a substring of the place type, e.g. "school" matches "primary_school";
+# the first matching entry wins). Every known Google place type is resolved to
+# its activity flag / POI category up front; a type Google adds later is
+# resolved on first sight and remembered. Classifying a Nearby Search result is
+# then one dict lookup per place.
+#
+#   flags = activity_flags(places)     # {"Near_Park", "In_Gym", ...} set for this result
+#   poi = nearest_poi(places)          # {"nearby": True, "place": "gym", "name": ...}
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+# Activity flag -> keywords (first match wins, in this order)
+ACTIVITY_KEYWORDS = {
+    "Near_Park": ["park"],
+    "In_Gym": ["gym", "fitness_center"],
+    "At_School_Zone": ["school", "university"],
+    "In_Shopping_Mall": ["shopping_mall"],
+    "At_Religious_Place": ["church", "mosque", "temple", "synagogue"],
+    "Near_Hospital": ["hospital", "clinic"],
+    "At_Beach_or_Lake": ["beach"],
+    "At_Library": ["library"],
+    "At_Movie_Theatre": ["movie_theater"],
+}
+
+# POI category -> keywords (first match wins, in this order)
+POI_KEYWORDS = {
+    "gym": ["gym", "fitness_center"],
+    "park": ["park"],
+    "school": ["school", "university"],
+    "religious_place": ["church", "mosque", "temple", "synagogue"],
+    "hospital": ["hospital", "clinic"],
+    "beach": ["beach"],
+    "library": ["library"],
+    "home": ["home"],  # Note: "home" is harder to detect; may need user input or address parsing
+}
+
+# Google Places types (Nearby Search "types"), resolved at import
+GOOGLE_PLACE_TYPES = (
+    "accounting", "airport", "amusement_park", "aquarium", "art_gallery", "atm", "bakery", "bank", "bar",
+    "beauty_salon", "bicycle_store", "book_store", "bowling_alley", "bus_station", "cafe", "campground",
+    "car_dealer", "car_rental", "car_repair", "car_wash", "casino", "cemetery", "church", "city_hall",
+    "clothing_store", "convenience_store", "courthouse", "dentist", "department_store", "doctor", "drugstore",
+    "electrician", "electronics_store", "embassy", "fire_station", "florist", "funeral_home", "furniture_store",
+    "gas_station", "gym", "hair_care", "hardware_store", "hindu_temple", "home_goods_store", "hospital",
+    "insurance_agency", "jewelry_store", "laundry", "lawyer", "library", "light_rail_station", "liquor_store",
+    "local_government_office", "locksmith", "lodging", "meal_delivery", "meal_takeaway", "mosque", "movie_rental",
+    "movie_theater", "moving_company", "museum", "night_club", "painter", "park", "parking", "pet_store",
+    "pharmacy", "physiotherapist", "plumber", "police", "post_office", "primary_school", "real_estate_agency",
+    "restaurant", "roofing_contractor", "rv_park", "school", "secondary_school", "shoe_store", "shopping_mall",
+    "spa", "stadium", "storage", "store", "subway_station", "supermarket", "synagogue", "taxi_stand",
+    "tourist_attraction", "train_station", "transit_station", "travel_agency", "university", "veterinary_care",
+    "zoo", "establishment", "point_of_interest", "food", "health", "place_of_worship", "natural_feature",
+    "premise", "locality", "political", "route", "street_address", "sublocality", "neighborhood",
+)
+
+
+def _first_match(place_type: str, mapping: Dict[str, List[str]]) -> Optional[str]:
+    for name, keywords in mapping.items():
+        if any(keyword in place_type for keyword in keywords):
+            return name
+    return None
+
+
+class TypeTable:
+    """place type -> first matching name in `mapping` (or None), precomputed for known types."""
+
+    def __init__(self, mapping: Dict[str, List[str]], known_types: Iterable[str] = GOOGLE_PLACE_TYPES):
+        self.mapping = mapping
+        self._table = {t: _first_match(t, mapping) for t in known_types}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, place_type: str) -> Optional[str]:
+        try:
+            return self._table[place_type]
+        except KeyError:
+            match = _first_match(place_type, self.mapping)
+            with self._lock:
+                self._table[place_type] = match
+            return match
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+ACTIVITY_BY_TYPE = TypeTable(ACTIVITY_KEYWORDS)
+POI_BY_TYPE = TypeTable(POI_KEYWORDS)
+
+
+def activity_flags(places: Optional[List[dict]]) -> Set[str]:
+    """Activity flags any of the places sets."""
+    flags = {ACTIVITY_BY_TYPE[place.get("type", "")] for place in places or ()}
+    flags.discard(None)
+    return flags
+
+
+def nearest_poi(places: Optional[List[dict]]) -> dict:
+    """The first place (in Nearby Search order) that is a known POI category."""
+    for place in places or ():
+        category = POI_BY_TYPE[place["type"]]
+        if category is not None:
+            return {"nearby": True, "place": category, "name": place["name"]}
+    return {"nearby": False, "place": None}
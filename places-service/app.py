@@ -2,120 +2,82 @@ import sys
 import os
 import json
 import time
-from math import radians, cos, sin, asin, sqrt
+import asyncio
+import threading
+from concurrent.futures import CancelledError
 from fastapi import FastAPI, HTTPException, Query
 from typing import List, Optional
-import requests
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 from typing import List
 
 port = int(os.getenv("PORT", 8003))
 # Windows asyncio fix for Playwright subprocess support
 if sys.platform.startswith("win"):
-    import asyncio
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-from playwright.sync_api import sync_playwright
-
 load_dotenv()
 
+# Shared scraping helpers (browser pool, ...) live in ../common
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.browser_pool import get_browser_pool
+from common.background_loop import get_loop, run_sync
+from common.render_profiles import get_profile_stats
+from common.scrape_jobs import render_page_sync, extract_page, extract_page_sync, get_job_stats
+from common.geocoder import reverse_geocode_sync, get_geocoder
+from common.snapshot_store import rendered, get_snapshot_store
+from common.html_extract import Layout, Field, has_class, parse_html
+from common.listing_fingerprint import ListingMemo
+from places_store import places_store
+from ranking import rank_places
+from google_places import get_places_client
+from source_strategy import source_strategy, PLACES_SOURCE_STRATEGY
+
 app = FastAPI()
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 if not GOOGLE_API_KEY:
     raise RuntimeError("Missing GOOGLE_API_KEY in environment variables")
 
+# Place detail enrichment (scrape path)
+PLACE_DETAIL_CONCURRENCY = int(os.getenv("PLACE_DETAIL_CONCURRENCY", 4))   # detail pages open at once per request
+PLACE_DETAIL_TIMEOUT = float(os.getenv("PLACE_DETAIL_TIMEOUT", 20))        # seconds per place before falling back to card data
+PLACE_ENRICH_MODE = os.getenv("PLACE_ENRICH_MODE", "sync")                 # sync | async | none
+PLACES_TOP_K = int(os.getenv("PLACES_TOP_K", 20))                          # places returned per request (0 = all)
 
-def haversine(lat1, lon1, lat2, lon2):
-    """Calculate distance between two lat/lon points in km"""
-    R = 6371  # Earth radius in km
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat/2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2) ** 2
-    c = 2 * asin(sqrt(a))
-    return R * c
+# Detail fields remembered per search card, so unchanged listings skip detail renders
+place_listing_memo = ListingMemo(
+    "places",
+    key_fields=("link", "name", "category", "address"),
+    detail_fields=("name", "category", "location_address"),
+)
 
 
 def reverse_geocode_nominatim(lat: float, lon: float) -> Optional[dict]:
-    url = f"https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={lon}&format=json"
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(url, wait_until="networkidle", timeout=15000)
-            time.sleep(1)
-            content = page.text_content("body")
-            browser.close()
-        data = json.loads(content)
-        return {
-            "display_name": data.get("display_name"),
-            "address": data.get("address", {})
-        }
-    except Exception as e:
-        print(f"[Nominatim error] {e}")
-        return None
+    # Plain HTTP with a persistent coordinate cache; no browser needed
+    return reverse_geocode_sync(lat, lon)
 
 
-def get_google_maps_search_page(lat: float, lon: float, query: str) -> str:
-    from playwright.sync_api import sync_playwright
-    import time
+MAPS_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari"
 
+def maps_search_url(lat: float, lon: float, query: str) -> str:
     search_term = query.replace(" ", "+")
-    url = f"https://www.google.com/maps/search/{search_term}/@{lat},{lon}z"
+    return f"https://www.google.com/maps/search/{search_term}/@{lat},{lon}z"
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari"
-        )
-        print(f"🌐 Navigating to {url}")
-        page.goto(url, wait_until="domcontentloaded", timeout=60000)
-
-        # Wait explicitly for place cards container to appear (adjust selector as needed)
-        print("Waiting for place cards to load...")
-        page.wait_for_selector('div.Nv2PK', timeout=30000)  # Wait up to 30 seconds
-
-        # Extra delay to allow all JS and lazy loading to finish
-        time.sleep(5)
-
-        # Scroll down to load more results dynamically
-        print("Scrolling to load more results...")
-        max_scrolls = 10
-        for _ in range(max_scrolls):
-            prev_count = len(page.query_selector_all("div.Nv2PK"))
-            page.mouse.wheel(0, 5000)
-            time.sleep(1.5)
-            curr_count = len(page.query_selector_all("div.Nv2PK"))
-            if curr_count == prev_count:
-                break  # no new cards loaded
-
-        # Drag map to trigger more pins (optional)
-        print("Dragging map to trigger more nearby pins...")
-        page.mouse.move(300, 300)
-        page.mouse.down()
-        page.mouse.move(250, 250)
-        page.mouse.up()
-        time.sleep(3)
-
-        # Click "Search this area" button if visible
-        try:
-            if page.is_visible('button[jsaction*="search"]'):
-                print("Clicking 'Search this area' button...")
-                page.click('button[jsaction*="search"]')
-                time.sleep(4)
-        except Exception:
-            print("⚠️ Could not click 'Search this area' — skipping.")
-
-        # Final scroll for any late loading entries
-        for _ in range(3):
-            page.mouse.wheel(0, 3000)
-            time.sleep(1.5)
-
-        html = page.content()
-        print("Finished loading all available places.")
-        browser.close()
-        return html
+def get_google_maps_search_page(lat: float, lon: float, query: str, wait_strategy: Optional[str] = None,
+                                profile_enabled: Optional[bool] = None, cancel: Optional[threading.Event] = None) -> str:
+    """Rendered search page HTML (benchmarks / fixtures; the scrape path uses search_google_maps)."""
+    url = maps_search_url(lat, lon, query)
+
+    # Benchmarks / parity checks force a strategy or profile and must really render
+    # (wait strategies live in common/renderers.py)
+    forced = wait_strategy is not None or profile_enabled is not None
+    html = rendered(url, "maps_search", lambda: render_page_sync(
+        url, "maps_search", wait_strategy, profile_enabled,
+        cancel=cancel,
+        user_agent=MAPS_USER_AGENT
+    ), reuse_seconds=0 if forced else None)
+    print("Finished loading all available places.")
+    return html
 
 
 
@@ -147,74 +109,126 @@ def parse_single_place_details(html: str) -> dict:
         "category": ""
     }
 
-def extract_places_from_google_maps(html: str) -> list:
-    soup = BeautifulSoup(html, "lxml")
-    places_raw = soup.find_all("div", class_="Nv2PK")
-
+# Compiled once; see common/html_extract.py
+MAPS_SEARCH_LAYOUT = Layout(
+    cards=f"//div[{has_class('Nv2PK')}]",
+    fields={
+        "name": Field(f".//div[{has_class('qBF1Pd', 'fontHeadlineSmall')}]"),
+        "link": Field(f".//a[{has_class('hfpxzc')}]", attr="href"),
+        "category": Field(f".//button[{has_class('DkEaL')}]"),
+        "address": Field(f".//div[{has_class('W4Efsd')}]//span[count(preceding-sibling::span) = 2]"),
+    },
+)
+
+MAPS_PLACE_LAYOUT = Layout(fields={
+    "name": Field(f"//h1[{has_class('DUwDvf', 'lfPIob')}]"),
+    "category": Field(f"//button[{has_class('DkEaL')}]"),
+    "address": Field(f"//div[{has_class('Io6YTe', 'fontBodyMedium')}]"),
+})
+
+MAPS_SEARCH_LIMIT = 10  # top cards kept from a search page
+
+def _or_na(value: Optional[str]) -> str:
+    return "N/A" if value is None else value
+
+def shape_maps_cards(cards: List[dict]) -> list:
+    """MAPS_SEARCH_LAYOUT rows -> [{"name", "category", "address", "link"}]."""
     extracted = []
-    for place in places_raw[:10]:  # Limit to top 5
-        try:
-            name = place.select_one("div.qBF1Pd.fontHeadlineSmall").get_text(strip=True)
-        except: name = "N/A"
-
-        try:
-            link = place.select_one("a.hfpxzc")["href"]
-        except: link = "N/A"
-
-        try:
-            category = place.select_one("button.DkEaL").get_text(strip=True)
-        except: category = "N/A"
-
-        try:
-            address = place.select_one("div.W4Efsd span:nth-of-type(3)").get_text(strip=True)
-        except: address = "N/A"
-
+    for card in cards:
+        link = _or_na(card["link"])
         extracted.append({
-            "name": name,
-            "category": category,
-            "address": address,
+            "name": _or_na(card["name"]),
+            "category": _or_na(card["category"]),
+            "address": _or_na(card["address"]),
             "link": f"https://www.google.com{link}" if link.startswith("/") else link
         })
-
     return extracted
 
+def extract_places_from_google_maps(html: str) -> list:
+    return shape_maps_cards(MAPS_SEARCH_LAYOUT.extract(parse_html(html), limit=MAPS_SEARCH_LIMIT))
+
+def search_google_maps(lat: float, lon: float, query: str, cancel: Optional[threading.Event] = None) -> list:
+    """Search result cards; on the scrape farm the worker extracts them and only the rows come back."""
+    cards = extract_page_sync(maps_search_url(lat, lon, query), "maps_search", MAPS_SEARCH_LAYOUT,
+                              limit=MAPS_SEARCH_LIMIT, cancel=cancel, user_agent=MAPS_USER_AGENT)
+    return shape_maps_cards(cards)
+
+def shape_place_details(details: dict) -> dict:
+    return {key: _or_na(details.get(key)) for key in ("name", "category", "address")}
+
 def parse_single_place_details(html: str) -> dict:
-    from bs4 import BeautifulSoup
-    soup = BeautifulSoup(html, "lxml")
+    return shape_place_details(MAPS_PLACE_LAYOUT.apply(parse_html(html)))
 
-    def safe_text(sel): return sel.get_text(strip=True) if sel else "N/A"
+def get_single_place_html(url: str, profile_enabled: Optional[bool] = None) -> str:
+    # print(f"🌐 Visiting: {url}")
+    return rendered(url, "maps_place", lambda: render_page_sync(
+        url, "maps_place", profile_enabled=profile_enabled
+    ), reuse_seconds=0 if profile_enabled is not None else None)
 
-    name = safe_text(soup.select_one("h1.DUwDvf.lfPIob"))
-    category = safe_text(soup.select_one("button.DkEaL"))
-    address = safe_text(soup.select_one("div.Io6YTe.fontBodyMedium"))
+def card_level_place(place: dict) -> dict:
+    """Card data from the search page, shaped like an enriched place."""
+    return {**place, "location_address": place.get("address")}
 
-    return {
-        "name": name,
-        "category": category,
-        "address": address
-    }
+async def enrich_place_details(places: List[dict], listing_key: Optional[str] = None) -> List[dict]:
+    """
+    Visits place detail pages concurrently (at most PLACE_DETAIL_CONCURRENCY at
+    a time). A place whose detail page fails or exceeds PLACE_DETAIL_TIMEOUT
+    keeps its card-level data instead of failing the whole request.
+
+    With a listing_key, cards enriched before (same link, name, category and
+    address) reuse their remembered details and only new or changed cards are
+    visited.
+    """
+    semaphore = asyncio.Semaphore(PLACE_DETAIL_CONCURRENCY)
+    done, todo = place_listing_memo.plan(listing_key, places) if listing_key else ({}, list(range(len(places))))
+    if listing_key and not todo:
+        print(f"[Places scrape] Listing unchanged, reusing details for all {len(places)} places")
+
+    async def enrich(place: dict):
+        async with semaphore:
+            try:
+                details = shape_place_details(await asyncio.wait_for(
+                    extract_page(place["link"], "maps_place", MAPS_PLACE_LAYOUT),
+                    PLACE_DETAIL_TIMEOUT
+                ))
+            except asyncio.TimeoutError:
+                print(f"[Places scrape] Detail page timed out, keeping card data: {place.get('name')}")
+                return None
+            except Exception as e:
+                print(f"[Places scrape] Detail page failed ({e}), keeping card data: {place.get('name')}")
+                return None
+
+        card = card_level_place(place)
+        return {
+            **card,
+            "name": details["name"] if details.get("name") not in (None, "", "N/A") else card.get("name"),
+            "category": details["category"] if details.get("category") not in (None, "", "N/A") else card.get("category"),
+            "location_address": details["address"] if details.get("address") not in (None, "", "N/A") else card.get("location_address"),
+        }
+
+    fetched = await asyncio.gather(*(enrich(places[i]) for i in todo))
+    enriched = {i: place for i, place in zip(todo, fetched) if place is not None}
+    if listing_key:
+        # Only successful detail renders are remembered; failures are retried next time
+        place_listing_memo.remember(listing_key, places, enriched)
+    return [done.get(i) or enriched.get(i) or card_level_place(place) for i, place in enumerate(places)]
+
+async def _enrich_in_background(lat: float, lon: float, query: str, places: List[dict], listing_key: str):
+    # The enriched list replaces the card-level result in the places store
+    try:
+        enriched = await enrich_place_details(places, listing_key)
+        places_store.add(lat, lon, query, enriched, "scrape")
+        print(f"[Places scrape] Background enrichment finished for '{query}' at {lat},{lon}")
+    except Exception as e:
+        print(f"[Places scrape] Background enrichment failed for '{query}' at {lat},{lon}: {e}")
 
-def get_single_place_html(url: str) -> str:
-    from playwright.sync_api import sync_playwright
-    import time
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        # print(f"🌐 Visiting: {url}")
-        page.goto(url, timeout=60000)
-        time.sleep(5)  # Let all content render
-        html = page.content()
-        browser.close()
-        return html
-
-def attach_distance_to_places(places, ref_lat, ref_lon):
-    enriched = []
+def attach_coords_to_places(places):
+    # Distances and order are computed once, by rank_places in places_api
+    with_coords = []
     for place in places:
         lat, lon = extract_lat_lon_from_place_url(place["link"])
-        distance = haversine_distance(ref_lat, ref_lon, lat, lon) if lat and lon else float('inf')
-        enriched.append({**place, "lat": lat, "lon": lon, "distance_km": round(distance, 5)})
-    return sorted(enriched, key=lambda x: x["distance_km"])
+        with_coords.append({**place, "lat": lat, "lon": lon})
+    return with_coords
 
 def extract_lat_lon_from_place_url(url: str):
     import re
@@ -230,20 +244,26 @@ def extract_lat_lon_from_place_url(url: str):
 
     return None, None
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    import math
-    R = 6371
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = (math.sin(dlat / 2) ** 2 +
-         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
-         math.sin(dlon / 2) ** 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+def _check_cancelled(cancel: Optional[threading.Event], stage: str):
+    if cancel is not None and cancel.is_set():
+        print(f"[Places scrape] Cancelled {stage}")
+        raise CancelledError()
 
-
-def get_places_from_scrape(lat: float, lon: float, query: str) -> List[dict]:
+def get_places_from_scrape(lat: float, lon: float, query: str, enrich_mode: Optional[str] = None,
+                           cancel: Optional[threading.Event] = None) -> List[dict]:
+    """
+    enrich_mode (default PLACE_ENRICH_MODE):
+      sync  - visit detail pages concurrently before returning
+      async - return card-level results now, enrich in the background; later
+              requests for the same area/query get the enriched list from the places store
+      none  - card-level results only
+
+    Setting `cancel` (the scrape lost a race) aborts at the next stage and
+    raises CancelledError.
+    """
+    enrich_mode = enrich_mode or PLACE_ENRICH_MODE
     nominatim_data = reverse_geocode_nominatim(lat, lon)
+    _check_cancelled(cancel, "before rendering the search page")
     if not nominatim_data or not nominatim_data.get("display_name"):
         print("[Places scrape] Nominatim data not found, abort scraping.")
         return []
@@ -252,92 +272,102 @@ def get_places_from_scrape(lat: float, lon: float, query: str) -> List[dict]:
     search_query = f"{query} in {location_name}"
     print(f"[Places scrape] Searching Google Maps for: {search_query}")
 
-    html = get_google_maps_search_page(lat, lon, search_query)
-    if not html:
-        print("[Places scrape] Google Maps page HTML not retrieved.")
-        return []
-
-    # Use the real extractor from extractor.py
-    places_raw = extract_places_from_google_maps(html)
+    places_raw = search_google_maps(lat, lon, search_query, cancel=cancel)
     if not places_raw:
-        print("[Places scrape] No places extracted from HTML.")
+        print("[Places scrape] No places extracted from the Google Maps search page.")
         return []
 
-    # Enrich place list with lat/lon and distance using your helper
-    enriched_places = attach_distance_to_places(places_raw, lat, lon)
+    # Enrich place list with lat/lon parsed from the place links
+    enriched_places = attach_coords_to_places(places_raw)
 
     # Optionally get more details for each place
-    for place in enriched_places:
-        single_html = get_single_place_html(place["link"])
-        details = parse_single_place_details(single_html)
-        place.update({
-            "name": details.get("name", place.get("name")),
-            "category": details.get("category", place.get("category")),
-            "location_address": details.get("address", place.get("address")),
-        })
+    _check_cancelled(cancel, "before enrichment")
+    if enrich_mode == "none":
+        return [card_level_place(place) for place in enriched_places]
+    if enrich_mode == "async":
+        asyncio.run_coroutine_threadsafe(_enrich_in_background(lat, lon, query, enriched_places, search_query), get_loop())
+        return [card_level_place(place) for place in enriched_places]
+    return run_sync(enrich_place_details(enriched_places, search_query), cancel=cancel)
 
-    return enriched_places
 
 
-
-def get_places_from_google_api(lat: float, lon: float, query: str, api_key: str) -> List[dict]:
+def get_places_from_google_api(lat: float, lon: float, query: str, api_key: str,
+                               cancel: Optional[threading.Event] = None) -> List[dict]:
     """
-    Fallback: Get places from Google Places API.
-    Normalizes the response to our schema.
+    Get places from the Google Places API (pooled async client, paginated,
+    radius widened when results are sparse). Normalizes the response to our schema.
     """
-    radius = 500  # meters
-    place_type = query.lower()  # crude mapping, ideally map queries to type
-    url = (
-        f"https://maps.googleapis.com/maps/api/place/nearbysearch/json?"
-        f"location={lat},{lon}&radius={radius}&type={place_type}&keyword={query}&key={api_key}"
-    )
     try:
-        resp = requests.get(url)
-        resp.raise_for_status()
-        data = resp.json()
-        results = data.get("results", [])
-        places = []
-        for place in results:
-            name = place.get("name", "")
-            address = place.get("vicinity", "")
-            location = place.get("geometry", {}).get("location", {})
-            place_lat = location.get("lat")
-            place_lon = location.get("lng")
-            place_id = place.get("place_id", "")
-            category = place.get("types", [])
-            distance_km = haversine(lat, lon, place_lat, place_lon) if place_lat and place_lon else None
-            place_link = f"https://www.google.com/maps/place/?q=place_id:{place_id}"
-
-            places.append({
-                "name": name,
-                "location_address": address,
-                "distance_km": distance_km,
-                "category": ", ".join(category),
-                "place_link": place_link
-            })
-        return places
+        results = get_places_client().nearby_sync(lat, lon, query, api_key, cancel=cancel)
+    except CancelledError:
+        raise
     except Exception as e:
         print(f"[Google Places API error] {e}")
         return []
 
+    places = [
+        {
+            "name": place["name"],
+            "location_address": place["vicinity"],
+            "distance_km": None,  # filled in by rank_places in places_api
+            "category": ", ".join(place["types"]),
+            "place_link": f"https://www.google.com/maps/place/?q=place_id:{place['place_id']}",
+            "lat": place["lat"],
+            "lon": place["lon"],
+        }
+        for place in results
+    ]
+    return places
+
 
 @app.get("/places")
 def places_api(lat: float = Query(..., description="Latitude"),
                lon: float = Query(..., description="Longitude"),
-               query: str = Query(..., description="Place query, e.g. 'park'")):
+               query: str = Query(..., description="Place query, e.g. 'park'"),
+               enrich: Optional[str] = Query(None, description="Scrape detail enrichment: sync, async or none"),
+               strategy: Optional[str] = Query(None, description="Source strategy: sequential, race or hedge")):
 
     print(f"🔥Control at places")
-    print(f"[API] Request for Google places API: lat={lat}, lon={lon}, query='{query}'")
-    places = get_places_from_google_api(lat, lon, query, GOOGLE_API_KEY)
+    places = places_store.lookup(lat, lon, query)
+    if places:
+        print(f"[API] Serving stored places for '{query}' near {lat},{lon}")
+        return rank_places(places, lat, lon, k=PLACES_TOP_K or None)
 
-    if not places:
-        print("[API] Falling back to Nominatim scraping Places API")
-        places = get_places_from_scrape(lat, lon, query)
+    print(f"[API] Request for places: lat={lat}, lon={lon}, query='{query}', strategy={strategy or PLACES_SOURCE_STRATEGY}")
+    try:
+        places, source = source_strategy.fetch(
+            ("api", lambda cancel: get_places_from_google_api(lat, lon, query, GOOGLE_API_KEY, cancel=cancel)),
+            ("scrape", lambda cancel: get_places_from_scrape(lat, lon, query, enrich, cancel=cancel)),
+            strategy,
+            # A losing source that still finished is merged into the stored result
+            on_late_result=lambda name, late: places_store.add(lat, lon, query, late, name),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if source:
+        print(f"[API] Places served by {source}")
 
     if not places:
         raise HTTPException(status_code=404, detail="No places found")
 
-    # Sort by distance ascending if distance available
-    places = sorted(places, key=lambda x: x.get("distance_km") or float("inf"))
+    # Stored deduped, merged with a fresh result from the other source if there is one
+    places = places_store.add(lat, lon, query, places, source)
 
-    return places
+    # The only ranking pass: distances for the whole list at once, then keep
+    # the PLACES_TOP_K nearest (partial sort)
+    return rank_places(places, lat, lon, k=PLACES_TOP_K or None)
+
+
+@app.get("/places/stats")
+def places_stats():
+    return {
+        "render_profiles": get_profile_stats(),
+        "browser_pool": get_browser_pool().stats(),
+        "scrape_jobs": get_job_stats(),
+        "geocoder": get_geocoder().stats(),
+        "places_store": places_store.stats(),
+        "source_strategy": source_strategy.stats(),
+        "google_places": get_places_client().stats(),
+        "listing_memo": place_listing_memo.stats(),
+        "snapshots": get_snapshot_store().stats() if get_snapshot_store() else None,
+    }
@@ -0,0 +1,125 @@
+# places-service/bench_extract.py
+#
+# Parsing benchmark and parity check for the Maps extractors over saved HTML
+# fixtures: the legacy BeautifulSoup implementations (copied below) versus the
+# compiled-XPath ones in app.py. Fixtures are files in --fixtures named
+# maps_search*.html (search result pages) and maps_place*.html (place pages).
+#
+#   python bench_extract.py --capture 40.7128 -74.0060 park     # save fixtures from a live render
+#   python bench_extract.py --from-snapshots                    # export fixtures from the snapshot store
+#   python bench_extract.py --runs 20
+#
+# Trimmed fixtures are committed in fixtures/ next to this script. Exits non-zero
+# when any fixture extracts differently, or when there is no fixture to compare.
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from bs4 import BeautifulSoup
+from app import extract_places_from_google_maps, parse_single_place_details
+
+
+def legacy_extract_places(html: str) -> list:
+    soup = BeautifulSoup(html, "lxml")
+    extracted = []
+    for place in soup.find_all("div", class_="Nv2PK")[:10]:
+        try:
+            name = place.select_one("div.qBF1Pd.fontHeadlineSmall").get_text(strip=True)
+        except: name = "N/A"
+        try:
+            link = place.select_one("a.hfpxzc")["href"]
+        except: link = "N/A"
+        try:
+            category = place.select_one("button.DkEaL").get_text(strip=True)
+        except: category = "N/A"
+        try:
+            address = place.select_one("div.W4Efsd span:nth-of-type(3)").get_text(strip=True)
+        except: address = "N/A"
+        extracted.append({
+            "name": name, "category": category, "address": address,
+            "link": f"https://www.google.com{link}" if link.startswith("/") else link
+        })
+    return extracted
+
+
+def legacy_parse_place(html: str) -> dict:
+    soup = BeautifulSoup(html, "lxml")
+
+    def safe_text(sel): return sel.get_text(strip=True) if sel else "N/A"
+
+    return {
+        "name": safe_text(soup.select_one("h1.DUwDvf.lfPIob")),
+        "category": safe_text(soup.select_one("button.DkEaL")),
+        "address": safe_text(soup.select_one("div.Io6YTe.fontBodyMedium")),
+    }
+
+
+EXTRACTORS = {
+    "maps_search": (legacy_extract_places, extract_places_from_google_maps),
+    "maps_place": (legacy_parse_place, parse_single_place_details),
+}
+
+
+def capture(directory: str, lat: float, lon: float, query: str, details: int = 3):
+    from app import get_google_maps_search_page, get_single_place_html
+    os.makedirs(directory, exist_ok=True)
+    slug = query.replace(" ", "_")
+    html = get_google_maps_search_page(lat, lon, query)
+    with open(os.path.join(directory, f"maps_search_{slug}.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+    for i, place in enumerate(extract_places_from_google_maps(html)[:details]):
+        with open(os.path.join(directory, f"maps_place_{slug}_{i}.html"), "w", encoding="utf-8") as f:
+            f.write(get_single_place_html(place["link"]))
+    print(f"Saved fixtures for '{query}' to {directory}")
+
+
+def timed(fn, html: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(html)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BeautifulSoup vs compiled XPath extraction for Maps pages")
+    parser.add_argument("--fixtures", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures"))
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--capture", nargs=3, metavar=("LAT", "LON", "QUERY"))
+    parser.add_argument("--from-snapshots", action="store_true", help="export fixtures from the snapshot store first")
+    args = parser.parse_args()
+
+    if args.from_snapshots:
+        from common.snapshot_store import SnapshotStore
+        count = SnapshotStore().export_fixtures(args.fixtures, ["maps_search", "maps_place"])
+        print(f"Exported {count} snapshots to {args.fixtures}")
+    if args.capture:
+        capture(args.fixtures, float(args.capture[0]), float(args.capture[1]), args.capture[2])
+
+    files = sorted(f for f in os.listdir(args.fixtures) if f.endswith(".html")) if os.path.isdir(args.fixtures) else []
+    mismatches = compared = 0
+    print(f"{'fixture':<40} {'KB':>7} {'bs4 ms':>8} {'xpath ms':>9} {'speedup':>8}  parity")
+    for name in files:
+        kind = next((k for k in EXTRACTORS if name.startswith(k)), None)
+        if kind is None:
+            continue
+        with open(os.path.join(args.fixtures, name), encoding="utf-8") as f:
+            html = f.read()
+        legacy, fast = EXTRACTORS[kind]
+        same = legacy(html) == fast(html)
+        compared += 1
+        mismatches += not same
+        legacy_ms, fast_ms = timed(legacy, html, args.runs), timed(fast, html, args.runs)
+        print(f"{name:<40} {len(html) / 1024:>7.0f} {legacy_ms:>8.1f} {fast_ms:>9.1f} "
+              f"{legacy_ms / fast_ms:>7.1f}x  {'✅' if same else '❌'}")
+
+    if not compared:
+        print(f"No fixtures in {args.fixtures}; use --capture LAT LON QUERY or --from-snapshots first")
+    sys.exit(1 if mismatches or not compared else 0)
+
+
+if __name__ == "__main__":
+    main()
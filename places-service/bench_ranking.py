@@ -0,0 +1,87 @@
+# places-service/bench_ranking.py
+#
+# Ranking cost on large synthetic candidate sets: the legacy per-place Python
+# haversine + full sort (done twice, as attach_distance_to_places and
+# places_api used to) versus ranking.rank_places (one NumPy pass, partial
+# top-k). The legacy path never deduplicated, so dedupe_places (which runs
+# when places_store stores a result, not per request) is timed on its own.
+#
+#   python bench_ranking.py --sizes 1000 10000 100000 --k 20 --dup-rate 0.1
+
+import argparse
+import math
+import random
+import statistics
+import time
+from ranking import dedupe_places, rank_places
+
+
+def legacy_haversine(lat1, lon1, lat2, lon2):
+    R = 6371
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
+         math.sin(dlon / 2) ** 2)
+    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def legacy_rank(places, ref_lat, ref_lon, k):
+    enriched = []
+    for place in places:
+        distance = legacy_haversine(ref_lat, ref_lon, place["lat"], place["lon"])
+        enriched.append({**place, "distance_km": round(distance, 5)})
+    enriched = sorted(enriched, key=lambda x: x["distance_km"])
+    return sorted(enriched, key=lambda x: x.get("distance_km") or float("inf"))[:k]
+
+
+def make_places(n: int, ref_lat: float, ref_lon: float, dup_rate: float, seed: int = 7):
+    rng = random.Random(seed)
+    places = []
+    for i in range(n):
+        if places and rng.random() < dup_rate:
+            # Same place seen through the other source: new link, a few metres off
+            original = rng.choice(places)
+            places.append({**original, "link": f"https://www.google.com/maps/place/dup{i}",
+                           "lat": original["lat"] + rng.uniform(-2e-4, 2e-4),
+                           "lon": original["lon"] + rng.uniform(-2e-4, 2e-4)})
+            continue
+        places.append({
+            "name": f"Place {i}",
+            "link": f"https://www.google.com/maps/place/?q=place_id:P{i}",
+            "lat": ref_lat + rng.uniform(-0.2, 0.2),
+            "lon": ref_lon + rng.uniform(-0.2, 0.2),
+        })
+    return places
+
+
+def timed(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Legacy Python ranking vs vectorized rank_places")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--dup-rate", type=float, default=0.1)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    ref_lat, ref_lon = 40.7128, -74.0060
+    print(f"{'candidates':>10} {'legacy ms':>10} {'vector ms':>10} {'speedup':>8} {'dedupe ms':>10} {'merged':>8}")
+    for n in args.sizes:
+        places = make_places(n, ref_lat, ref_lon, args.dup_rate)
+        legacy_ms = timed(lambda: legacy_rank(places, ref_lat, ref_lon, args.k), args.runs)
+        vector_ms = timed(lambda: rank_places(places, ref_lat, ref_lon, k=args.k), args.runs)
+        dedupe_ms = timed(lambda: dedupe_places(places), args.runs)
+        merged = n - len(dedupe_places(places))
+        print(f"{n:>10} {legacy_ms:>10.1f} {vector_ms:>10.1f} {legacy_ms / vector_ms:>7.1f}x {dedupe_ms:>10.1f} {merged:>8}")
+
+
+if __name__ == "__main__":
+    main()
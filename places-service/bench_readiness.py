@@ -0,0 +1,42 @@
+# places-service/bench_readiness.py
+#
+# Wall-clock time per Google Maps search query with the legacy fixed sleeps
+# ("fixed") versus the event-driven readiness engine ("readiness"), plus the
+# number of place cards each one ended up with.
+#
+#   python bench_readiness.py --lat 40.7128 --lon -74.0060 --query park --query cafe --runs 2
+
+import argparse
+import statistics
+import time
+from bs4 import BeautifulSoup
+from app import get_google_maps_search_page
+
+
+def render(lat: float, lon: float, query: str, strategy: str):
+    started = time.perf_counter()
+    html = get_google_maps_search_page(lat, lon, query, wait_strategy=strategy)
+    elapsed = time.perf_counter() - started
+    cards = len(BeautifulSoup(html, "lxml").find_all("div", class_="Nv2PK"))
+    return elapsed, cards
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixed sleeps vs readiness engine for the Maps search page")
+    parser.add_argument("--lat", type=float, required=True)
+    parser.add_argument("--lon", type=float, required=True)
+    parser.add_argument("--query", action="append", required=True)
+    parser.add_argument("--runs", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'query':<20} {'strategy':<10} {'median s':>9} {'cards':>6}")
+    for query in args.query:
+        for strategy in ("fixed", "readiness"):
+            samples = [render(args.lat, args.lon, query, strategy) for _ in range(args.runs)]
+            median = statistics.median(elapsed for elapsed, _ in samples)
+            cards = samples[-1][1]
+            print(f"{query:<20} {strategy:<10} {median:>9.2f} {cards:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# places-service/google_places.py
+#
+# Async Google Places (Nearby Search) client shared by the whole process: one
+# httpx.AsyncClient with keep-alive pooling on the common background loop.
+#
+#   - follows next_page_token up to GOOGLE_PLACES_MAX_PAGES pages (20 results each)
+#   - when a search comes back with fewer than GOOGLE_PLACES_MIN_RESULTS, the
+#     radius is doubled (up to GOOGLE_PLACES_MAX_RADIUS); the wider search runs
+#     concurrently with following the narrower search's next page
+#   - only the fields we use are read from each result
+#   - a radius step that fails is logged; what the other steps (and its own
+#     earlier pages) found is still returned, and only a search that found
+#     nothing raises
+#
+# Page tokens are chained (page n+1 needs page n's token, which only becomes
+# valid ~2 s after it is issued), so pages of one search are sequential;
+# concurrency comes from running the radius steps side by side.
+#
+#   places = await get_places_client().nearby(lat, lon, query, api_key)
+#   places = get_places_client().nearby_sync(lat, lon, query, api_key)
+#
+# Both return [{"place_id", "name", "vicinity", "lat", "lon", "types"}, ...].
+
+import asyncio
+import os
+import threading
+import time
+from typing import List, Optional
+from common.background_loop import run_async, run_sync
+
+GOOGLE_PLACES_URL = os.getenv("GOOGLE_PLACES_URL", "https://maps.googleapis.com/maps/api/place/nearbysearch/json")
+GOOGLE_PLACES_RADIUS = int(os.getenv("GOOGLE_PLACES_RADIUS", 500))             # first search radius (m)
+GOOGLE_PLACES_MAX_RADIUS = int(os.getenv("GOOGLE_PLACES_MAX_RADIUS", 4000))    # widest search radius (m)
+GOOGLE_PLACES_MIN_RESULTS = int(os.getenv("GOOGLE_PLACES_MIN_RESULTS", 10))    # widen the radius below this
+GOOGLE_PLACES_MAX_PAGES = int(os.getenv("GOOGLE_PLACES_MAX_PAGES", 3))         # pages followed per search
+GOOGLE_PLACES_TIMEOUT = float(os.getenv("GOOGLE_PLACES_TIMEOUT", 10))
+GOOGLE_PLACES_MAX_CONNECTIONS = int(os.getenv("GOOGLE_PLACES_MAX_CONNECTIONS", 20))
+
+NEXT_PAGE_DELAY = 2.0      # a fresh next_page_token is rejected for about this long
+NEXT_PAGE_RETRIES = 3
+
+
+class GooglePlacesError(Exception):
+    pass
+
+
+def _trim(result: dict) -> dict:
+    location = result.get("geometry", {}).get("location", {})
+    return {
+        "place_id": result.get("place_id", ""),
+        "name": result.get("name", ""),
+        "vicinity": result.get("vicinity", ""),
+        "lat": location.get("lat"),
+        "lon": location.get("lng"),
+        "types": result.get("types", []),
+    }
+
+
+class GooglePlacesClient:
+    def __init__(self):
+        self._client = None
+        self._stats = {"searches": 0, "requests": 0, "pages": 0, "expansions": 0, "errors": 0,
+                       "failed_steps": 0, "results": 0, "request_ms": 0.0}
+
+    def _http(self):
+        import httpx
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=GOOGLE_PLACES_TIMEOUT,
+                limits=httpx.Limits(max_connections=GOOGLE_PLACES_MAX_CONNECTIONS,
+                                    max_keepalive_connections=GOOGLE_PLACES_MAX_CONNECTIONS),
+            )
+        return self._client
+
+    async def _get(self, params: dict) -> dict:
+        started = time.perf_counter()
+        try:
+            resp = await self._http().get(GOOGLE_PLACES_URL, params=params)
+            resp.raise_for_status()
+            return resp.json()
+        finally:
+            self._stats["requests"] += 1
+            self._stats["request_ms"] += (time.perf_counter() - started) * 1000
+
+    async def _page(self, params: dict):
+        """(results, next_page_token) for one page; token pages retry while not yet valid."""
+        for attempt in range(NEXT_PAGE_RETRIES if "pagetoken" in params else 1):
+            if attempt:
+                await asyncio.sleep(NEXT_PAGE_DELAY / 2)
+            data = await self._get(params)
+            status = data.get("status")
+            if status == "OK":
+                self._stats["pages"] += 1
+                return [_trim(r) for r in data.get("results", ())], data.get("next_page_token")
+            if status == "ZERO_RESULTS":
+                return [], None
+            if status != "INVALID_REQUEST" or "pagetoken" not in params:
+                raise GooglePlacesError(f"{status}: {data.get('error_message', '')}")
+        return [], None
+
+    async def _search(self, lat: float, lon: float, query: str, api_key: str, radius: int,
+                      found: dict, enough: asyncio.Event, first_page: asyncio.Event):
+        """One radius step: follow pages until enough results overall or pages run out."""
+        params = {"location": f"{lat},{lon}", "radius": radius, "type": query.lower(),
+                  "keyword": query, "key": api_key}
+        for page in range(GOOGLE_PLACES_MAX_PAGES):
+            try:
+                results, token = await self._page(params)
+            finally:
+                first_page.set()
+            for place in results:
+                found.setdefault(place["place_id"], place)
+            if len(found) >= GOOGLE_PLACES_MIN_RESULTS:
+                enough.set()
+            if not token or enough.is_set():
+                return
+            await asyncio.sleep(NEXT_PAGE_DELAY)
+            if enough.is_set():  # a wider radius step filled up meanwhile
+                return
+            params = {"pagetoken": token, "key": api_key}
+
+    async def _nearby(self, lat: float, lon: float, query: str, api_key: str) -> List[dict]:
+        self._stats["searches"] += 1
+        found = {}            # place_id -> place, first (narrowest radius) wins
+        enough = asyncio.Event()
+        radius = GOOGLE_PLACES_RADIUS
+        steps = []
+
+        try:
+            while True:
+                first_page = asyncio.Event()
+                step = asyncio.ensure_future(self._search(lat, lon, query, api_key, radius, found, enough, first_page))
+                steps.append(step)
+                # Widen only once the first page of this radius has come back short
+                await first_page.wait()
+                await asyncio.sleep(0)
+                if step.done() and step.exception():
+                    break  # this radius failed; don't widen further (reported below)
+                if enough.is_set() or radius >= GOOGLE_PLACES_MAX_RADIUS:
+                    break
+                radius = min(radius * 2, GOOGLE_PLACES_MAX_RADIUS)
+                self._stats["expansions"] += 1
+            outcomes = await asyncio.gather(*steps, return_exceptions=True)
+        except BaseException as e:
+            # Cancellation (the API lost a race) stops every radius step
+            if isinstance(e, Exception):
+                self._stats["errors"] += 1
+            for step in steps:
+                step.cancel()
+            raise
+
+        # A failed radius step only stops itself; the search fails when nothing was found
+        failures = [(i, outcome) for i, outcome in enumerate(outcomes) if isinstance(outcome, Exception)]
+        for i, error in failures:
+            print(f"[Google Places] Radius step {i + 1}/{len(steps)} failed: {error}")
+        self._stats["failed_steps"] += len(failures)
+        if failures and not found:
+            self._stats["errors"] += 1
+            raise failures[0][1]
+
+        self._stats["results"] += len(found)
+        return list(found.values())
+
+    async def nearby(self, lat: float, lon: float, query: str, api_key: str) -> List[dict]:
+        return await run_async(self._nearby(lat, lon, query, api_key))
+
+    def nearby_sync(self, lat: float, lon: float, query: str, api_key: str,
+                    cancel: Optional[threading.Event] = None) -> List[dict]:
+        return run_sync(self._nearby(lat, lon, query, api_key), cancel=cancel)
+
+    def stats(self) -> dict:
+        requests = self._stats["requests"]
+        searches = self._stats["searches"]
+        stats = dict(self._stats)
+        request_ms = stats.pop("request_ms")
+        return {
+            **stats,
+            "avg_request_ms": round(request_ms / requests, 1) if requests else None,
+            "avg_results": round(stats["results"] / searches, 1) if searches else None,
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_places_client() -> GooglePlacesClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GooglePlacesClient()
+    return _client
@@ -0,0 +1,55 @@
+# places-service/parity_render_profiles.py
+#
+# Parity check for the render profiles: renders the same Maps search and place
+# pages with the profile off and on, and confirms the extracted results match.
+# Also fills the on/off render stats, so the time/bytes saved are printed.
+#
+#   python parity_render_profiles.py --lat 40.7128 --lon -74.0060 --query park --details 3
+#
+# Exits non-zero when extraction differs.
+
+import argparse
+import json
+import sys
+from app import (
+    get_google_maps_search_page, get_single_place_html,
+    extract_places_from_google_maps, parse_single_place_details,
+)
+from common.render_profiles import get_profile_stats
+
+
+def card_key(place: dict) -> tuple:
+    return (place["name"], place["category"], place["address"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render profile parity check for places-service")
+    parser.add_argument("--lat", type=float, required=True)
+    parser.add_argument("--lon", type=float, required=True)
+    parser.add_argument("--query", action="append", required=True)
+    parser.add_argument("--details", type=int, default=3, help="place detail pages to compare per query")
+    args = parser.parse_args()
+
+    mismatches = 0
+    for query in args.query:
+        off = extract_places_from_google_maps(get_google_maps_search_page(args.lat, args.lon, query, profile_enabled=False))
+        on = extract_places_from_google_maps(get_google_maps_search_page(args.lat, args.lon, query, profile_enabled=True))
+        missing = {card_key(p) for p in off} - {card_key(p) for p in on}
+        extra = {card_key(p) for p in on} - {card_key(p) for p in off}
+        status = "✅" if not missing and not extra else "❌"
+        print(f"{status} search '{query}': {len(off)} cards off, {len(on)} on, {len(missing)} missing, {len(extra)} extra")
+        mismatches += bool(missing or extra)
+
+        for place in off[:args.details]:
+            details_off = parse_single_place_details(get_single_place_html(place["link"], profile_enabled=False))
+            details_on = parse_single_place_details(get_single_place_html(place["link"], profile_enabled=True))
+            status = "✅" if details_off == details_on else "❌"
+            print(f"{status} details '{place['name']}': off={details_off} on={details_on}")
+            mismatches += details_off != details_on
+
+    print(json.dumps({k: v for k, v in get_profile_stats().items() if k.startswith("maps")}, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
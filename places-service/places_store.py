@@ -0,0 +1,148 @@
+# places-service/places_store.py
+#
+# In-process store of recent places results, spatially indexed per query by
+# geohash bucket of the request origin. A request within
+# PLACES_STORE_RADIUS_KM of a fresh stored origin for the same query is
+# answered from the nearest stored result (which places_api re-ranks for the
+# new origin) instead of calling the Google API or scraping again.
+#
+# Results are stored per source ("api", "scrape"): storing one source's list
+# next to a fresh list from the other source at (almost) the same origin merges
+# the two with ranking.dedupe_places, API rows first, so the same place found
+# by both is returned once. A source's newer list replaces its older one (e.g.
+# background enrichment replacing card-level scrape results).
+#
+# Buckets are kept in LRU order and capped at PLACES_STORE_MAX_CELLS; expired
+# buckets are purged every PLACES_STORE_PURGE_EVERY stores.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+from common import geohash
+from ranking import dedupe_places, haversine_km
+
+PLACES_STORE_TTL = float(os.getenv("PLACES_STORE_TTL", 1800))            # seconds a result stays fresh
+PLACES_STORE_RADIUS_KM = float(os.getenv("PLACES_STORE_RADIUS_KM", 0.5))  # reuse radius around a stored origin
+PLACES_STORE_PRECISION = int(os.getenv("PLACES_STORE_PRECISION", 6))     # geohash bucket size (6 ≈ 1.2 x 0.6 km)
+PLACES_STORE_MAX_CELLS = int(os.getenv("PLACES_STORE_MAX_CELLS", 5000))   # LRU bound on (query, cell) buckets
+PLACES_STORE_PURGE_EVERY = int(os.getenv("PLACES_STORE_PURGE_EVERY", 200)) # stores between expired-bucket sweeps
+SAME_ORIGIN_KM = 0.01                                                     # results this close share one entry
+
+SOURCE_ORDER = ("api", "scrape")  # merge order; first occurrence wins in dedupe_places
+
+
+class PlacesStore:
+    def __init__(self, ttl: float = PLACES_STORE_TTL, radius_km: float = PLACES_STORE_RADIUS_KM,
+                 precision: int = PLACES_STORE_PRECISION, max_cells: int = PLACES_STORE_MAX_CELLS):
+        self.ttl = ttl
+        self.radius_km = radius_km
+        self.precision = precision
+        self.max_cells = max_cells
+        self._buckets = OrderedDict()  # (query, geohash) -> [entry], least recently used first
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0, "stores": 0, "cross_source_merges": 0,
+                       "evicted": 0, "hit_offset_km": 0.0}
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def add(self, lat: float, lon: float, query: str, places: List[dict], source: str) -> List[dict]:
+        """
+        Store `source`'s result and return the places now stored for this
+        origin: deduped, and merged with a fresh result from the other source.
+        """
+        if not places:
+            return []
+        query = self._normalize(query)
+        bucket_key = (query, geohash.encode(lat, lon, self.precision))
+        now = time.time()
+        with self._lock:
+            bucket, previous = [], None
+            for e in self._buckets.get(bucket_key, ()):
+                if e["fetched_at"] + self.ttl <= now:
+                    continue
+                if float(haversine_km(lat, lon, e["lat"], e["lon"])) <= SAME_ORIGIN_KM:
+                    previous = e
+                else:
+                    bucket.append(e)
+            sources = {
+                name: result for name, result in (previous["sources"].items() if previous else ())
+                if name != source and result["fetched_at"] + self.ttl > now
+            }
+            sources[source] = {"fetched_at": now, "places": places}
+            ordered = sorted(sources, key=lambda name: SOURCE_ORDER.index(name) if name in SOURCE_ORDER else len(SOURCE_ORDER))
+            merged = dedupe_places([place for name in ordered for place in sources[name]["places"]])
+            bucket.append({
+                "lat": lat, "lon": lon,
+                # Fresh only while every merged source is
+                "fetched_at": min(result["fetched_at"] for result in sources.values()),
+                "sources": sources,
+                "places": merged,
+            })
+            self._buckets[bucket_key] = bucket
+            self._buckets.move_to_end(bucket_key)
+            self._stats["stores"] += 1
+            if len(sources) > 1:
+                self._stats["cross_source_merges"] += 1
+            if self._stats["stores"] % PLACES_STORE_PURGE_EVERY == 0:
+                self._purge_expired(now)
+            while len(self._buckets) > self.max_cells:
+                self._buckets.popitem(last=False)
+                self._stats["evicted"] += 1
+        return merged
+
+    def _purge_expired(self, now: float):
+        """Drop buckets whose entries have all expired (caller holds the lock)."""
+        expired = [key for key, bucket in self._buckets.items()
+                   if all(e["fetched_at"] + self.ttl <= now for e in bucket)]
+        for key in expired:
+            del self._buckets[key]
+
+    def _nearest(self, lat: float, lon: float, query: str):
+        now = time.time()
+        best, best_km, best_key = None, None, None
+        for cell in geohash.neighbours(geohash.encode(lat, lon, self.precision)):
+            for entry in self._buckets.get((query, cell), ()):
+                if entry["fetched_at"] + self.ttl <= now:
+                    continue
+                km = float(haversine_km(lat, lon, entry["lat"], entry["lon"]))
+                if km <= self.radius_km and (best_km is None or km < best_km):
+                    best, best_km, best_key = entry, km, (query, cell)
+        if best_key is not None:
+            self._buckets.move_to_end(best_key)
+        return best, best_km
+
+    def lookup(self, lat: float, lon: float, query: str) -> Optional[List[dict]]:
+        """Places of the nearest fresh covering result (unranked; the caller ranks them for this origin), or None."""
+        query = self._normalize(query)
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry, offset_km = self._nearest(lat, lon, query)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._stats["hit_offset_km"] += offset_km
+            return entry["places"]
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            fresh = {key: [e for e in bucket if e["fetched_at"] + self.ttl > now] for key, bucket in self._buckets.items()}
+            stats = dict(self._stats)
+        covered = [key for key, bucket in fresh.items() if bucket]
+        offset_total_km = stats.pop("hit_offset_km")
+        return {
+            **stats,
+            "hit_rate": round(stats["hits"] / stats["lookups"], 3) if stats["lookups"] else None,
+            "avg_hit_offset_km": round(offset_total_km / stats["hits"], 3) if stats["hits"] else None,
+            "entries": sum(len(bucket) for bucket in fresh.values()),
+            "covered_cells": len(covered),
+            "queries": len({query for query, _ in covered}),
+        }
+
+
+places_store = PlacesStore()
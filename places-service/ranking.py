@@ -0,0 +1,161 @@
+# places-service/ranking.py
+#
+# Vectorized places ranking: distances for a whole result set in one NumPy
+# pass and a partial top-k instead of sorting the full list. places_api ranks
+# once per request.
+#
+# Dedup (the same place listed more than once, or found by both the Google API
+# and the Maps scrape) is separate and runs when places_store stores a result,
+# not on every ranking: keys are built once per place and grouped in dicts, and
+# only places sharing a key go through the merge loop.
+
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import List, Optional
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+DEDUP_RADIUS_KM = float(os.getenv("PLACES_DEDUP_RADIUS_KM", 0.15))  # same name within this distance = same place
+
+_PLACE_ID_RE = re.compile(r"place_id:([A-Za-z0-9_-]+)")
+_FEATURE_ID_RE = re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_NON_ALNUM_LINES_RE = re.compile(r"[^a-z0-9\n]+")
+_MISSING = (None, "", "N/A")
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; any argument may be a NumPy array."""
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _coords(places: List[dict]) -> tuple:
+    """(lats, lons) arrays with NaN where a place has no coordinates."""
+    lats = np.array([p.get("lat") if p.get("lat") is not None else np.nan for p in places], dtype=float)
+    lons = np.array([p.get("lon") if p.get("lon") is not None else np.nan for p in places], dtype=float)
+    return lats, lons
+
+
+def place_id(place: dict) -> Optional[str]:
+    link = place.get("place_link") or place.get("link") or ""
+    match = _PLACE_ID_RE.search(link) or _FEATURE_ID_RE.search(link)
+    return match.group(1) if match else None
+
+
+def normalize_name(name: str) -> str:
+    name = name or ""
+    if not name.isascii():
+        name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return _NON_ALNUM_RE.sub(" ", name.lower()).strip()
+
+
+def _normalize_names(places: List[dict]) -> List[str]:
+    """normalize_name for every place, as one pass over the joined names."""
+    joined = "\n".join((place.get("name") or "").replace("\n", " ") for place in places).lower()
+    if not joined.isascii():
+        joined = unicodedata.normalize("NFKD", joined).encode("ascii", "ignore").decode()
+    return [name.strip() for name in _NON_ALNUM_LINES_RE.sub(" ", joined).split("\n")]
+
+
+def _merge(primary: dict, duplicate: dict) -> dict:
+    """Keep `primary`, filling its missing fields from `duplicate`."""
+    merged = dict(primary)
+    for key, value in duplicate.items():
+        if merged.get(key) in _MISSING and value not in _MISSING:
+            merged[key] = value
+    return merged
+
+
+def dedupe_places(places: List[dict]) -> List[dict]:
+    """
+    Merge duplicates: same place id, or same normalized name within
+    DEDUP_RADIUS_KM (the scrape repeats cards, and its feature ids and the API's
+    place ids come from different namespaces). First occurrence wins.
+    """
+    if len(places) < 2:
+        return list(places)
+    pids = [place_id(place) for place in places]
+    names = _normalize_names(places)
+    pid_counts = Counter(pid for pid in pids if pid)
+    name_counts = Counter(name for name in names if name)
+    # A place whose id and name are both unique can neither merge nor be merged into
+    shared = [i for i, (pid, name) in enumerate(zip(pids, names))
+              if pid_counts.get(pid, 0) > 1 or name_counts.get(name, 0) > 1]
+    if not shared:
+        return list(places)
+
+    lats, lons = _coords([places[i] for i in shared])
+    merged = {}          # kept index -> merged dict
+    dropped = set()
+    by_id = {}
+    by_name = {}         # normalized name -> [(kept index, lat, lon)]
+
+    for i, lat, lon in zip(shared, lats, lons):
+        pid, name = pids[i], names[i]
+        target = by_id.get(pid) if pid else None
+
+        if target is None and name in by_name and not np.isnan(lat):
+            for kept, kept_lat, kept_lon in by_name[name]:
+                if not np.isnan(kept_lat) and haversine_km(lat, lon, kept_lat, kept_lon) <= DEDUP_RADIUS_KM:
+                    target = kept
+                    break
+
+        if target is None:
+            merged[i] = dict(places[i])
+            if name:
+                by_name.setdefault(name, []).append((i, lat, lon))
+            target = i
+        else:
+            merged[target] = _merge(merged[target], places[i])
+            dropped.add(i)
+        if pid:
+            by_id.setdefault(pid, target)
+
+    return [merged.get(i, place) for i, place in enumerate(places) if i not in dropped]
+
+
+def rank_places(places: List[dict], ref_lat: float, ref_lon: float, k: Optional[int] = None,
+                missing_distance: Optional[float] = None, dedupe: bool = False) -> List[dict]:
+    """
+    Compute distance_km from (ref_lat, ref_lon) for every place with
+    coordinates in one vectorized pass, and return the k nearest in order
+    (all of them if k is None). Places without coordinates sort last and keep
+    their existing distance_km, or `missing_distance` when they have none.
+    With dedupe=True, duplicates are merged first (see dedupe_places).
+    """
+    if dedupe:
+        places = dedupe_places(places)
+    if not places:
+        return []
+
+    lats, lons = _coords(places)
+    distances = haversine_km(ref_lat, ref_lon, lats, lons)
+    known = ~np.isnan(distances)
+
+    # Places without coordinates may still carry a distance (e.g. from an earlier pass)
+    sort_keys = np.where(known, distances, np.inf)
+    for i in np.flatnonzero(~known):
+        existing = places[i].get("distance_km")
+        if existing is not None:
+            sort_keys[i] = existing
+
+    n = len(places)
+    if k is not None and k < n:
+        top = np.argpartition(sort_keys, k - 1)[:k]
+        order = top[np.argsort(sort_keys[top], kind="stable")]
+    else:
+        order = np.argsort(sort_keys, kind="stable")
+
+    ranked = []
+    for i in order:
+        place = dict(places[i])
+        if known[i]:
+            place["distance_km"] = round(float(distances[i]), 5)
+        elif place.get("distance_km") is None:
+            place["distance_km"] = missing_distance
+        ranked.append(place)
+    return ranked
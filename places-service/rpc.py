@@ -31,7 +31,8 @@ async def on_request(message: IncomingMessage):
                 raise ValueError("Missing one of: lat, lon, query")
 
             # Call your existing function; returns a list of place dicts
-            places = places_api(lat=lat, lon=lon, query=query)
+            places = places_api(lat=lat, lon=lon, query=query, enrich=payload.get("enrich"),
+                                strategy=payload.get("strategy"))
             result = {"places": places}
 
         except HTTPException as he:
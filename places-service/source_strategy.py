@@ -0,0 +1,171 @@
+# places-service/source_strategy.py
+#
+# How places_api combines its two sources (Google Places API, Maps scrape):
+#
+#   sequential - primary first, fallback only if it fails or returns nothing (legacy)
+#   race       - start both; the first non-empty result wins, the other is cancelled
+#   hedge      - start the primary; start the fallback too if the primary hasn't
+#                answered within PLACES_HEDGE_DELAY_MS, then race them
+#
+# A source is `fn(cancel) -> list`, where `cancel` is a threading.Event set
+# when the source has lost and should stop as soon as it can (the scrape
+# checks it between stages and aborts its browser render). A loser that still
+# finishes with places (it was already done, or too far along to stop) is
+# handed to `on_late_result(name, places)` when given, so places_api can store
+# it next to the winner's result.
+#
+# Stats per strategy: which source won, how long the winning answer took,
+# how often a hedge was started and how many losers were cancelled.
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, List, Optional, Tuple
+
+PLACES_SOURCE_STRATEGY = os.getenv("PLACES_SOURCE_STRATEGY", "sequential")  # sequential | race | hedge
+PLACES_HEDGE_DELAY_MS = int(os.getenv("PLACES_HEDGE_DELAY_MS", 1500))       # primary head start in hedge mode
+PLACES_SOURCE_WORKERS = int(os.getenv("PLACES_SOURCE_WORKERS", 8))          # threads running racing sources
+
+STRATEGIES = ("sequential", "race", "hedge")
+
+Source = Tuple[str, Callable[[threading.Event], List[dict]]]
+LateResult = Callable[[str, List[dict]], None]
+
+
+def _empty_stats() -> dict:
+    return {"requests": 0, "empty": 0, "hedges": 0, "cancelled": 0, "total_ms": 0.0, "wins": {}}
+
+
+class SourceStrategy:
+    def __init__(self, max_workers: int = PLACES_SOURCE_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="places-source")
+        self._lock = threading.Lock()
+        self._stats = {name: _empty_stats() for name in STRATEGIES}
+
+    def fetch(self, primary: Source, fallback: Source, strategy: Optional[str] = None,
+              hedge_delay_ms: Optional[int] = None,
+              on_late_result: Optional[LateResult] = None) -> Tuple[List[dict], Optional[str]]:
+        """Returns (places, name of the source that produced them) or ([], None)."""
+        strategy = strategy or PLACES_SOURCE_STRATEGY
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown places source strategy: {strategy}")
+        hedge_delay_ms = PLACES_HEDGE_DELAY_MS if hedge_delay_ms is None else hedge_delay_ms
+
+        started = time.perf_counter()
+        counters = {"hedges": 0, "cancelled": 0}
+        if strategy == "sequential":
+            places, winner = self._sequential(primary, fallback)
+        elif strategy == "race":
+            places, winner = self._race([primary, fallback], [], counters, on_late_result)
+        else:
+            places, winner = self._hedge(primary, fallback, hedge_delay_ms / 1000, counters, on_late_result)
+        self._record(strategy, winner, (time.perf_counter() - started) * 1000, counters)
+        return places, winner
+
+    @staticmethod
+    def _sequential(primary: Source, fallback: Source):
+        for name, fn in (primary, fallback):
+            places = fn(threading.Event())
+            if places:
+                return places, name
+            print(f"[Places source] {name} returned nothing, trying next source")
+        return [], None
+
+    def _submit(self, source: Source) -> dict:
+        name, fn = source
+        cancel = threading.Event()
+        return {"name": name, "cancel": cancel, "future": self._executor.submit(fn, cancel)}
+
+    @staticmethod
+    def _result(running: dict) -> List[dict]:
+        try:
+            return running["future"].result() or []
+        except Exception as e:
+            print(f"[Places source] {running['name']} failed: {e}")
+            return []
+
+    @staticmethod
+    def _late(future, name: str, on_late_result: LateResult):
+        if future.cancelled() or future.exception() is not None:
+            return
+        places = future.result()
+        if not places:
+            return
+        try:
+            on_late_result(name, places)
+        except Exception as e:
+            print(f"[Places source] Storing the late {name} result failed: {e}")
+
+    def _race(self, to_start: List[Source], running: List[dict], counters: dict,
+              on_late_result: Optional[LateResult] = None):
+        running = running + [self._submit(source) for source in to_start]
+        pending = {r["future"]: r for r in running}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished = pending.pop(future)
+                places = self._result(finished)
+                if places:
+                    for loser in pending.values():
+                        loser["cancel"].set()
+                        loser["future"].cancel()
+                        counters["cancelled"] += 1
+                        if on_late_result is not None:
+                            loser["future"].add_done_callback(
+                                lambda f, name=loser["name"]: self._late(f, name, on_late_result))
+                    return places, finished["name"]
+        return [], None
+
+    def _hedge(self, primary: Source, fallback: Source, delay: float, counters: dict,
+               on_late_result: Optional[LateResult] = None):
+        first = self._submit(primary)
+        done, _ = wait([first["future"]], timeout=delay)
+        if done:
+            places = self._result(first)
+            if places:
+                return places, first["name"]
+            # Answered empty inside the delay: nothing to hedge against, plain fallback
+            return self._race([fallback], [], counters, on_late_result)
+        counters["hedges"] += 1
+        print(f"[Places source] {first['name']} slower than {delay * 1000:.0f} ms, hedging with {fallback[0]}")
+        return self._race([fallback], [first], counters, on_late_result)
+
+    def _record(self, strategy: str, winner: Optional[str], elapsed_ms: float, counters: dict):
+        with self._lock:
+            stats = self._stats[strategy]
+            stats["requests"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["hedges"] += counters["hedges"]
+            stats["cancelled"] += counters["cancelled"]
+            if winner is None:
+                stats["empty"] += 1
+                return
+            win = stats["wins"].setdefault(winner, {"count": 0, "total_ms": 0.0})
+            win["count"] += 1
+            win["total_ms"] += elapsed_ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            report = {"strategy": PLACES_SOURCE_STRATEGY, "hedge_delay_ms": PLACES_HEDGE_DELAY_MS}
+            for name, stats in self._stats.items():
+                requests = stats["requests"]
+                report[name] = {
+                    "requests": requests,
+                    "empty": stats["empty"],
+                    "hedges": stats["hedges"],
+                    "cancelled": stats["cancelled"],
+                    "avg_ms": round(stats["total_ms"] / requests, 1) if requests else None,
+                    "wins": {
+                        source: {
+                            "count": win["count"],
+                            "share": round(win["count"] / requests, 3),
+                            "avg_ms": round(win["total_ms"] / win["count"], 1),
+                        }
+                        for source, win in stats["wins"].items()
+                    },
+                }
+            return report
+
+
+source_strategy = SourceStrategy()
@@ -0,0 +1,74 @@
+# recommendation-service/bench_startup.py
+#
+# Import-time and cold-start benchmark, tracked across releases.
+# Every measurement runs in a fresh interpreter so nothing is cached.
+#
+#   python bench_startup.py                      # print results
+#   python bench_startup.py --runs 5 --out startup_bench.jsonl   # append a JSON line
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# name -> code executed in a fresh interpreter; must print elapsed seconds
+SCENARIOS = {
+    "import_tasks": "import tasks",
+    "import_recommender": "import recommender",
+    "import_consumer": "import consumer",
+    "import_main": "import main",
+    "cold_start_warm_up": "import tasks; tasks.warm_up()",
+}
+
+RUNNER = """
+import time
+_started = time.perf_counter()
+{code}
+print(time.perf_counter() - _started)
+"""
+
+
+def measure(code: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", RUNNER.format(code=code)],
+        cwd=SERVICE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="recommendation-service import-time and cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--out", help="append results as one JSON line to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        try:
+            samples = [measure(code) for _ in range(args.runs)]
+        except subprocess.CalledProcessError as e:
+            print(f"⚠️ {name} failed: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            continue
+        results[name] = {
+            "median_ms": round(statistics.median(samples), 1),
+            "min_ms": round(min(samples), 1),
+            "max_ms": round(max(samples), 1),
+        }
+        print(f"{name:<22} median={results[name]['median_ms']:>9.1f} ms  "
+              f"min={results[name]['min_ms']:>9.1f} ms  max={results[name]['max_ms']:>9.1f} ms")
+
+    if args.out:
+        with open(args.out, "a") as f:
+            f.write(json.dumps({"timestamp": time.time(), "runs": args.runs, "results": results}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,15 @@
 
 import asyncio
 import json
+import signal
 import aio_pika
 import redis.asyncio as redis # Import async Redis client for consumer
 from aio_pika import Message
 from config import settings
 from schemas import RecommendationRequest
-from tasks import process_recommendation_task
-import requests
+from recommender import generate_recommendation
+from publisher import SHARD_EXCHANGE_TYPE
+import tasks
 
 # Initialize Redis client for the consumer process
 # This client is separate from the one in main.py if consumer.py runs as a separate process.
@@ -54,40 +56,96 @@ async def handle_message(msg: aio_pika.IncomingMessage):
         payload = json.loads(msg.body.decode())
         req = RecommendationRequest(**payload)
 
-        # Process the request to get the prompt content
-        prompt_content = await process_recommendation_task(req)
-
-        print(f"🔥 Consumer calling LLM for user={req.user_id} with prompt:")
-        print(prompt_content)
-
-        llm_resp = await asyncio.to_thread( # Use to_thread for blocking HTTP call
-            requests.post,
-            "http://localhost:11434/api/generate",
-            json={
-                "model":  settings.LLM_MODEL, # Use LLM_MODEL from settings
-                "prompt": prompt_content,
-                "stream": False
-            }
-        )
-        recommendation = llm_resp.json().get("response", "No suggestion available.")
-        print(f"DEBUG: Raw LLM Response JSON: {llm_resp.json()}")
-        print(f"DEBUG: Extracted Recommendation: {recommendation}")
+        # Build the context and generate the text (template fast path or LLM)
+        recommendation = await generate_recommendation(req, consumer_redis_client)
+        print(f"DEBUG: Recommendation for user={req.user_id}: {recommendation}")
 
         # This call will now store the recommendation directly in Redis via consumer's client
         await store_async_recommendation_in_redis(req.user_id, recommendation)
 
 
+def shard_queue_arguments() -> dict:
+    """
+    Arguments of a per-worker shard queue. Messages that sit in it for
+    SHARD_MESSAGE_TTL_MS (its worker died, or is stuck) are dead-lettered to the
+    shared QUEUE_NAME queue, which every worker also consumes, so they are handled
+    elsewhere instead of being deleted with the queue when it expires after
+    SHARD_QUEUE_EXPIRES_MS (keep the TTL well below that).
+    """
+    return {
+        "x-expires": settings.SHARD_QUEUE_EXPIRES_MS,
+        "x-message-ttl": settings.SHARD_MESSAGE_TTL_MS,
+        "x-dead-letter-exchange": "",
+        "x-dead-letter-routing-key": settings.QUEUE_NAME,
+    }
+
+
+async def declare_shard_queue(channel: aio_pika.Channel):
+    """
+    ROUTING_MODE=sharded: bind a per-worker queue to the consistent-hash exchange.
+    The binding weight decides this worker's share of geocells. The queue is
+    named after WORKER_ID so a restarted worker reclaims it; on a clean shutdown
+    it is unbound and deleted (see release_shard_queue).
+    """
+    if not settings.WORKER_ID:
+        raise RuntimeError("WORKER_ID must be set with ROUTING_MODE=sharded (a stable name per worker)")
+    exchange = await channel.declare_exchange(settings.SHARD_EXCHANGE, SHARD_EXCHANGE_TYPE, durable=True)
+    queue = await channel.declare_queue(
+        f"{settings.QUEUE_NAME}.{settings.WORKER_ID}",
+        durable=True,
+        arguments=shard_queue_arguments(),
+    )
+    await queue.bind(exchange, routing_key=str(settings.SHARD_WEIGHT))
+    return exchange, queue
+
+
+async def release_shard_queue(exchange: aio_pika.Exchange, queue: aio_pika.Queue):
+    """Leave the hash ring: unbind so new messages go to the other workers, then delete if empty."""
+    try:
+        await queue.unbind(exchange, routing_key=str(settings.SHARD_WEIGHT))
+        await queue.delete(if_unused=False, if_empty=True)
+        print(f"🧹 Removed shard queue `{queue.name}`")
+    except Exception as e:
+        # Still holds messages: they are dead-lettered to the shared queue after SHARD_MESSAGE_TTL_MS
+        print(f"⚠️ Left shard queue `{queue.name}` in place: {e}")
+
+
 async def main():
     await init_consumer_redis() # Initialize Redis *before* connecting to RabbitMQ
+    # Warm the model before taking messages so the first one isn't slow
+    readiness = await asyncio.to_thread(tasks.warm_up)
+    print(f"🧠 Model ready={readiness['ready']} load={readiness['model_load_ms']}ms warmup={readiness['warmup_ms']}ms")
     connection = await aio_pika.connect_robust(str(settings.RABBITMQ_URL))
     channel = await connection.channel()
 
-    # Declare the main queue for non-RPC async requests
-    queue = await channel.declare_queue(settings.QUEUE_NAME, durable=True)
-    await queue.consume(handle_message)
-
-    print(f"🟢 Consumer listening on `{settings.QUEUE_NAME}` for async requests")
-    await asyncio.Future() # Keep the consumer running indefinitely
+    # Declare the main queue for non-RPC async requests; in sharded mode it also
+    # takes fallback publishes and messages dead-lettered from shard queues
+    shared_queue = await channel.declare_queue(settings.QUEUE_NAME, durable=True)
+    queues = [shared_queue]
+    shard = None
+    if settings.ROUTING_MODE == "sharded":
+        shard = await declare_shard_queue(channel)
+        queues.insert(0, shard[1])
+    consumer_tags = {queue: await queue.consume(handle_message) for queue in queues}
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: KeyboardInterrupt still stops the process, without the cleanup
+
+    print(f"🟢 Consumer listening on {', '.join(f'`{queue.name}`' for queue in queues)} for async requests")
+    await stop.wait()
+
+    print("🛑 Consumer stopping")
+    for queue, tag in consumer_tags.items():
+        await queue.cancel(tag)
+    if shard:
+        await release_shard_queue(*shard)
+    await connection.close()
+    await consumer_redis_client.close()
 
 
 if __name__ == "__main__":
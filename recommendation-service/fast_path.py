@@ -0,0 +1,56 @@
+# recommendation-service/fast_path.py
+#
+# Deterministic template renderer for categories that fetch no extra data
+# (CATEGORY_MAPPINGS "type": "none"). For those the LLM only rephrases the
+# fixed MESSAGES string plus location and weather, so a template gives the
+# same information without the multi-second generate call.
+
+from config import settings
+
+# Emoji prefix per message_index for the "type": "none" categories
+CATEGORY_EMOJIS = {
+    9: "🚗",   # Driving
+    10: "🛡️",  # Female_in_Public
+    13: "👋",  # Elderly_User
+    14: "🌙",  # Late_Night_Use
+    15: "💼",  # Work_Hours
+    18: "🏠",  # At_Home
+}
+
+
+def is_fast_path_eligible(context: dict) -> bool:
+    """
+    True when the prediction is confident and there is nothing for the LLM to
+    weave in: a "type": "none" category, no user preferences and no fetched data.
+    Ambiguous (low confidence) and data-rich requests stay on the LLM path.
+    """
+    if not settings.FAST_PATH_ENABLED:
+        return False
+    if context.get("fetch_type") != "none":
+        return False
+    if context.get("confidence", 0.0) < settings.FAST_PATH_MIN_CONFIDENCE:
+        return False
+    if context.get("activities") or context.get("places") or context.get("events") or context.get("blogs"):
+        return False
+    return True
+
+
+def render_fast_path(context: dict) -> str:
+    """Render the recommendation sentence from the predicted category, location and weather."""
+    emoji = CATEGORY_EMOJIS.get(context.get("message_index"), "✨")
+    location = context.get("location") or {}
+    weather = context.get("weather") or {}
+
+    location_name = location.get("display_name") or "your area"
+    description = weather.get("description")
+    temperature = weather.get("temperature")
+
+    text = f"{emoji} {context['recommended_message']} You're in {location_name}"
+    if description and temperature is not None:
+        text += f" with {description} at {temperature}°C"
+    elif description:
+        text += f" with {description}"
+    parsed_time = context.get("parsed_time")
+    if parsed_time and parsed_time != "unknown":
+        text += f" around {parsed_time}"
+    return text + "."
@@ -0,0 +1,11 @@
+# recommendation-service/geocell.py
+#
+# Geohash cells used to bucket requests by area; the encoder is the shared one
+# in ../common/geohash.py. Precision 5 ≈ 4.9 km x 4.9 km cells, 6 ≈ 1.2 km x
+# 0.6 km, 7 ≈ 150 m x 150 m.
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.geohash import encode, neighbours
@@ -8,7 +8,9 @@ import redis.asyncio as redis
 from schemas import RecommendationRequest, RecommendationResponse
 from publisher import publish_recommendation_request
 from config import settings
-from tasks import process_recommendation_task
+from recommender import generate_recommendation, get_path_stats
+from warmer import record_request, lookup_precomputed, run_warmer, get_warmer_stats
+import tasks
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,13 +23,19 @@ app = FastAPI(
     description="Blocking and non-blocking recommendation endpoints"
 )
 
-LLM_MODEL = settings.LLM_MODEL
 GATEWAY_URL = settings.GATEWAY_URL
 redis_client: redis.Redis = None
+warmer_task: asyncio.Task = None
+warmup_task: asyncio.Task = None
+
+def _log_warm_up_failure(task: asyncio.Task):
+    # warm_up logs the model errors it catches; this covers anything that escapes it
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"❌ Model warm-up task failed: {task.exception()!r}")
 
 @app.on_event("startup")
 async def startup_event():
-    global redis_client
+    global redis_client, warmer_task, warmup_task
     redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
     try:
         await redis_client.ping()
@@ -35,9 +43,16 @@ async def startup_event():
     except redis.exceptions.ConnectionError as e:
         logger.error(f"❌ Could not connect to Redis: {e}")
         raise ConnectionError(f"Failed to connect to Redis on startup: {e}")
+    # Load TensorFlow and the model in the background; /ready reports when done
+    warmup_task = asyncio.create_task(asyncio.to_thread(tasks.warm_up))
+    warmup_task.add_done_callback(_log_warm_up_failure)
+    if settings.WARMER_ENABLED:
+        warmer_task = asyncio.create_task(run_warmer(redis_client))
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    if warmer_task:
+        warmer_task.cancel()
     if redis_client:
         await redis_client.close()
         logger.info("🛑 Disconnected from Redis")
@@ -57,21 +72,17 @@ async def recommend(
     motion_state: str = Query(None, description="User motion state, optional (e.g., 'walking')")
 ):
     try:
-        prompt_content = await process_recommendation_task(
-            RecommendationRequest(user_id=user_id, lat=lat, lon=lon, age=age, gender=gender, time_of_day=time_of_day,motion_state=motion_state)
-        )
-        llm_resp = await asyncio.to_thread(
-            requests.post,
-            "http://localhost:11434/api/generate",
-            json={
-                "model": LLM_MODEL,
-                "prompt": prompt_content,
-                "stream": False
-            }
-        )
-        llm_resp.raise_for_status()
-        recommendation_text = llm_resp.json().get("response", "No suggestion available.")
-        logger.info(f"LLM response: {recommendation_text}")
+        req = RecommendationRequest(user_id=user_id, lat=lat, lon=lon, age=age, gender=gender, time_of_day=time_of_day,motion_state=motion_state)
+        await record_request(redis_client, req)
+
+        # Serve a fresh precomputed result when the warmer predicted this context
+        recommendation_text = await lookup_precomputed(redis_client, req)
+        if recommendation_text is not None:
+            logger.info(f"Serving precomputed recommendation for {user_id}")
+            return {"status": "ready", "recommendation": recommendation_text}
+
+        recommendation_text = await generate_recommendation(req, redis_client)
+        logger.info(f"Recommendation: {recommendation_text}")
         
         # Store in Redis for async polling
         await redis_client.set(f"recommendation:{user_id}", recommendation_text)
@@ -97,6 +108,7 @@ async def recommend_async(
     motion_state: str = Query(None, description="User motion state, optional (e.g., 'walking')")
 ):
     task_payload = RecommendationRequest(user_id=user_id, lat=lat, lon=lon, age=age, gender=gender, time_of_day=time_of_day, motion_state=motion_state)
+    await record_request(redis_client, task_payload)
     background_tasks.add_task(publish_recommendation_request, task_payload)
     return {"message": f"Enqueued recommendation for {user_id}. Poll /recommendation/result for status."}
 
@@ -130,4 +142,26 @@ async def get_recommendation_result(
     return {
         "status": "ready",
         "recommendation": recommendation_text
-    }
\ No newline at end of file
+    }
+
+@app.get(
+    "/recommendation/stats",
+    summary="📊 Template vs LLM path and warmer counters",
+    response_model=dict
+)
+async def get_recommendation_stats():
+    if redis_client is None:
+        raise HTTPException(status_code=500, detail="Redis client not initialized.")
+    stats = await get_path_stats(redis_client)
+    stats["warmer"] = await get_warmer_stats(redis_client)
+    return stats
+
+@app.get(
+    "/ready",
+    summary="🩺 Readiness: model loaded and warmed up",
+    response_model=dict
+)
+async def ready():
+    if not tasks.readiness["ready"]:
+        raise HTTPException(status_code=503, detail=tasks.readiness)
+    return tasks.readiness
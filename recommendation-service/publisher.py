@@ -3,16 +3,39 @@ import aio_pika
 from aio_pika import Message, DeliveryMode
 from schemas import RecommendationRequest
 from config import settings
+import geocell
+
+# RabbitMQ consistent-hash exchange (rabbitmq_consistent_hash_exchange plugin).
+# Routing keys are hashed onto a ring; each bound queue owns a share of the ring
+# proportional to its binding weight, and the ring rebalances as queues come and go.
+SHARD_EXCHANGE_TYPE = "x-consistent-hash"
+
+
+def shard_key(payload: RecommendationRequest) -> str:
+    """Routing key for ROUTING_MODE=sharded: the request's geocell."""
+    return geocell.encode(payload.lat, payload.lon, settings.SHARD_GEOCELL_PRECISION)
+
 
 async def publish_recommendation_request(payload: RecommendationRequest):
     connection = await aio_pika.connect_robust(str(settings.RABBITMQ_URL))
     async with connection:
-        channel = await connection.channel()
-        await channel.declare_queue(settings.QUEUE_NAME, durable=True)
+        # Unroutable mandatory publishes (no shard queue bound) raise instead of vanishing
+        channel = await connection.channel(on_return_raises=True)
         msg = aio_pika.Message(
             body=payload.json().encode("utf-8"),
             content_type="application/json",
             delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
         )
+        if settings.ROUTING_MODE == "sharded":
+            routing_key = shard_key(payload)
+            exchange = await channel.declare_exchange(settings.SHARD_EXCHANGE, SHARD_EXCHANGE_TYPE, durable=True)
+            try:
+                await exchange.publish(msg, routing_key=routing_key, mandatory=True)
+                print(f"📤 Published recommendation request for user={payload.user_id} to shard key {routing_key}")
+                return
+            except aio_pika.exceptions.DeliveryError:
+                # No worker bound to the ring: fall back to the shared queue every worker also consumes
+                print(f"⚠️ No shard queue for key {routing_key}, publishing to `{settings.QUEUE_NAME}`")
+        await channel.declare_queue(settings.QUEUE_NAME, durable=True)
         await channel.default_exchange.publish(msg, routing_key=settings.QUEUE_NAME)
         print(f"📤 Published recommendation request for user={payload.user_id}")
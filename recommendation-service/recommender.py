@@ -0,0 +1,93 @@
+# recommendation-service/recommender.py
+import asyncio
+import time
+import logging
+import requests
+from config import settings
+from schemas import RecommendationRequest
+from tasks import build_recommendation_context
+from fast_path import is_fast_path_eligible, render_fast_path
+
+logger = logging.getLogger(__name__)
+
+# Redis hash holding per-path counters, shared by the API and all consumers
+PATH_STATS_KEY = "stats:generation_path"
+PATHS = ("template", "llm")
+
+
+def call_llm(prompt: str) -> str:
+    """Blocking call to the local LLM; run it through asyncio.to_thread."""
+    llm_resp = requests.post(
+        settings.LLM_URL,
+        json={
+            "model": settings.LLM_MODEL,
+            "prompt": prompt,
+            "stream": False
+        }
+    )
+    llm_resp.raise_for_status()
+    return llm_resp.json().get("response", "No suggestion available.")
+
+
+async def record_path(redis_client, path: str, total_ms: float, generation_ms: float):
+    if redis_client is None:
+        return
+    try:
+        pipe = redis_client.pipeline()
+        pipe.hincrby(PATH_STATS_KEY, f"{path}:count", 1)
+        pipe.hincrbyfloat(PATH_STATS_KEY, f"{path}:total_ms", total_ms)
+        pipe.hincrbyfloat(PATH_STATS_KEY, f"{path}:generation_ms", generation_ms)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not record {path} path stats: {e}")
+
+
+async def get_path_stats(redis_client) -> dict:
+    """Counts and average latencies per path, plus the LLM-vs-template difference."""
+    raw = await redis_client.hgetall(PATH_STATS_KEY) if redis_client else {}
+    stats = {}
+    for path in PATHS:
+        count = int(raw.get(f"{path}:count", 0))
+        total_ms = float(raw.get(f"{path}:total_ms", 0.0))
+        generation_ms = float(raw.get(f"{path}:generation_ms", 0.0))
+        stats[path] = {
+            "count": count,
+            "avg_total_ms": round(total_ms / count, 1) if count else None,
+            "avg_generation_ms": round(generation_ms / count, 1) if count else None,
+        }
+    if stats["template"]["count"] and stats["llm"]["count"]:
+        stats["avg_total_ms_saved"] = round(stats["llm"]["avg_total_ms"] - stats["template"]["avg_total_ms"], 1)
+        stats["avg_generation_ms_saved"] = round(stats["llm"]["avg_generation_ms"] - stats["template"]["avg_generation_ms"], 1)
+    return stats
+
+
+async def generate_recommendation(req: RecommendationRequest, redis_client=None, record_stats: bool = True) -> str:
+    """
+    Builds the context for a request and turns it into the final recommendation
+    text, via the template fast path when eligible and the LLM otherwise.
+    record_stats=False keeps background work (the warmer) out of the path stats.
+    """
+    started = time.perf_counter()
+    context = await build_recommendation_context(req)
+
+    generation_started = time.perf_counter()
+    if is_fast_path_eligible(context):
+        path = "template"
+        recommendation = render_fast_path(context)
+    else:
+        path = "llm"
+        print(f"🔥 Calling LLM for user={req.user_id} with prompt:")
+        print(context["prompt"])
+        recommendation = await asyncio.to_thread(call_llm, context["prompt"])
+    finished = time.perf_counter()
+
+    logger.info(f"Recommendation for user={req.user_id} via {path} path (confidence {context['confidence']:.3f})")
+    if not record_stats:
+        return recommendation
+    await record_path(
+        redis_client,
+        path,
+        total_ms=(finished - started) * 1000,
+        generation_ms=(finished - generation_started) * 1000,
+    )
+    return recommendation
@@ -32,4 +32,52 @@ async def rpc_call(queue_name: str, payload: dict, timeout: float = 120.0): # In
         ),
         routing_key=queue_name,
     )
-    return await asyncio.wait_for(future, timeout)
\ No newline at end of file
+    return await asyncio.wait_for(future, timeout)
+
+async def rpc_stream(queue_name: str, payload: dict, timeout: float = 120.0):
+    """
+    Streaming RPC: sends `payload` with "stream": true and yields the reply
+    messages in "seq" order (out-of-order arrivals are buffered) until the
+    "end" message, which is yielded last. Raises asyncio.TimeoutError if the
+    stream is not finished within `timeout`. Breaking out early is fine; the
+    reply queue goes away with the connection.
+    """
+    conn = await aio_pika.connect_robust(str(settings.RABBITMQ_URL))
+    try:
+        channel = await conn.channel()
+        callback_q = await channel.declare_queue(exclusive=True)
+        corr_id = str(uuid.uuid4())
+        inbox = asyncio.Queue()
+
+        async def on_response(msg: aio_pika.IncomingMessage):
+            if msg.correlation_id == corr_id:
+                await inbox.put(json.loads(msg.body))
+
+        await callback_q.consume(on_response, no_ack=True)
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=json.dumps({**payload, "stream": True}).encode(),
+                correlation_id=corr_id,
+                reply_to=callback_q.name,
+            ),
+            routing_key=queue_name,
+        )
+
+        deadline = asyncio.get_running_loop().time() + timeout
+        expected, pending = 0, {}
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            msg = await asyncio.wait_for(inbox.get(), max(remaining, 0))
+            # A plain (non-streaming) reply, e.g. an error before the stream started
+            if "seq" not in msg:
+                yield {"type": "end", **msg}
+                return
+            pending[msg["seq"]] = msg
+            while expected in pending:
+                msg = pending.pop(expected)
+                expected += 1
+                yield msg
+                if msg.get("type") == "end":
+                    return
+    finally:
+        await conn.close()
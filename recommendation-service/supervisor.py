@@ -0,0 +1,168 @@
+# recommendation-service/supervisor.py
+#
+# Prefork supervisor for consumer.py. The parent imports the consumer code and
+# the immutable MESSAGES / CATEGORY_MAPPINGS tables once, then forks N consumer
+# workers; only those pages (the interpreter, imported modules, the tables)
+# are shared copy-on-write. The Keras model is NOT shared: TensorFlow does not
+# support fork() once its runtime is initialised (its thread pools don't
+# survive it and predict() can deadlock), so the parent never imports it and
+# every worker loads its own copy after the fork, together with its own Redis
+# and RabbitMQ connections (consumer.main -> tasks.warm_up). Model memory
+# therefore still grows with the number of workers; the memory report shows it
+# as private pages.
+#
+# Crashed workers are restarted after a per-slot backoff without pausing the
+# supervisor loop, and per-worker memory is reported periodically.
+#
+# Linux only (os.fork + /proc). Run:  python supervisor.py
+
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from config import settings
+
+import tasks
+import consumer
+
+WORKERS = settings.CONSUMER_WORKERS
+MEMORY_REPORT_INTERVAL = settings.SUPERVISOR_MEMORY_REPORT_INTERVAL
+RESTART_BACKOFF_MAX = 30.0
+
+_workers = {}       # pid -> worker slot
+_restarts = {}      # slot -> consecutive crash count
+_restart_at = {}    # slot -> monotonic time its replacement is due
+_shutting_down = False
+
+
+def run_worker(slot: int):
+    """Child process body: open fresh connections and consume until stopped."""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Stable per-slot id so a restarted worker reclaims its shard queue
+    settings.WORKER_ID = f"{settings.WORKER_ID or socket.gethostname()}-{slot}"
+    print(f"👷 Consumer worker {slot} started (pid={os.getpid()})")
+    code = 0
+    try:
+        asyncio.run(consumer.main())
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"❌ Consumer worker {slot} crashed: {e}")
+        code = 1
+    finally:
+        sys.stdout.flush()
+        os._exit(code)
+
+
+def spawn_worker(slot: int):
+    pid = os.fork()
+    if pid == 0:
+        run_worker(slot)
+    _workers[pid] = slot
+    return pid
+
+
+def read_worker_memory(pid: int) -> dict:
+    """RSS, PSS and shared/private KiB from /proc/<pid>/smaps_rollup."""
+    fields = {"Rss": "rss_kb", "Pss": "pss_kb", "Shared_Clean": "shared_clean_kb",
+              "Shared_Dirty": "shared_dirty_kb", "Private_Clean": "private_clean_kb",
+              "Private_Dirty": "private_dirty_kb"}
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    memory[fields[key]] = int(rest.split()[0])
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        pass
+    return memory
+
+
+def report_memory():
+    parent = read_worker_memory(os.getpid())
+    print(f"📊 supervisor pid={os.getpid()} rss={parent.get('rss_kb', '?')}KiB pss={parent.get('pss_kb', '?')}KiB")
+    total_pss = 0
+    for pid, slot in sorted(_workers.items(), key=lambda item: item[1]):
+        mem = read_worker_memory(pid)
+        shared = mem.get("shared_clean_kb", 0) + mem.get("shared_dirty_kb", 0)
+        private = mem.get("private_clean_kb", 0) + mem.get("private_dirty_kb", 0)
+        total_pss += mem.get("pss_kb", 0)
+        print(f"📊 worker {slot} pid={pid} rss={mem.get('rss_kb', '?')}KiB "
+              f"pss={mem.get('pss_kb', '?')}KiB shared={shared}KiB private={private}KiB")
+    # PSS splits shared pages between the processes mapping them, so the sum is
+    # the real footprint; each worker's own model copy is in its private KiB
+    print(f"📊 {len(_workers)} workers total pss={total_pss}KiB")
+
+
+def shutdown(signum, frame):
+    global _shutting_down
+    _shutting_down = True
+    print(f"🛑 Supervisor received signal {signum}, stopping {len(_workers)} workers")
+    for pid in list(_workers):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+
+def main():
+    # Read-only tables (MESSAGES / CATEGORY_MAPPINGS) come in with `import tasks`.
+    # The model is loaded by each worker after the fork, never here.
+    if "tensorflow" in sys.modules:
+        raise RuntimeError("TensorFlow was imported before forking consumer workers; it does not survive fork()")
+
+    # Move everything allocated so far out of the GC's reach so collections in
+    # the children don't touch (and un-share) the parent's pages.
+    gc.collect()
+    gc.freeze()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    for slot in range(WORKERS):
+        spawn_worker(slot)
+    print(f"🟢 Supervisor started {WORKERS} consumer workers on `{settings.QUEUE_NAME}`")
+
+    last_report = time.monotonic()
+    while _workers or (_restart_at and not _shutting_down):
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            if not _restart_at:
+                break
+            pid = 0  # every worker is waiting out its backoff
+
+        if pid:
+            slot = _workers.pop(pid)
+            if not _shutting_down:
+                crashes = _restarts.get(slot, 0) + 1
+                _restarts[slot] = crashes
+                backoff = min(RESTART_BACKOFF_MAX, 2 ** (crashes - 1))
+                print(f"⚠️ Worker {slot} (pid={pid}) exited with status {status}; restarting in {backoff:.0f}s")
+                _restart_at[slot] = time.monotonic() + backoff
+            continue
+
+        now = time.monotonic()
+        for slot, due in list(_restart_at.items()):
+            if now >= due and not _shutting_down:
+                del _restart_at[slot]
+                spawn_worker(slot)
+
+        if now - last_report >= MEMORY_REPORT_INTERVAL:
+            report_memory()
+            last_report = time.monotonic()
+            # A worker that survived a full report interval is considered healthy again
+            for slot in _workers.values():
+                _restarts[slot] = 0
+        time.sleep(0.5)
+
+    print("Supervisor stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,21 @@
 # recommendation-service/tasks.py
+#
+# TensorFlow, NumPy and the Keras model are loaded lazily: on the first
+# prediction, or up front through warm_up(). Importing this module stays cheap
+# for consumer.py, the supervisor and tooling.
 import asyncio
-from fastapi import FastAPI
-from pydantic import BaseModel
-from typing import Optional
+import threading
+import time
+from contextlib import aclosing
 from config import settings
-from rpc_client import rpc_call
-from datetime import datetime
-import pytz
-import tensorflow as tf
-import numpy as np
+from rpc_client import rpc_call, rpc_stream
+from cache import TTLCache
+from schemas import RecommendationRequest
+import geocell
 import logging
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-
-class RecommendationRequest(BaseModel):
-    user_id: str
-    lat: float
-    lon: float
-    age: Optional[int] = None
-    gender: Optional[str] = None
-    time_of_day: Optional[str] = None
-    motion_state: Optional[str] = None  # Added optional motion_state
-
 # Predefined messages for model predictions with comments for clarity
 MESSAGES = [
     "You're in a green space. Let's disconnect to reconnect.",  # 0: Near_Park
@@ -72,20 +64,116 @@ CATEGORY_MAPPINGS = {
     19: {"type": "places", "query": "walking trail"}  # Walking_Jogging
 }
 
-# Load model on startup
-model = tf.keras.models.load_model(settings.MODEL_PATH)
+# Per-worker RPC result caches keyed by geocell (see ROUTING_MODE=sharded)
+location_cache = TTLCache(settings.RPC_CACHE_TTL_SECONDS)
+weather_cache = TTLCache(settings.RPC_CACHE_TTL_SECONDS)
+places_cache = TTLCache(settings.RPC_CACHE_TTL_SECONDS)
+
+async def cached_rpc_call(cache: TTLCache, key: tuple, queue_name: str, payload: dict, **kwargs) -> dict:
+    result = cache.get(key)
+    if result is None:
+        result = await rpc_call(queue_name, payload, **kwargs)
+        if "error" not in result:
+            cache.set(key, result)
+    return result
+
+async def fetch_events(state: str, country: str) -> list:
+    """
+    Events for the prompt, per EVENTS_RPC_MODE. "stream" takes the card-level
+    listing as soon as it is parsed, swaps in detail-enriched events as they
+    arrive, and stops once the first EVENTS_FIRST_K are enriched or
+    EVENTS_ENRICH_WAIT_SECONDS after the listing, whichever comes first.
+    """
+    payload = {"state": state, "country": country}
+    if settings.EVENTS_RPC_MODE == "first_k":
+        resp = await rpc_call(settings.EVENTS_RPC_QUEUE, {**payload, "first_k": settings.EVENTS_FIRST_K}, timeout=120.0)
+        return resp.get("events", [])
+    if settings.EVENTS_RPC_MODE != "stream":
+        resp = await rpc_call(settings.EVENTS_RPC_QUEUE, payload, timeout=120.0)
+        return resp.get("events", [])
+
+    loop = asyncio.get_running_loop()
+    events, enrich_deadline = [], None
+    async with aclosing(rpc_stream(settings.EVENTS_RPC_QUEUE, payload, timeout=120.0)) as stream:
+        while True:
+            try:
+                if enrich_deadline is None:
+                    msg = await stream.__anext__()
+                else:
+                    msg = await asyncio.wait_for(stream.__anext__(), max(enrich_deadline - loop.time(), 0))
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                if enrich_deadline is None:
+                    raise
+                logger.info("Events: enrichment wait elapsed, using card-level data")
+                break
+
+            if msg["type"] == "listing":
+                events = list(msg["events"])
+                enrich_deadline = loop.time() + settings.EVENTS_ENRICH_WAIT_SECONDS
+            elif msg["type"] == "event" and msg["index"] < len(events):
+                events[msg["index"]] = msg["event"]
+            elif msg["type"] == "end":
+                if "error" in msg:
+                    logger.warning(f"Events RPC error: {msg['error']}")
+                break
+            if events and all("full_date_time" in event for event in events[:settings.EVENTS_FIRST_K]):
+                break
+    return events
 
-@app.get("/recommendation/async")
-async def recommend_async(req: RecommendationRequest):
-    asyncio.create_task(process_recommendation_task(req))
-    return {"message": f"Enqueued recommendation for {req.user_id}"}
+# Model state, filled in by get_model() / warm_up()
+_model = None
+_model_lock = threading.Lock()
+readiness = {"ready": False, "model_load_ms": None, "warmup_ms": None, "error": None}
 
-@app.get("/recommendation")
-async def recommend(req: RecommendationRequest):
-    prompt = await process_recommendation_task(req)
-    return {"recommendation": prompt}
+def get_model():
+    """Imports TensorFlow and loads the Keras model on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                started = time.perf_counter()
+                import tensorflow as tf
+                _model = tf.keras.models.load_model(settings.MODEL_PATH)
+                readiness["model_load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                logger.info(f"Loaded model from {settings.MODEL_PATH} in {readiness['model_load_ms']} ms")
+    return _model
+
+def predict_category(features: list) -> tuple:
+    """Returns (message_index, softmax confidence) for one feature row."""
+    import numpy as np
+    prediction = get_model().predict(np.array([features]), verbose=0)
+    return int(np.argmax(prediction)), float(np.max(prediction))
+
+def warm_up() -> dict:
+    """
+    Loads the model and runs one dummy prediction so the first real request
+    doesn't pay for graph tracing. Blocking; call it via asyncio.to_thread.
+    """
+    if readiness["ready"]:
+        return readiness
+    try:
+        started = time.perf_counter()
+        predict_category([30] + [0] * 22)
+        readiness["warmup_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        readiness["ready"] = True
+        readiness["error"] = None
+        logger.info(f"Model warm-up finished in {readiness['warmup_ms']} ms")
+    except Exception as e:
+        readiness["error"] = str(e)
+        logger.error(f"Model warm-up failed: {e}")
+    return readiness
 
 async def process_recommendation_task(task: RecommendationRequest) -> str:
+    context = await build_recommendation_context(task)
+    return context["prompt"]
+
+async def build_recommendation_context(task: RecommendationRequest) -> dict:
+    """
+    Runs the RPC fan-out and the model prediction, and returns everything the
+    generators need: the LLM prompt plus the raw context used to build it.
+    """
     user_id = task.user_id
     lat = task.lat
     lon = task.lon
@@ -101,16 +189,19 @@ async def process_recommendation_task(task: RecommendationRequest) -> str:
         parsed_time = f"{hour} {period}"
 
     # Fetch location, weather, and user prefs (always needed)
-    location = await rpc_call(
+    cell = geocell.encode(lat, lon, settings.RPC_CACHE_GEOCELL_PRECISION)
+    location = await cached_rpc_call(
+        location_cache,
+        (cell, time_of_day, age, gender, motion_state),
         settings.LOCATION_RPC_QUEUE,
         {"lat": lat, "lon": lon, "time": time_of_day, "user_id": user_id, "age": age, "gender": gender, "motion_state": motion_state}
     )
-    weather = await rpc_call(settings.WEATHER_RPC_QUEUE, {"lat": lat, "lon": lon})
+    weather = await cached_rpc_call(weather_cache, (cell,), settings.WEATHER_RPC_QUEUE, {"lat": lat, "lon": lon})
     prefs_resp = await rpc_call(settings.USER_PREFS_RPC_QUEUE, {"user_id": user_id})
     activities = prefs_resp.get("activities", [])  # Assume this includes behaviors if expanded
 
     # Adjust activity flags based on user preferences (if available)
-    activities_flags = location.get("activities", {})
+    activities_flags = dict(location.get("activities", {}))  # copy: location may come from the cache
     if activities:
         # Example: If user prefers "fitness", boost gym/walking flags
         for activity in activities:
@@ -120,7 +211,7 @@ async def process_recommendation_task(task: RecommendationRequest) -> str:
             # Add more preference-based adjustments as needed
 
     # Neural Network Prediction
-    input_data = np.array([[
+    message_index, confidence = predict_category([
         age or 30,
         1 if gender == "M" else 0,
         1 if gender == "F" else 0,
@@ -144,11 +235,9 @@ async def process_recommendation_task(task: RecommendationRequest) -> str:
         activities_flags.get("At_Outdoor_Event", 0),
         activities_flags.get("At_Home", 0),
         activities_flags.get("Walking_Jogging", 0)
-    ]])
-    prediction = model.predict(input_data)
-    message_index = np.argmax(prediction)
+    ])  # confidence is the softmax probability of the winning category
     recommended_message = MESSAGES[message_index]
-    logger.info(f"Predicted message index: {message_index}, message: {recommended_message}")
+    logger.info(f"Predicted message index: {message_index}, message: {recommended_message}, confidence: {confidence:.3f}")
 
     # Dynamic conditional data fetching based on category mapping
     places, events, blogs = [], [], []
@@ -157,11 +246,10 @@ async def process_recommendation_task(task: RecommendationRequest) -> str:
     
     if fetch_type == "places":
         query = mapping.get("query", "relaxation spot")  # Fallback query
-        places_resp = await rpc_call(settings.PLACES_RPC_QUEUE, {"lat": lat, "lon": lon, "query": query})
+        places_resp = await cached_rpc_call(places_cache, (cell, query), settings.PLACES_RPC_QUEUE, {"lat": lat, "lon": lon, "query": query})
         places = places_resp.get("places", [])
     elif fetch_type == "events":
-        events_resp = await rpc_call(settings.EVENTS_RPC_QUEUE, {"state": location.get("address", {}).get("state", ""), "country": location.get("address", {}).get("country", "")}, timeout=120.0)
-        events = events_resp.get("events", [])
+        events = await fetch_events(location.get("address", {}).get("state", ""), location.get("address", {}).get("country", ""))
     elif fetch_type == "blogs":
         query = mapping.get("query", "local activities")  # Fallback query
         blogs_resp = await rpc_call(settings.BLOGS_RPC_QUEUE, {"query": query})
@@ -196,4 +284,17 @@ async def process_recommendation_task(task: RecommendationRequest) -> str:
         Output: A short, friendly sentence suggesting one specific activity with emojis (e.g., '☕ Relax at Nearby Cafe in Exact Location Name during this cloudy afternoon!'). Keep it concise and actionable.
     """
     logger.info(f"Prompt sent to LLM: {prompt}")
-    return prompt
\ No newline at end of file
+    return {
+        "prompt": prompt,
+        "message_index": message_index,
+        "confidence": confidence,
+        "fetch_type": fetch_type,
+        "recommended_message": recommended_message,
+        "location": location,
+        "weather": weather,
+        "activities": activities,
+        "places": places,
+        "events": events,
+        "blogs": blogs,
+        "parsed_time": parsed_time,
+    }
\ No newline at end of file
@@ -0,0 +1,206 @@
+# recommendation-service/warmer.py
+#
+# Predictive pre-computation for active users. Every request seen by the API is
+# recorded (server minute-of-day + geocell + request params). A background loop
+# looks for users who usually show up from a given geocell in the next few
+# minutes, runs the normal generation pipeline for them ahead of time at a
+# bounded rate, and stores the result with a short TTL. /recommendation serves
+# that result when the incoming request matches the precomputed context.
+
+import asyncio
+import json
+import time
+import logging
+from datetime import datetime
+from config import settings
+from schemas import RecommendationRequest
+from recommender import generate_recommendation
+import geocell
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_USERS_KEY = "warmer:active_users"   # zset user_id -> last seen (epoch seconds)
+WARMER_STATS_KEY = "stats:warmer"
+MINUTES_PER_DAY = 24 * 60
+
+
+def _history_key(user_id: str) -> str:
+    return f"activity:{user_id}"
+
+
+def _precomputed_key(user_id: str) -> str:
+    return f"precomputed:{user_id}"
+
+
+def _minute_of_day(ts: float) -> int:
+    now = datetime.fromtimestamp(ts)
+    return now.hour * 60 + now.minute
+
+
+def _day(ts: float):
+    return datetime.fromtimestamp(ts).date()
+
+
+def _minute_distance(a: int, b: int) -> int:
+    """Circular distance between two minutes of the day."""
+    diff = abs(a - b) % MINUTES_PER_DAY
+    return min(diff, MINUTES_PER_DAY - diff)
+
+
+async def _incr_stat(redis_client, field: str):
+    try:
+        await redis_client.hincrby(WARMER_STATS_KEY, field, 1)
+    except Exception as e:
+        logger.warning(f"Could not update warmer stats: {e}")
+
+
+async def record_request(redis_client, req: RecommendationRequest):
+    """Remember when and where this user asked, for the warmer to learn from."""
+    if redis_client is None:
+        return
+    now = time.time()
+    entry = {
+        "ts": now,
+        "minute": _minute_of_day(now),
+        "geocell": geocell.encode(req.lat, req.lon, settings.WARMER_GEOCELL_PRECISION),
+        **req.dict(),
+    }
+    try:
+        pipe = redis_client.pipeline()
+        pipe.lpush(_history_key(req.user_id), json.dumps(entry))
+        pipe.ltrim(_history_key(req.user_id), 0, settings.WARMER_HISTORY_SIZE - 1)
+        pipe.expire(_history_key(req.user_id), settings.WARMER_ACTIVE_DAYS * 86400)
+        pipe.zadd(ACTIVE_USERS_KEY, {req.user_id: now})
+        await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not record request history for {req.user_id}: {e}")
+
+
+def predict_next_request(history: list, now: float):
+    """
+    Returns the request a user is likely to make within the next
+    WARMER_LOOKAHEAD_MINUTES, or None. A slot qualifies when the user asked from
+    the same geocell around that time of day on at least WARMER_MIN_OBSERVATIONS
+    distinct earlier days; today's requests (the current session) don't count.
+    """
+    now_minute = _minute_of_day(now)
+    today = _day(now)
+    days_by_cell = {}
+    upcoming = []
+    for entry in history:
+        offset = (entry["minute"] - now_minute) % MINUTES_PER_DAY
+        if offset > settings.WARMER_LOOKAHEAD_MINUTES:
+            continue
+        # The day whose slot this request fell in (a slot can run past midnight)
+        day = _day(entry["ts"] - offset * 60)
+        if day == today:
+            continue
+        upcoming.append(entry)
+        days_by_cell.setdefault(entry["geocell"], set()).add(day)
+    if not upcoming:
+        return None
+
+    # Ties go to the cell asked from most recently (history is newest-first)
+    cell, days = max(days_by_cell.items(), key=lambda item: len(item[1]))
+    if len(days) < settings.WARMER_MIN_OBSERVATIONS:
+        return None
+
+    # This is the latest request from that cell
+    return next(entry for entry in upcoming if entry["geocell"] == cell)
+
+
+def context_matches(precomputed: dict, req: RecommendationRequest, now: float) -> bool:
+    if precomputed.get("geocell") != geocell.encode(req.lat, req.lon, settings.WARMER_GEOCELL_PRECISION):
+        return False
+    if precomputed.get("motion_state") != req.motion_state:
+        return False
+    return _minute_distance(precomputed["minute"], _minute_of_day(now)) <= settings.WARMER_MATCH_WINDOW_MINUTES
+
+
+async def lookup_precomputed(redis_client, req: RecommendationRequest):
+    """Returns a fresh precomputed recommendation for this request's context, or None."""
+    if redis_client is None or not settings.WARMER_ENABLED:
+        return None
+    try:
+        raw = await redis_client.get(_precomputed_key(req.user_id))
+    except Exception as e:
+        logger.warning(f"Could not read precomputed recommendation for {req.user_id}: {e}")
+        return None
+
+    if raw and context_matches(json.loads(raw), req, time.time()):
+        await _incr_stat(redis_client, "hits")
+        return json.loads(raw)["recommendation"]
+    await _incr_stat(redis_client, "misses")
+    return None
+
+
+async def precompute_for_user(redis_client, user_id: str, entry: dict):
+    req = RecommendationRequest(
+        user_id=user_id,
+        lat=entry["lat"],
+        lon=entry["lon"],
+        age=entry.get("age"),
+        gender=entry.get("gender"),
+        time_of_day=entry.get("time_of_day"),
+        motion_state=entry.get("motion_state"),
+    )
+    # Speculative work: kept out of the /recommendation/stats path latencies
+    recommendation = await generate_recommendation(req, redis_client, record_stats=False)
+    precomputed = {
+        "recommendation": recommendation,
+        "geocell": entry["geocell"],
+        "minute": entry["minute"],
+        "motion_state": entry.get("motion_state"),
+        "created": time.time(),
+    }
+    await redis_client.set(_precomputed_key(user_id), json.dumps(precomputed), ex=settings.WARMER_TTL_SECONDS)
+    await _incr_stat(redis_client, "precomputed")
+    print(f"🔮 Precomputed recommendation for user={user_id} geocell={entry['geocell']}")
+
+
+async def warm_once(redis_client):
+    """One pass over recently active users, bounded to WARMER_MAX_PER_MINUTE jobs."""
+    now = time.time()
+    active_since = now - settings.WARMER_ACTIVE_DAYS * 86400
+    await redis_client.zremrangebyscore(ACTIVE_USERS_KEY, "-inf", active_since)
+    user_ids = await redis_client.zrangebyscore(ACTIVE_USERS_KEY, active_since, "+inf")
+
+    interval = 60.0 / max(1, settings.WARMER_MAX_PER_MINUTE)
+    for user_id in user_ids:
+        raw_history = await redis_client.lrange(_history_key(user_id), 0, -1)
+        entry = predict_next_request([json.loads(item) for item in raw_history], now)
+        if entry is None:
+            continue
+
+        existing = await redis_client.get(_precomputed_key(user_id))
+        if existing:
+            existing = json.loads(existing)
+            if existing["geocell"] == entry["geocell"] and existing["minute"] == entry["minute"]:
+                continue  # still fresh for the same slot
+
+        try:
+            await precompute_for_user(redis_client, user_id, entry)
+        except Exception as e:
+            logger.error(f"Warmer failed for user {user_id}: {e}")
+            await _incr_stat(redis_client, "errors")
+        await asyncio.sleep(interval)
+
+
+async def run_warmer(redis_client):
+    print(f"🔥 Recommendation warmer running every {settings.WARMER_INTERVAL_SECONDS}s")
+    while True:
+        try:
+            await warm_once(redis_client)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Warmer pass failed: {e}")
+        await asyncio.sleep(settings.WARMER_INTERVAL_SECONDS)
+
+
+async def get_warmer_stats(redis_client) -> dict:
+    raw = await redis_client.hgetall(WARMER_STATS_KEY) if redis_client else {}
+    stats = {field: int(raw.get(field, 0)) for field in ("hits", "misses", "precomputed", "errors")}
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+    return stats